@@ -4,47 +4,932 @@ CSV to SQLite Converter
 
 This script reads a CSV file and creates a SQLite database with a table matching
 the structure of the CSV data. It automatically determines appropriate SQLite data types.
+
+With --manifest it instead imports several related CSVs into one normalized
+schema (see import_manifest and data/import_manifest.json).
 """
 
 import os
+import io
 import sys
 import csv
+import queue
 import sqlite3
 import argparse
 import datetime
+import hashlib
+import itertools
+import json
 import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
+from index_advisor import profile_columns, load_time_indexes, print_profiles
+
+
+# Precompiled patterns for type detection. INTEGER values also match REAL,
+# so a column that mixes integers and decimals widens to REAL.
+INTEGER_PATTERN = re.compile(r'-?\d+')
+REAL_PATTERN = re.compile(r'-?\d+(?:\.\d+)?')
+DATE_PATTERN = re.compile(r'\d{4}-\d{2}-\d{2}')
+BOOLEAN_VALUES = frozenset(('true', 'false'))
+
+# Candidate types in order of preference, with their value checks
+TYPE_CHECKS = {
+    "INTEGER": INTEGER_PATTERN.fullmatch,
+    "REAL": REAL_PATTERN.fullmatch,
+    "BOOLEAN": lambda v: v.lower() in BOOLEAN_VALUES,
+    "DATE": DATE_PATTERN.fullmatch,
+}
+
+
+class ColumnTypeTracker:
+    """
+    Incrementally narrows the SQLite type of one column as values stream past.
+
+    Starts with every candidate type and drops those a value does not match;
+    the column type is the first remaining candidate, or TEXT once none are
+    left. A column with no non-blank values yet is TEXT, as nothing
+    constrains it. After the first value the remaining candidates are nested (INTEGER
+    implies REAL) or a single type, so later values only need checking against
+    the current type.
+    """
+
+    def __init__(self):
+        self.candidates = list(TYPE_CHECKS)
+        self.seen = False
+
+    def observe(self, value):
+        """Narrow the candidates using one raw CSV value. Returns True if the type changed."""
+        if not self.candidates or not value.strip():
+            return False
+        if self.seen and TYPE_CHECKS[self.candidates[0]](value):
+            return False
+        before = self.sqlite_type
+        self.candidates = [t for t in self.candidates if TYPE_CHECKS[t](value)]
+        self.seen = True
+        return self.sqlite_type != before
+
+    @property
+    def sqlite_type(self):
+        return self.candidates[0] if self.seen and self.candidates else "TEXT"
+
+    @classmethod
+    def for_type(cls, sqlite_type):
+        """A tracker that has already settled on sqlite_type (used by chunk workers)."""
+        tracker = cls()
+        tracker.candidates = list(WIDER_TYPES.get(sqlite_type, ()))
+        tracker.seen = True
+        return tracker
+
+
+# Types a settled column can still widen to without becoming TEXT
+WIDER_TYPES = {
+    "INTEGER": ("INTEGER", "REAL"),
+    "REAL": ("REAL",),
+    "BOOLEAN": ("BOOLEAN",),
+    "DATE": ("DATE",),
+}
+
+
+def merge_types(a, b):
+    """The narrowest type that holds values of both types a and b."""
+    if a == b:
+        return a
+    if {a, b} == {"INTEGER", "REAL"}:
+        return "REAL"
+    return "TEXT"
+
 
 def detect_column_type(values):
     """Detect the SQLite data type based on column values."""
-    # Skip empty values for type detection
-    values = [v for v in values if v.strip()]
-    if not values:
-        return "TEXT"
-    
-    # Check if all values are integers
-    if all(re.match(r'^-?\d+$', v) for v in values):
+    tracker = ColumnTypeTracker()
+    for value in values:
+        tracker.observe(value)
+    return tracker.sqlite_type
+
+
+def quote_identifier(name):
+    """Quote a table or column name for use in SQL."""
+    return '"' + name.replace('"', '""') + '"'
+
+
+def make_converter(tracker, declared_type):
+    """
+    Build the value converter for one column, specialised to its declared type.
+
+    Blank values become NULL and booleans become True/False. Values that do
+    not fit the declared type are passed through unchanged and reported to
+    the column's tracker so the column can be widened after loading. Values
+    that do fit are never re-checked by the tracker, since they also fit any
+    type it could have widened to.
+    """
+    observe = tracker.observe
+
+    if declared_type == "BOOLEAN":
+        def convert(value):
+            lowered = value.lower()
+            if lowered == 'true':
+                return True
+            if lowered == 'false':
+                return False
+            if not value or value.isspace():
+                return None
+            observe(value)
+            return value
+        return convert
+
+    check = TYPE_CHECKS.get(declared_type)
+    if check is None:
+        # TEXT (or an unknown type on an existing table) accepts anything
+        def convert(value):
+            return None if not value or value.isspace() else value
+        return convert
+
+    def convert(value):
+        if check(value):
+            return value
+        if not value or value.isspace():
+            return None
+        observe(value)
+        return value
+    return convert
+
+
+def convert_row(row, converters):
+    """Convert one raw CSV row with the per-column converters."""
+    if len(row) < len(converters):
+        # Short rows get NULLs for their missing trailing columns
+        row = row + [''] * (len(converters) - len(row))
+    return [convert(value) for convert, value in zip(converters, row)]
+
+
+def drop_table_indexes(cursor, table_name):
+    """Drop the explicit indexes on a table, returning their SQL so they can be recreated."""
+    indexes = cursor.execute(
+        "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL",
+        (table_name,)
+    ).fetchall()
+    for name, _ in indexes:
+        cursor.execute(f"DROP INDEX {quote_identifier(name)}")
+    return [sql for _, sql in indexes]
+
+
+def configure_bulk_load(conn, journal_mode="OFF", cache_size_mb=256):
+    """
+    Trade durability for speed while loading.
+
+    journal_mode OFF skips the rollback journal entirely (a crash mid-load can
+    corrupt the database, so only use it for databases you can rebuild); WAL
+    keeps crash safety with cheaper commits. synchronous=OFF stops waiting on
+    fsync, and the larger page cache keeps index and table pages in memory.
+    """
+    conn.execute(f"PRAGMA journal_mode = {journal_mode}")
+    conn.execute("PRAGMA synchronous = OFF")
+    conn.execute(f"PRAGMA cache_size = {-cache_size_mb * 1024}")
+    conn.execute("PRAGMA temp_store = MEMORY")
+
+
+def widen_columns(cursor, table_name, headers, declared_types, final_types):
+    """
+    Rebuild a table whose columns turned out to need wider types than declared.
+
+    SQLite cannot change a column's type in place, so the data is copied into
+    a new table with the final types and swapped in. Booleans stored as 1/0
+    are turned back into 'true'/'false' when their column widens to TEXT.
+    Only widening to REAL or TEXT casts; CAST to DATE or BOOLEAN would apply
+    NUMERIC affinity and turn '2024-01-01' into 2024, so those copy values
+    unchanged.
+    """
+    temp_name = f"{table_name}__widened"
+    column_defs = ",\n".join(
+        f"    {quote_identifier(h)} {t}" for h, t in zip(headers, final_types)
+    )
+    cursor.execute(f"CREATE TABLE {quote_identifier(temp_name)} (\n{column_defs}\n)")
+
+    select_exprs = []
+    for header, old_type, new_type in zip(headers, declared_types, final_types):
+        column = quote_identifier(header)
+        if old_type == new_type:
+            select_exprs.append(column)
+        elif old_type == "BOOLEAN":
+            select_exprs.append(f"CASE {column} WHEN 1 THEN 'true' WHEN 0 THEN 'false' ELSE {column} END")
+        elif new_type in ("REAL", "TEXT"):
+            select_exprs.append(f"CAST({column} AS {new_type})")
+        else:
+            select_exprs.append(column)
+
+    cursor.execute(
+        f"INSERT INTO {quote_identifier(temp_name)} "
+        f"SELECT {', '.join(select_exprs)} FROM {quote_identifier(table_name)}"
+    )
+    # Dropping the table drops its indexes too; recreate them on the new one
+    indexes = drop_table_indexes(cursor, table_name)
+    cursor.execute(f"DROP TABLE {quote_identifier(table_name)}")
+    cursor.execute(f"ALTER TABLE {quote_identifier(temp_name)} RENAME TO {quote_identifier(table_name)}")
+    for index_sql in indexes:
+        cursor.execute(index_sql)
+
+
+# Side table holding a content hash per synced row, so unchanged rows are skipped
+SYNC_STATE_TABLE = "_csv_sync_state"
+
+# Text SQLite turns into a number when storing it in a numeric column
+NUMERIC_TEXT_PATTERN = re.compile(r'\s*[+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?\s*')
+
+
+def column_affinity(declared_type):
+    """SQLite's type affinity for a declared column type (DATE and BOOLEAN are NUMERIC)."""
+    declared = (declared_type or "").upper()
+    if "INT" in declared:
         return "INTEGER"
-    
-    # Check if all values are floats
-    if all(re.match(r'^-?\d+\.\d+$', v) for v in values):
+    if any(name in declared for name in ("CHAR", "CLOB", "TEXT")):
+        return "TEXT"
+    if not declared or "BLOB" in declared:
+        return "BLOB"
+    if any(name in declared for name in ("REAL", "FLOA", "DOUB")):
         return "REAL"
-    
-    # Check if all values are booleans
-    if all(v.lower() in ('true', 'false') for v in values):
+    return "NUMERIC"
+
+
+def stored_value(value, affinity):
+    """
+    The value SQLite stores when value is inserted into a column of this affinity.
+
+    Lets sync_rows compare CSV keys with the keys already in a table, so
+    "01" matches a stored INTEGER 1.
+    """
+    if isinstance(value, bool):
+        value = int(value)
+    if affinity in ("INTEGER", "NUMERIC", "REAL") and isinstance(value, str):
+        if not NUMERIC_TEXT_PATTERN.fullmatch(value):
+            return value
+        number = float(value)
+        if affinity == "REAL" or not number.is_integer() or not -2 ** 63 <= number < 2 ** 63:
+            return number
+        try:
+            return int(value)  # exact, also above 2**53
+        except ValueError:
+            return int(number)  # "1.0", "1e3"
+    if affinity == "REAL" and isinstance(value, int):
+        return float(value)
+    if affinity == "TEXT" and isinstance(value, (int, float)):
+        return str(value)
+    return value
+
+
+def sync_rows(cursor, table_name, headers, key, rows, converters, batch_size,
+              delete_missing=False):
+    """
+    Upsert CSV rows into an existing table keyed on one column.
+
+    Each row's raw values are hashed and compared with the hash stored for
+    its key in SYNC_STATE_TABLE; unchanged rows are skipped, new keys are
+    inserted and changed rows updated with INSERT ... ON CONFLICT DO UPDATE.
+    Columns the CSV does not mention are left untouched. With
+    delete_missing, keys no longer present in the CSV are deleted.
+    Keys are compared as stored, after the key column's type affinity is
+    applied, so "01" in the CSV matches an INTEGER key 1 in the table.
+
+    Returns a dict of inserted/updated/unchanged/deleted/skipped counts.
+    """
+    table = quote_identifier(table_name)
+    key_index = headers.index(key)
+    cursor.execute(
+        f"CREATE TABLE IF NOT EXISTS {SYNC_STATE_TABLE} ("
+        "table_name TEXT NOT NULL, row_key TEXT NOT NULL, row_hash TEXT NOT NULL, "
+        "PRIMARY KEY (table_name, row_key)) WITHOUT ROWID"
+    )
+    try:
+        cursor.execute(
+            f"CREATE UNIQUE INDEX IF NOT EXISTS {quote_identifier(f'ux_{table_name}_{key}')} "
+            f"ON {table} ({quote_identifier(key)})"
+        )
+    except sqlite3.IntegrityError:
+        raise ValueError(
+            f"Column '{key}' has duplicate values in table '{table_name}'; "
+            "remove the duplicates (or rebuild the table) before syncing on it"
+        )
+
+    known_hashes = dict(cursor.execute(
+        f"SELECT row_key, row_hash FROM {SYNC_STATE_TABLE} WHERE table_name = ?", (table_name,)
+    ))
+    key_type = next(
+        (type_ for _, name, type_, *_ in cursor.execute(f"PRAGMA table_info({table})") if name == key), ""
+    )
+    affinity = column_affinity(key_type)
+    convert_key = converters[key_index]
+    # Rows present in the table but never synced count as existing, not new
+    existing_keys = {k for (k,) in cursor.execute(
+        f"SELECT {quote_identifier(key)} FROM {table} WHERE {quote_identifier(key)} IS NOT NULL"
+    )}
+
+    columns = ", ".join(quote_identifier(h) for h in headers)
+    placeholders = ", ".join(["?"] * len(headers))
+    updates = ", ".join(f"{quote_identifier(h)} = excluded.{quote_identifier(h)}" for h in headers if h != key)
+    upsert_sql = (
+        f"INSERT INTO {table} ({columns}) VALUES ({placeholders}) "
+        f"ON CONFLICT ({quote_identifier(key)}) DO "
+        + (f"UPDATE SET {updates}" if updates else "NOTHING")
+    )
+    state_sql = (
+        f"INSERT INTO {SYNC_STATE_TABLE} (table_name, row_key, row_hash) VALUES (?, ?, ?) "
+        "ON CONFLICT (table_name, row_key) DO UPDATE SET row_hash = excluded.row_hash"
+    )
+
+    # The header list is part of every hash, so adding a column re-syncs all rows
+    header_prefix = "\x1f".join(headers).encode() + b"\x1e"
+    counts = {"inserted": 0, "updated": 0, "unchanged": 0, "deleted": 0, "skipped": 0}
+    seen_keys = set()
+    batch, state_batch = [], []
+
+    for row in rows:
+        raw_key = row[key_index].strip() if key_index < len(row) else ""
+        if not raw_key:
+            counts["skipped"] += 1
+            continue
+        row_key = stored_value(convert_key(raw_key), affinity)
+        state_key = str(row_key)
+        seen_keys.add(row_key)
+        row_hash = hashlib.blake2b(header_prefix + "\x1f".join(row).encode(), digest_size=16).hexdigest()
+        if known_hashes.get(state_key) == row_hash:
+            counts["unchanged"] += 1
+            continue
+        counts["updated" if row_key in existing_keys else "inserted"] += 1
+        existing_keys.add(row_key)
+        known_hashes[state_key] = row_hash
+        batch.append(convert_row(row, converters))
+        state_batch.append((table_name, state_key, row_hash))
+
+        if len(batch) >= batch_size:
+            cursor.executemany(upsert_sql, batch)
+            cursor.executemany(state_sql, state_batch)
+            batch, state_batch = [], []
+
+    if batch:
+        cursor.executemany(upsert_sql, batch)
+        cursor.executemany(state_sql, state_batch)
+
+    if delete_missing:
+        # Stored key values, so each DELETE is a lookup in the key's unique index
+        missing = [(k,) for k in existing_keys if k not in seen_keys]
+        cursor.executemany(f"DELETE FROM {table} WHERE {quote_identifier(key)} = ?", missing)
+        cursor.executemany(
+            f"DELETE FROM {SYNC_STATE_TABLE} WHERE table_name = ? AND row_key = ?",
+            [(table_name, str(k)) for (k,) in missing]
+        )
+        counts["deleted"] = len(missing)
+
+    return counts
+
+
+def find_chunk_ranges(csv_path, chunk_bytes, block_size=1 << 20):
+    """
+    Split a CSV file into byte ranges that each start and end on a row boundary.
+
+    The first range is the header row. A boundary is the first newline at or
+    after each chunk_bytes target that is not inside a quoted field; quote
+    state is tracked by counting '"' characters (escaped "" pairs cancel
+    out), so the file is scanned once at C speed without parsing it.
+    """
+    ranges = []
+    chunk_start = 0
+    target = 0  # the first boundary found ends the header row
+    in_quotes = 0
+    pos = 0
+    with open(csv_path, 'rb') as f:
+        while True:
+            block = f.read(block_size)
+            if not block:
+                break
+            i = 0  # quote parity is accounted for up to block[i]
+            while target - pos < len(block):
+                newline = block.find(b'\n', max(target - pos, i))
+                if newline == -1:
+                    break
+                in_quotes ^= block.count(b'"', i, newline) & 1
+                i = newline + 1
+                if not in_quotes:
+                    boundary = pos + newline + 1
+                    ranges.append((chunk_start, boundary))
+                    chunk_start = boundary
+                    target = boundary + chunk_bytes
+            in_quotes ^= block.count(b'"', i) & 1
+            pos += len(block)
+    if chunk_start < pos:
+        ranges.append((chunk_start, pos))
+    return ranges
+
+
+def parse_chunk(task):
+    """
+    Worker: parse and convert the rows in one byte range of a CSV file.
+
+    Returns (rows, types) where types are the column types after any
+    widening caused by values in this chunk.
+    """
+    csv_path, start, end, declared_types = task
+    with open(csv_path, 'rb') as f:
+        f.seek(start)
+        text = f.read(end - start).decode('utf-8')
+    trackers = [ColumnTypeTracker.for_type(t) for t in declared_types]
+    converters = [make_converter(t, d) for t, d in zip(trackers, declared_types)]
+    rows = [convert_row(row, converters) for row in csv.reader(io.StringIO(text, newline=''))]
+    types = [
+        declared if declared not in TYPE_CHECKS else tracker.sqlite_type
+        for tracker, declared in zip(trackers, declared_types)
+    ]
+    return rows, types
+
+
+def parallel_insert(conn, insert_sql, csv_path, declared_types, workers,
+                    chunk_bytes, batch_size, queue_size=8):
+    """
+    Load a CSV with a pool of parser processes feeding a single writer thread.
+
+    Chunks are parsed out of order by the workers but handed to the writer in
+    file order over a bounded queue, so at most a few chunks are held in
+    memory and rows keep their original order. The writer thread is the only
+    user of the sqlite connection. Returns (rows_inserted, final_types).
+    """
+    ranges = find_chunk_ranges(csv_path, chunk_bytes)[1:]  # skip the header row
+    work_queue = queue.Queue(maxsize=queue_size)
+    writer_state = {"rows": 0, "error": None}
+
+    def writer():
+        cursor = conn.cursor()
+        while True:
+            rows = work_queue.get()
+            if rows is None:
+                return
+            if writer_state["error"] is not None:
+                continue  # drain so the producer never blocks
+            try:
+                for i in range(0, len(rows), batch_size):
+                    cursor.executemany(insert_sql, rows[i:i + batch_size])
+                writer_state["rows"] += len(rows)
+                print(f"Processed {writer_state['rows']} rows...")
+            except Exception as e:
+                writer_state["error"] = e
+
+    writer_thread = threading.Thread(target=writer, name="sqlite-writer")
+    writer_thread.start()
+
+    final_types = list(declared_types)
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = deque()
+            tasks = iter(ranges)
+            for start, end in itertools.islice(tasks, workers * 2):
+                pending.append(pool.submit(parse_chunk, (str(csv_path), start, end, declared_types)))
+            while pending:
+                rows, types = pending.popleft().result()
+                # Keep the pool busy while this chunk waits for the writer
+                for start, end in itertools.islice(tasks, 1):
+                    pending.append(pool.submit(parse_chunk, (str(csv_path), start, end, declared_types)))
+                final_types = [merge_types(a, b) for a, b in zip(final_types, types)]
+                work_queue.put(rows)
+                if writer_state["error"] is not None:
+                    break
+    finally:
+        work_queue.put(None)
+        writer_thread.join()
+
+    if writer_state["error"] is not None:
+        raise writer_state["error"]
+    return writer_state["rows"], final_types
+
+
+def _split_reference(reference):
+    """Split a "table.column" foreign key reference."""
+    table, _, column = reference.partition(".")
+    if not table or not column:
+        raise ValueError(f"Foreign key reference '{reference}' must look like table.column")
+    return table, column
+
+
+def import_manifest(manifest_path, db_path):
+    """
+    Load several related CSV files into one normalized schema.
+
+    The manifest (JSON) lists tables in load order. Each entry names its CSV
+    (relative to the manifest), and optionally a primary_key, extra
+    null_values (e.g. "null"), foreign_keys ({column: "table.column"}) and
+    explode rules. An explode rule moves a comma-packed list column out into
+    a link table: each item becomes one row holding the owner's primary key
+    and the item, stored in the first of the rule's references whose target
+    table contains it (so "1014,all" yields one user and one mailing list).
+
+    Everything is loaded in a single transaction with foreign keys enforced
+    at commit, so self references such as reply_msg_id may point forwards.
+    Existing tables of the same names are replaced, and every foreign key
+    column is indexed. Returns a dict of row counts per table.
+    """
+    manifest_path = Path(manifest_path)
+    with open(manifest_path, encoding="utf-8") as f:
+        manifest = json.load(f)
+    specs = manifest["tables"]
+
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    cursor = conn.cursor()
+    cursor.execute("PRAGMA foreign_keys = ON")
+
+    # Raw key values of every loaded table, used to resolve exploded items
+    loaded_keys = {}
+    column_types = {}
+    counts = {}
+    fk_indexes = []
+
+    cursor.execute("BEGIN")
+    try:
+        # Drop children before parents so the implicit deletes stay consistent
+        for spec in reversed(specs):
+            for rule in spec.get("explode", []):
+                cursor.execute(f"DROP TABLE IF EXISTS {quote_identifier(rule['table'])}")
+            cursor.execute(f"DROP TABLE IF EXISTS {quote_identifier(spec['name'])}")
+
+        for spec in specs:
+            table = spec["name"]
+            csv_path = manifest_path.parent / spec["csv"]
+            primary_key = spec.get("primary_key")
+            null_values = set(spec.get("null_values", []))
+            foreign_keys = spec.get("foreign_keys", {})
+            explode = {rule["column"]: rule for rule in spec.get("explode", [])}
+            print(f"\nLoading {csv_path} into {table}")
+
+            with open(csv_path, newline="", encoding="utf-8") as csvfile:
+                reader = csv.reader(csvfile)
+                headers = next(reader)
+                rows = [[("" if v in null_values else v) for v in row] for row in reader]
+
+            for column in [primary_key, *foreign_keys, *explode]:
+                if column and column not in headers:
+                    raise ValueError(f"Column '{column}' is not in the header of {csv_path}")
+            kept = [i for i, h in enumerate(headers) if h not in explode]
+            trackers = {i: ColumnTypeTracker() for i in kept}
+            for row in rows:
+                for i, tracker in trackers.items():
+                    if i < len(row):
+                        tracker.observe(row[i])
+
+            # A foreign key column takes the type of the column it references
+            types = {}
+            for i in kept:
+                header = headers[i]
+                if header in foreign_keys:
+                    ref_table, ref_column = _split_reference(foreign_keys[header])
+                    types[i] = column_types.get((ref_table, ref_column), trackers[i].sqlite_type)
+                else:
+                    types[i] = trackers[i].sqlite_type
+            for i in kept:
+                column_types[(table, headers[i])] = types[i]
+
+            column_defs = []
+            for i in kept:
+                header = headers[i]
+                definition = f"    {quote_identifier(header)} {types[i]}"
+                if header == primary_key:
+                    definition += " PRIMARY KEY"
+                if header in foreign_keys:
+                    ref_table, ref_column = _split_reference(foreign_keys[header])
+                    definition += (f" REFERENCES {quote_identifier(ref_table)}({quote_identifier(ref_column)})"
+                                   " DEFERRABLE INITIALLY DEFERRED")
+                    fk_indexes.append((table, header))
+                column_defs.append(definition)
+            create_sql = f"CREATE TABLE {quote_identifier(table)} (\n" + ",\n".join(column_defs) + "\n)"
+            print(create_sql)
+            cursor.execute(create_sql)
+
+            converters = [make_converter(trackers[i], types[i]) for i in kept]
+            columns = ", ".join(quote_identifier(headers[i]) for i in kept)
+            placeholders = ", ".join(["?"] * len(kept))
+            cursor.executemany(
+                f"INSERT INTO {quote_identifier(table)} ({columns}) VALUES ({placeholders})",
+                (convert_row([row[i] if i < len(row) else "" for i in kept], converters) for row in rows)
+            )
+            counts[table] = len(rows)
+
+            if primary_key:
+                key_index = headers.index(primary_key)
+                loaded_keys[(table, primary_key)] = {row[key_index].strip() for row in rows}
+
+            for column, rule in explode.items():
+                if not primary_key:
+                    raise ValueError(f"Table '{table}' needs a primary_key to explode '{column}'")
+                link_table = rule["table"]
+                targets = [(name, *_split_reference(ref)) for name, ref in rule["references"].items()]
+                link_defs = [f"    {quote_identifier(primary_key)} {types[headers.index(primary_key)]} NOT NULL "
+                             f"REFERENCES {quote_identifier(table)}({quote_identifier(primary_key)}) "
+                             "DEFERRABLE INITIALLY DEFERRED"]
+                for name, ref_table, ref_column in targets:
+                    link_defs.append(
+                        f"    {quote_identifier(name)} {column_types.get((ref_table, ref_column), 'TEXT')} "
+                        f"REFERENCES {quote_identifier(ref_table)}({quote_identifier(ref_column)}) "
+                        "DEFERRABLE INITIALLY DEFERRED"
+                    )
+                cursor.execute(f"CREATE TABLE {quote_identifier(link_table)} (\n" + ",\n".join(link_defs) + "\n)")
+                fk_indexes += [(link_table, primary_key)] + [(link_table, name) for name, _, _ in targets]
+
+                key_index, list_index = headers.index(primary_key), headers.index(column)
+                link_rows, unresolved = [], []
+                for row in rows:
+                    owner = row[key_index].strip()
+                    for item in row[list_index].split(",") if list_index < len(row) else []:
+                        item = item.strip()
+                        if not item:
+                            continue
+                        values = [None] * len(targets)
+                        for slot, (_, ref_table, ref_column) in enumerate(targets):
+                            if item in loaded_keys.get((ref_table, ref_column), ()):
+                                values[slot] = item
+                                break
+                        else:
+                            unresolved.append((owner, item))
+                            continue
+                        link_rows.append([owner] + values)
+                if unresolved:
+                    raise ValueError(
+                        f"{len(unresolved)} item(s) in {table}.{column} match none of "
+                        f"{', '.join(rule['references'].values())}, e.g. {unresolved[:5]}"
+                    )
+                cursor.executemany(
+                    f"INSERT INTO {quote_identifier(link_table)} VALUES ({', '.join(['?'] * (len(targets) + 1))})",
+                    link_rows
+                )
+                counts[link_table] = len(link_rows)
+
+        for table, column in fk_indexes:
+            cursor.execute(
+                f"CREATE INDEX {quote_identifier(f'idx_{table}_{column}')} "
+                f"ON {quote_identifier(table)} ({quote_identifier(column)})"
+            )
+
+        # Report dangling references before COMMIT rejects them wholesale
+        violations = cursor.execute("PRAGMA foreign_key_check").fetchall()
+        if violations:
+            raise ValueError(
+                f"{len(violations)} foreign key violation(s) (table, rowid, parent): "
+                f"{[v[:3] for v in violations[:5]]}"
+            )
+        cursor.execute("COMMIT")
+    except BaseException:
+        cursor.execute("ROLLBACK")
+        conn.close()
+        raise
+
+    conn.close()
+    print("\nImport completed successfully!")
+    for table, count in counts.items():
+        print(f"  - {table}: {count} rows")
+    return counts
+
+
+# Columnar formats by file suffix; Arrow IPC files can be memory-mapped by readers
+COLUMNAR_FORMATS = {".parquet": "parquet", ".arrow": "arrow", ".feather": "arrow", ".ipc": "arrow"}
+
+
+def _import_pyarrow():
+    """Import pyarrow on first use, since only the columnar paths need it."""
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError('Parquet/Arrow support needs pyarrow, from the "columnar" extra: '
+                          'pip install "mcp-demos[columnar]" (or uv sync --extra columnar)')
+    return pyarrow
+
+
+def columnar_format(path):
+    """'parquet' or 'arrow' for a columnar file path, or None."""
+    return COLUMNAR_FORMATS.get(Path(path).suffix.lower())
+
+
+def arrow_schema(pa, columns, logical_types=True):
+    """
+    Arrow schema for (name, SQLite type) pairs as declared by csv_to_sqlite.
+
+    With logical_types=False BOOLEAN and DATE columns keep SQLite's storage
+    form (1/0 and ISO strings), matching what pd.read_sql_query returns.
+    """
+    arrow_types = {
+        "INTEGER": pa.int64(),
+        "REAL": pa.float64(),
+        "BOOLEAN": pa.bool_() if logical_types else pa.int64(),
+        "DATE": pa.date32() if logical_types else pa.string(),
+    }
+    return pa.schema([(name, arrow_types.get((type_ or "").upper(), pa.string())) for name, type_ in columns])
+
+
+def sqlite_type_for(pa, arrow_type):
+    """SQLite column type for an Arrow type (the inverse of arrow_schema)."""
+    if pa.types.is_boolean(arrow_type):
         return "BOOLEAN"
-    
-    # Check if all values are dates (YYYY-MM-DD)
-    if all(re.match(r'^\d{4}-\d{2}-\d{2}$', v) for v in values):
+    if pa.types.is_integer(arrow_type):
+        return "INTEGER"
+    if pa.types.is_floating(arrow_type) or pa.types.is_decimal(arrow_type):
+        return "REAL"
+    if pa.types.is_date(arrow_type):
         return "DATE"
-    
-    # Default to TEXT
     return "TEXT"
 
 
-def csv_to_sqlite(csv_path, db_path=None, table_name=None, sample_size=100):
-    """Convert a CSV file to a SQLite database."""
+def _is_iso_date(value):
+    """True if value is a YYYY-MM-DD string naming a real date (registered as a SQL function)."""
+    if not isinstance(value, str):
+        return False
+    try:
+        datetime.date.fromisoformat(value)
+    except ValueError:
+        return False
+    return len(value) == 10
+
+
+def _fits_arrow_type_sql(pa, column, arrow_type):
+    """SQL expression that is true when a column value converts to arrow_type."""
+    if pa.types.is_boolean(arrow_type):
+        return f"({column} IS NULL OR (typeof({column}) = 'integer' AND {column} IN (0, 1)))"
+    if pa.types.is_integer(arrow_type):
+        return f"typeof({column}) IN ('integer', 'null')"
+    if pa.types.is_floating(arrow_type):
+        return f"typeof({column}) IN ('integer', 'real', 'null')"
+    if pa.types.is_date(arrow_type):
+        return f"({column} IS NULL OR _is_iso_date({column}))"
+    return "1"
+
+
+def export_table(db_path, table_name, out_path, batch_size=65536, logical_types=True):
+    """
+    Write a SQLite table to Parquet or Arrow IPC, batch by batch.
+
+    Column types follow the table's declared types, so dates become date32
+    and booleans bool instead of strings and integers (unless logical_types
+    is False, see arrow_schema). A column holding any value that does not fit
+    its declared type (a column that was widened, say) is written as string
+    throughout; one aggregate query finds those columns before writing, so
+    the schema is fixed up front and each batch is written as soon as it is
+    read. Memory use is bounded by batch_size. Returns the number of rows
+    written.
+    """
+    pa = _import_pyarrow()
+    fmt = columnar_format(out_path)
+    if fmt is None:
+        raise ValueError(f"Unknown columnar format for {out_path} (use one of {', '.join(COLUMNAR_FORMATS)})")
+
+    conn = sqlite3.connect(db_path)
+    columns = [(name, type_) for _, name, type_, *_ in
+               conn.execute(f"PRAGMA table_info({quote_identifier(table_name)})")]
+    if not columns:
+        conn.close()
+        raise ValueError(f"Table '{table_name}' not found in {db_path}")
+    schema = arrow_schema(pa, columns, logical_types)
+    table = quote_identifier(table_name)
+
+    conn.create_function("_is_iso_date", 1, _is_iso_date, deterministic=True)
+    fit_checks = [
+        f"min({_fits_arrow_type_sql(pa, quote_identifier(field.name), field.type)})" for field in schema
+    ]
+    fits = conn.execute(f"SELECT {', '.join(fit_checks)} FROM {table}").fetchone()
+    schema = pa.schema([
+        field if fit is None or fit else field.with_type(pa.string())
+        for field, fit in zip(schema, fits)
+    ])
+
+    def to_array(values, field):
+        if pa.types.is_date(field.type):
+            values = [datetime.date.fromisoformat(v) if v is not None else None for v in values]
+        elif pa.types.is_boolean(field.type):
+            # SQLite hands booleans back as 1/0
+            values = [bool(v) if v is not None else None for v in values]
+        elif pa.types.is_string(field.type):
+            values = [v if v is None or isinstance(v, str) else str(v) for v in values]
+        return pa.array(values, type=field.type)
+
+    cursor = conn.execute(
+        f"SELECT {', '.join(quote_identifier(name) for name, _ in columns)} FROM {table}"
+    )
+    rows_written = 0
+    try:
+        if fmt == "parquet":
+            writer = pa.parquet.ParquetWriter(str(out_path), schema)
+        else:
+            sink = pa.OSFile(str(out_path), "wb")
+            writer = pa.ipc.new_file(sink, schema)
+        try:
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                arrays = [to_array(list(values), field) for values, field in zip(zip(*rows), schema)]
+                writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema))
+                rows_written += len(rows)
+        finally:
+            writer.close()
+            if fmt != "parquet":
+                sink.close()
+    finally:
+        conn.close()
+
+    print(f"Exported {rows_written} rows from {table_name} to {out_path} ({fmt})")
+    return rows_written
+
+
+def import_columnar(path, db_path, table_name, batch_size=65536, replace=False):
+    """
+    Load a Parquet or Arrow IPC file into a SQLite table.
+
+    The file's schema gives the column types, so no type inference pass is
+    needed. Dates are stored as ISO strings and booleans as 1/0, the same
+    way csv_to_sqlite stores them. A table that already has rows is refused,
+    so importing the same file twice cannot duplicate them, unless replace
+    is set, in which case the table is dropped and recreated. Returns the
+    number of rows inserted.
+    """
+    pa = _import_pyarrow()
+    fmt = columnar_format(path)
+    if fmt == "parquet":
+        parquet_file = pa.parquet.ParquetFile(path)
+        schema = parquet_file.schema_arrow
+        batches = parquet_file.iter_batches(batch_size=batch_size)
+    elif fmt == "arrow":
+        reader = pa.ipc.open_file(pa.memory_map(str(path)))
+        schema = reader.schema
+        batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+    else:
+        raise ValueError(f"Unknown columnar format for {path} (use one of {', '.join(COLUMNAR_FORMATS)})")
+
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    exists = cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table_name,)
+    ).fetchone()
+    if exists and replace:
+        cursor.execute(f"DROP TABLE {quote_identifier(table_name)}")
+    elif exists and cursor.execute(f"SELECT 1 FROM {quote_identifier(table_name)} LIMIT 1").fetchone():
+        conn.close()
+        raise ValueError(
+            f"Table '{table_name}' in {db_path} already has rows; "
+            "use --replace (replace=True) or another --table-name"
+        )
+    column_defs = ",\n".join(
+        f"    {quote_identifier(field.name)} {sqlite_type_for(pa, field.type)}" for field in schema
+    )
+    cursor.execute(f"CREATE TABLE IF NOT EXISTS {quote_identifier(table_name)} (\n{column_defs}\n)")
+    columns = ", ".join(quote_identifier(field.name) for field in schema)
+    placeholders = ", ".join(["?"] * len(schema))
+    insert_sql = f"INSERT INTO {quote_identifier(table_name)} ({columns}) VALUES ({placeholders})"
+
+    start_time = time.perf_counter()
+    rows_inserted = 0
+    for batch in batches:
+        columns_data = []
+        for field, column in zip(schema, batch.columns):
+            if pa.types.is_date(field.type) or pa.types.is_timestamp(field.type):
+                column = column.cast(pa.string())
+            columns_data.append(column.to_pylist())
+        cursor.executemany(insert_sql, zip(*columns_data))
+        rows_inserted += batch.num_rows
+    conn.commit()
+    conn.close()
+
+    seconds = time.perf_counter() - start_time
+    print(f"Imported {rows_inserted} rows from {path} into {table_name} in {seconds:.2f}s")
+    return rows_inserted
+
+
+def csv_to_sqlite(csv_path, db_path=None, table_name=None, sample_size=100,
+                  batch_size=1000, bulk=False, journal_mode="OFF", cache_size_mb=256,
+                  indexes=None, workers=1, chunk_mb=16, key=None, delete_missing=False,
+                  advise_indexes=False, auto_index=False):
+    """
+    Convert a CSV file to a SQLite database in a single streaming pass.
+
+    Column types are inferred incrementally: the first sample_size rows are
+    staged in memory while the types settle, then the table is created and
+    the remaining rows stream straight into it. Every value keeps being
+    checked, and if a later row does not fit its column's type the column is
+    widened once loading finishes. Memory use is bounded by sample_size and
+    the insert batch size, regardless of file size.
+
+    With bulk=True the connection is tuned for loading (see
+    configure_bulk_load) and any existing indexes on the table are dropped
+    before inserting and recreated afterwards. Indexes listed in `indexes`
+    (column names) are always created after the data is in.
+
+    With workers > 1 the rows after the header are loaded by parallel_insert:
+    the file is split into ~chunk_mb byte ranges on row boundaries, parsed in
+    worker processes and written by a single writer thread.
+
+    With key set, rows are synced instead of appended (see sync_rows): only
+    new and changed rows are written, and CSV columns missing from an
+    existing table are added to it.
+
+    With advise_indexes the loaded table is profiled and likely key and
+    low-cardinality filter columns are reported (see index_advisor);
+    auto_index also creates those indexes after the insert.
+    """
     csv_path = Path(csv_path)
     
     # If no db_path provided, create in the same directory with same name but .db extension
@@ -59,90 +944,161 @@ def csv_to_sqlite(csv_path, db_path=None, table_name=None, sample_size=100):
     print(f"Creating SQLite database: {db_path}")
     print(f"Table name: {table_name}")
     
-    # Read CSV headers and sample data for type detection
+    # The pipeline's writer thread takes over the connection while loading
+    conn = sqlite3.connect(db_path, check_same_thread=workers <= 1)
+    cursor = conn.cursor()
+    if bulk:
+        print(f"Bulk-load mode: journal_mode={journal_mode}, synchronous=OFF, cache={cache_size_mb} MB")
+        configure_bulk_load(conn, journal_mode, cache_size_mb)
+
+    start_time = time.perf_counter()
     with open(csv_path, 'r', newline='', encoding='utf-8') as csvfile:
         reader = csv.reader(csvfile)
         headers = next(reader)
-        
-        # Sample rows for type detection
-        sample_rows = []
-        for i, row in enumerate(reader):
-            if i >= sample_size:
+        trackers = [ColumnTypeTracker() for _ in headers]
+
+        # Stage the first rows while column types settle
+        staged_rows = []
+        for row in reader:
+            for tracker, value in zip(trackers, row):
+                tracker.observe(value)
+            staged_rows.append(row)
+            if len(staged_rows) >= sample_size:
                 break
-            sample_rows.append(row)
-    
-    # Detect column types
-    column_types = {}
-    for i, header in enumerate(headers):
-        column_values = [row[i] for row in sample_rows if i < len(row)]
-        column_types[header] = detect_column_type(column_values)
-    
-    # Create database and table
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    
-    # Construct CREATE TABLE statement
-    create_table_sql = f"CREATE TABLE IF NOT EXISTS {table_name} (\n"
-    column_defs = []
-    for header in headers:
-        column_defs.append(f"    {header} {column_types[header]}")
-    create_table_sql += ",\n".join(column_defs)
-    create_table_sql += "\n)"
-    
-    print("\nCreating table with the following schema:")
-    print(create_table_sql)
-    cursor.execute(create_table_sql)
-    
-    # Insert data
-    with open(csv_path, 'r', newline='', encoding='utf-8') as csvfile:
-        reader = csv.reader(csvfile)
-        next(reader)  # Skip header row
-        
+
+        declared_types = [tracker.sqlite_type for tracker in trackers]
+
+        # An existing table keeps its own column types
+        existing = {
+            name: type_ for _, name, type_, *_ in
+            cursor.execute(f"PRAGMA table_info({quote_identifier(table_name)})")
+        }
+        if existing:
+            declared_types = [existing.get(h, t) for h, t in zip(headers, declared_types)]
+
+        # Construct CREATE TABLE statement
+        create_table_sql = f"CREATE TABLE IF NOT EXISTS {quote_identifier(table_name)} (\n"
+        column_defs = []
+        for header, type_ in zip(headers, declared_types):
+            column_defs.append(f"    {quote_identifier(header)} {type_}")
+        create_table_sql += ",\n".join(column_defs)
+        create_table_sql += "\n)"
+
+        print("\nCreating table with the following schema:")
+        print(create_table_sql)
+        cursor.execute(create_table_sql)
+
+        # Schema evolution: add CSV columns the existing table does not have yet
+        for header, type_ in zip(headers, declared_types):
+            if existing and header not in existing:
+                print(f"Adding new column {header} {type_}")
+                cursor.execute(
+                    f"ALTER TABLE {quote_identifier(table_name)} ADD COLUMN {quote_identifier(header)} {type_}"
+                )
+
+        # Defer index maintenance until all rows are in (sync needs its key index)
+        deferred_indexes = drop_table_indexes(cursor, table_name) if bulk and not key else []
+
         # Prepare placeholders for INSERT statement
         placeholders = ", ".join(["?"] * len(headers))
-        insert_sql = f"INSERT INTO {table_name} ({', '.join(headers)}) VALUES ({placeholders})"
-        
-        # Insert in batches
-        batch_size = 1000
-        batch = []
-        rows_processed = 0
-        
-        for row in reader:
-            # Process row based on detected types
-            processed_row = []
-            for i, value in enumerate(row):
-                if i >= len(headers):
-                    break
-                    
-                header = headers[i]
-                if value.strip() == '':
-                    processed_row.append(None)
-                elif column_types[header] == "BOOLEAN":
-                    processed_row.append(value.lower() == 'true')
-                else:
-                    processed_row.append(value)
-            
-            batch.append(processed_row)
-            rows_processed += 1
-            
-            if len(batch) >= batch_size:
+        columns = ", ".join(quote_identifier(h) for h in headers)
+        insert_sql = f"INSERT INTO {quote_identifier(table_name)} ({columns}) VALUES ({placeholders})"
+
+        sync_counts = None
+        if key:
+            if key not in headers:
+                raise ValueError(f"Key column '{key}' is not in the CSV header")
+            converters = [make_converter(t, d) for t, d in zip(trackers, declared_types)]
+            rows = itertools.chain(staged_rows, reader)
+            print(f"Sync mode: upserting on {key}")
+            sync_counts = sync_rows(
+                cursor, table_name, headers, key, rows, converters, batch_size, delete_missing
+            )
+            rows_processed = sum(sync_counts.values()) - sync_counts["deleted"]
+            final_types = [tracker.sqlite_type for tracker in trackers]
+        elif workers > 1:
+            # Staged rows only served type inference; the chunks cover them again
+            print(f"Pipeline mode: {workers} parser processes, {chunk_mb} MB chunks")
+            rows_processed, final_types = parallel_insert(
+                conn, insert_sql, csv_path, declared_types, workers,
+                chunk_mb * 1024 * 1024, batch_size
+            )
+        else:
+            # Converters also keep checking types, so a late outlier widens its column
+            converters = [make_converter(t, d) for t, d in zip(trackers, declared_types)]
+
+            # Insert in batches
+            batch = [convert_row(row, converters) for row in staged_rows]
+            rows_processed = len(batch)
+            staged_rows = None
+
+            for row in reader:
+                batch.append(convert_row(row, converters))
+                rows_processed += 1
+
+                if len(batch) >= batch_size:
+                    cursor.executemany(insert_sql, batch)
+                    batch = []
+                    print(f"Processed {rows_processed} rows...")
+
+            # Insert any remaining rows
+            if batch:
                 cursor.executemany(insert_sql, batch)
-                batch = []
-                print(f"Processed {rows_processed} rows...")
-        
-        # Insert any remaining rows
-        if batch:
-            cursor.executemany(insert_sql, batch)
-    
+
+            final_types = [tracker.sqlite_type for tracker in trackers]
+
+    if not existing and final_types != declared_types:
+        print("\nWidening column types to fit later rows:")
+        for header, old_type, new_type in zip(headers, declared_types, final_types):
+            if old_type != new_type:
+                print(f"  - {header}: {old_type} -> {new_type}")
+        widen_columns(cursor, table_name, headers, declared_types, final_types)
+    column_types = dict(zip(headers, final_types if not existing else declared_types))
+    load_seconds = time.perf_counter() - start_time
+
+    # Build indexes once, over the complete table
+    index_start = time.perf_counter()
+    for index_sql in deferred_indexes:
+        cursor.execute(index_sql)
+    for column in indexes or []:
+        index_name = f"idx_{table_name}_{column}"
+        cursor.execute(
+            f"CREATE INDEX IF NOT EXISTS {quote_identifier(index_name)} "
+            f"ON {quote_identifier(table_name)} ({quote_identifier(column)})"
+        )
+    advised_indexes = []
+    if advise_indexes or auto_index:
+        profiles = profile_columns(cursor, table_name)
+        print("\nColumn profile (key / low-cardinality filter columns):")
+        print_profiles(profiles)
+        advised_indexes = load_time_indexes(table_name, profiles)
+        if auto_index:
+            for index_sql in advised_indexes:
+                cursor.execute(index_sql)
+    index_seconds = time.perf_counter() - index_start
+
     # Commit changes and close connection
     conn.commit()
     
     # Generate some statistics
-    cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
+    cursor.execute(f"SELECT COUNT(*) FROM {quote_identifier(table_name)}")
     row_count = cursor.fetchone()[0]
     
     print(f"\nDatabase creation completed successfully!")
-    print(f"Total rows inserted: {row_count}")
+    if sync_counts is not None:
+        print(f"Total rows in table: {row_count}")
+        print("Sync: " + ", ".join(f"{count} {name}" for name, count in sync_counts.items()))
+    else:
+        print(f"Total rows inserted: {row_count}")
+    rate = rows_processed / load_seconds if load_seconds > 0 else float('inf')
+    print(f"Loaded {rows_processed} rows in {load_seconds:.2f}s ({rate:,.0f} rows/sec)")
+    if advised_indexes and not auto_index:
+        print("\nSuggested indexes (use --auto-index to create them):")
+        for index_sql in advised_indexes:
+            print(f"  {index_sql}")
+    built = len(deferred_indexes) + len(indexes or []) + (len(advised_indexes) if auto_index else 0)
+    if built:
+        print(f"Built {built} index(es) in {index_seconds:.2f}s")
     print("\nColumn Types:")
     for header, type_ in column_types.items():
         print(f"  - {header}: {type_}")
@@ -155,20 +1111,73 @@ def csv_to_sqlite(csv_path, db_path=None, table_name=None, sample_size=100):
 
 def main():
     parser = argparse.ArgumentParser(description='Convert CSV file to SQLite database')
-    parser.add_argument('csv_file', help='Path to the CSV file')
+    parser.add_argument('csv_file', nargs='?',
+                        help='Path to the CSV file (a .parquet or .arrow file is imported as-is)')
+    parser.add_argument('--export', metavar='PATH',
+                        help='Write the table to Parquet (.parquet) or Arrow IPC (.arrow) after loading, '
+                             'or on its own when no CSV file is given')
+    parser.add_argument('--replace', action='store_true',
+                        help='When importing a .parquet or .arrow file, replace the table if it already has rows')
+    parser.add_argument('--manifest',
+                        help='Import the related CSVs listed in this JSON manifest instead (e.g. data/import_manifest.json)')
     parser.add_argument('--db-file', help='Path to output SQLite database (default: same as CSV with .db extension)')
     parser.add_argument('--table-name', help='Name of the table (default: CSV filename without extension)')
-    parser.add_argument('--sample-size', type=int, default=100, help='Number of rows to sample for type detection')
+    parser.add_argument('--sample-size', type=int, default=100, help='Number of rows staged while column types settle')
+    parser.add_argument('--batch-size', type=int, help='Rows per executemany batch (default: 1000, or 50000 with --bulk)')
+    parser.add_argument('--bulk', action='store_true',
+                        help='Tune SQLite for loading speed: no fsync, large cache, indexes rebuilt after load')
+    parser.add_argument('--journal-mode', choices=['OFF', 'WAL', 'MEMORY', 'DELETE'], default='OFF',
+                        help='Journal mode for --bulk (OFF is fastest but unsafe if the load crashes)')
+    parser.add_argument('--cache-size-mb', type=int, default=256, help='SQLite page cache size for --bulk')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Parse the CSV in this many worker processes feeding one writer (default: 1, no pipeline)')
+    parser.add_argument('--chunk-mb', type=int, default=16, help='Size of the byte ranges handed to each worker')
+    parser.add_argument('--key', metavar='COLUMN',
+                        help='Sync instead of append: upsert rows on COLUMN and skip unchanged rows')
+    parser.add_argument('--delete-missing', action='store_true',
+                        help='With --key, delete rows whose key is no longer in the CSV')
+    parser.add_argument('--index', action='append', dest='indexes', metavar='COLUMN',
+                        help='Create an index on COLUMN after loading (repeatable)')
+    parser.add_argument('--advise-indexes', action='store_true',
+                        help='Report likely key and low-cardinality filter columns after loading')
+    parser.add_argument('--auto-index', action='store_true',
+                        help='Create the indexes --advise-indexes would suggest')
     
     args = parser.parse_args()
+    if not args.csv_file and not args.manifest and not args.export:
+        parser.error('a CSV file, --manifest or --export is required')
+    db_file = args.db_file or str(Path(__file__).parent.parent / "data" / "sqlite.db")
+    table_name = args.table_name or "users"
     
     try:
+        if args.manifest:
+            import_manifest(args.manifest, db_file)
+            return 0
+        if not args.csv_file or columnar_format(args.csv_file):
+            if args.csv_file:
+                import_columnar(args.csv_file, db_file, table_name, replace=args.replace)
+            if args.export:
+                export_table(db_file, table_name, args.export)
+            return 0
         db_path = csv_to_sqlite(
             args.csv_file, 
-            args.db_file or str(Path(__file__).parent.parent / "data" / "sqlite.db"),  # Default DB path
-            args.table_name or "users",  # Default table name
-            args.sample_size
+            db_file,
+            table_name,
+            args.sample_size,
+            batch_size=args.batch_size or (50000 if args.bulk else 1000),
+            bulk=args.bulk,
+            journal_mode=args.journal_mode,
+            cache_size_mb=args.cache_size_mb,
+            indexes=args.indexes,
+            workers=args.workers,
+            chunk_mb=args.chunk_mb,
+            key=args.key,
+            delete_missing=args.delete_missing,
+            advise_indexes=args.advise_indexes,
+            auto_index=args.auto_index
         )
+        if args.export:
+            export_table(db_path, table_name, args.export)
         print(f"\nTo access your database, you can use: sqlite3 {db_path}")
     except Exception as e:
         print(f"Error: {e}", file=sys.stderr)
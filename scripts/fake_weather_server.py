@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Fake Weather Endpoint
+
+A stand-in for wttr.in, for exercising get_current_weather in src/server.py
+without network access. Every request is printed with a running count, so
+cache hits and coalesced requests are easy to see: ten concurrent calls for
+the same city should show up here as a single request.
+
+Usage:
+    python fake_weather_server.py [--port 8090] [--delay 1.0] [--fail CITY ...]
+    WEATHER_ENDPOINT=http://localhost:8090 python src/server.py
+"""
+
+import sys
+import time
+import argparse
+import threading
+from urllib.parse import unquote
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CONDITIONS = ["Sunny", "Partly cloudy", "Overcast", "Light rain", "Fog"]
+
+
+class WeatherHandler(BaseHTTPRequestHandler):
+    delay = 0.0
+    failing = set()
+    requests = 0
+    lock = threading.Lock()
+
+    def do_GET(self):
+        with WeatherHandler.lock:
+            WeatherHandler.requests += 1
+            count = WeatherHandler.requests
+        city = unquote(self.path.strip("/")) or "Nowhere"
+        print(f"[fake-weather] request #{count}: {city}", flush=True)
+        time.sleep(self.delay)
+
+        if city.lower() in self.failing:
+            self.send_error(503, "Upstream unavailable")
+            return
+        seed = sum(map(ord, city.lower()))
+        body = (f"Weather report: {city}\n\n"
+                f"  {CONDITIONS[seed % len(CONDITIONS)]}\n"
+                f"  {seed % 35 - 5:+d} °C\n"
+                f"  (fake report #{count} at {time.strftime('%H:%M:%S')})\n")
+        payload = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass  # do_GET prints its own line
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve fake weather reports in place of wttr.in')
+    parser.add_argument('--port', type=int, default=8090, help='Port to listen on')
+    parser.add_argument('--delay', type=float, default=1.0, help='Seconds to wait before answering')
+    parser.add_argument('--fail', nargs='*', default=[], metavar='CITY', help='Cities to answer with HTTP 503')
+    args = parser.parse_args()
+
+    WeatherHandler.delay = args.delay
+    WeatherHandler.failing = {city.lower() for city in args.fail}
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), WeatherHandler)
+    print(f"Fake weather endpoint on http://localhost:{args.port} (delay {args.delay}s)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,383 @@
+#!/usr/bin/env python3
+"""
+SQLite Index Advisor
+
+Suggests, and optionally creates, indexes for tables loaded by csv_to_sqlite.py.
+Advice comes from two sources:
+
+1. Column profiles: unique, non-null columns named like keys (user_id,
+   message_id, ...) get a UNIQUE index, and low-cardinality columns that are
+   typical filters (country, subscription_plan, active_status) get a plain one.
+2. The query log that the execute_sql tool in src/server.py writes when its
+   QUERY_LOG_PATH is set (e.g. to data/query_log.jsonl): every
+   logged SELECT whose plan contains a full table scan gets a candidate index
+   (equality columns, then GROUP BY/ORDER BY columns, then one range column,
+   then the selected columns if the index can still cover the query). Each
+   candidate is confirmed with EXPLAIN QUERY PLAN against an in-memory copy of
+   the schema, so no index is built on the real data until --apply is given.
+
+Usage:
+    python index_advisor.py profile [--table users] [--apply]
+    python index_advisor.py queries [--log data/query_log.jsonl] [--apply]
+"""
+
+import re
+import sys
+import json
+import sqlite3
+import argparse
+from collections import Counter
+from pathlib import Path
+
+
+BASE_DIR = Path(__file__).parent.parent
+# Alias resolution for plan lines is shared with the SQL guardrails in src/server.py
+sys.path.insert(0, str(BASE_DIR / "src"))
+from query_plans import scan_targets  # noqa: E402
+
+DEFAULT_DB_PATH = BASE_DIR / "data" / "sqlite.db"
+DEFAULT_QUERY_LOG = BASE_DIR / "data" / "query_log.jsonl"
+
+# Unique columns whose name looks like an identifier are treated as keys
+KEY_NAME_PATTERN = re.compile(r'(?:^|_)(?:id|uuid|key)$', re.IGNORECASE)
+# A filter column has at most this many distinct values...
+LOW_CARDINALITY_MAX = 32
+# ...and at most this fraction of the row count
+LOW_CARDINALITY_RATIO = 0.5
+# Dates and decimals are range-filtered, so they are never low-cardinality filters
+FILTER_TYPES = ("TEXT", "BOOLEAN", "INTEGER")
+# Candidate indexes wider than this are not extended to cover the query
+COVERING_MAX_COLUMNS = 6
+
+_CLAUSE_END = r'(?=\bGROUP\s+BY\b|\bORDER\s+BY\b|\bLIMIT\b|\bHAVING\b|\bWINDOW\b|$)'
+WHERE_CLAUSE = re.compile(r'\bWHERE\b(.*?)' + _CLAUSE_END, re.IGNORECASE | re.DOTALL)
+GROUP_BY_CLAUSE = re.compile(r'\bGROUP\s+BY\b(.*?)' + _CLAUSE_END.replace(r'\bGROUP\s+BY\b|', ''),
+                             re.IGNORECASE | re.DOTALL)
+ORDER_BY_CLAUSE = re.compile(r'\bORDER\s+BY\b(.*?)(?=\bLIMIT\b|$)', re.IGNORECASE | re.DOTALL)
+# "SCAN users" (or "SCAN u" for an alias) is a full scan; "SCAN users USING
+# INDEX ..." already walks an index
+FULL_SCAN = re.compile(r'^SCAN (?:TABLE )?(\w+)(?: AS \w+)?$')
+
+
+def quote_identifier(name):
+    """Quote a SQLite identifier, escaping embedded double quotes."""
+    return '"' + name.replace('"', '""') + '"'
+
+
+def index_name(table, columns, unique=False):
+    """Deterministic index name, so re-running the advisor is idempotent."""
+    prefix = "ux" if unique else "idx"
+    return f"{prefix}_{table}_" + "_".join(columns)
+
+
+def index_sql(table, columns, unique=False):
+    """CREATE INDEX IF NOT EXISTS statement for the given columns."""
+    return (
+        f"CREATE {'UNIQUE ' if unique else ''}INDEX IF NOT EXISTS "
+        f"{quote_identifier(index_name(table, columns, unique))} ON {quote_identifier(table)} "
+        f"({', '.join(quote_identifier(c) for c in columns)})"
+    )
+
+
+# ---------- Load-time column profiles ----------
+
+def profile_columns(cursor, table):
+    """
+    Profile every column of a table in one pass.
+
+    Returns a list of dicts with name, type, rows, distinct, nulls and role,
+    where role is "key", "filter" or None.
+    """
+    columns = [(name, type_) for _, name, type_, *_ in
+               cursor.execute(f"PRAGMA table_info({quote_identifier(table)})")]
+    if not columns:
+        return []
+
+    aggregates = ["COUNT(*)"]
+    for name, _ in columns:
+        aggregates += [f"COUNT(DISTINCT {quote_identifier(name)})", f"COUNT({quote_identifier(name)})"]
+    counts = cursor.execute(f"SELECT {', '.join(aggregates)} FROM {quote_identifier(table)}").fetchone()
+
+    rows = counts[0]
+    profiles = []
+    for i, (name, type_) in enumerate(columns):
+        distinct, non_null = counts[1 + 2 * i], counts[2 + 2 * i]
+        role = None
+        if rows and distinct == rows == non_null and KEY_NAME_PATTERN.search(name):
+            role = "key"
+        elif ((type_ or "").upper() in FILTER_TYPES
+              and 2 <= distinct <= min(LOW_CARDINALITY_MAX, rows * LOW_CARDINALITY_RATIO)):
+            role = "filter"
+        profiles.append({
+            "name": name,
+            "type": type_,
+            "rows": rows,
+            "distinct": distinct,
+            "nulls": rows - non_null,
+            "role": role,
+        })
+    return profiles
+
+
+def load_time_indexes(table, profiles):
+    """Index statements for the key and filter columns found by profile_columns."""
+    statements = []
+    for profile in profiles:
+        if profile["role"] == "key":
+            statements.append(index_sql(table, [profile["name"]], unique=True))
+        elif profile["role"] == "filter":
+            statements.append(index_sql(table, [profile["name"]]))
+    return statements
+
+
+def print_profiles(profiles):
+    """Print column profiles with their suggested role."""
+    for p in profiles:
+        role = f"  <- {p['role']}" if p["role"] else ""
+        print(f"  - {p['name']} ({p['type']}): {p['distinct']} distinct, {p['nulls']} null{role}")
+
+
+# ---------- Query-log analysis ----------
+
+def read_query_log(path):
+    """Count the SELECT statements in an execute_sql query log (JSON lines)."""
+    queries = Counter()
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                sql = json.loads(line)["sql"]
+            except (ValueError, KeyError, TypeError):
+                continue
+            if sql.lstrip().upper().startswith(("SELECT", "WITH")):
+                queries[" ".join(sql.split())] += 1
+    return queries
+
+
+def schema_copy(conn):
+    """
+    Copy the schema (and planner statistics) of a database into memory.
+
+    Without data the copy is cheap to add hypothetical indexes to, and the
+    planner makes the same choices as on the real database because it only
+    looks at the schema and sqlite_stat1.
+    """
+    copy = sqlite3.connect(":memory:")
+    for (sql,) in conn.execute(
+        "SELECT sql FROM sqlite_master WHERE sql IS NOT NULL AND name NOT LIKE 'sqlite_%' "
+        "ORDER BY type = 'table' DESC"
+    ):
+        copy.execute(sql)
+    has_stats = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'"
+    ).fetchone()
+    if has_stats:
+        copy.execute("ANALYZE")
+        copy.executemany("INSERT INTO sqlite_stat1 VALUES (?, ?, ?)",
+                         conn.execute("SELECT tbl, idx, stat FROM sqlite_stat1"))
+        copy.execute("ANALYZE sqlite_master")  # reload the copied statistics
+    return copy
+
+
+def query_plan(conn, sql):
+    """Detail lines of EXPLAIN QUERY PLAN for a statement."""
+    return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}")]
+
+
+def columns_read(conn, sql):
+    """Map each table a statement reads to the columns it reads, in order."""
+    read = {}
+
+    def authorizer(action, table, column, *_):
+        if action == sqlite3.SQLITE_READ and table and column and not table.startswith("sqlite_"):
+            read.setdefault(table, [])
+            if column not in read[table]:
+                read[table].append(column)
+        return sqlite3.SQLITE_OK
+
+    conn.set_authorizer(authorizer)
+    try:
+        conn.execute(f"EXPLAIN {sql}")
+    finally:
+        # set_authorizer(None) only clears the callback from Python 3.11; on
+        # 3.10 it denies every later statement, so allow everything instead
+        conn.set_authorizer(lambda *_: sqlite3.SQLITE_OK)
+    return read
+
+
+def _column_pattern(column):
+    return r'(?:\b\w+\.)?(?:"' + re.escape(column) + r'"|\b' + re.escape(column) + r'\b)'
+
+
+def _clause(pattern, sql):
+    match = pattern.search(sql)
+    return match.group(1) if match else ""
+
+
+def candidate_columns(sql, columns):
+    """
+    Order a table's columns into an index for one query.
+
+    Equality predicates come first, then GROUP BY/ORDER BY columns, then a
+    single range predicate, so the index serves the filter, the sort and
+    the range in one walk. The remaining read columns are appended when the
+    result still fits in COVERING_MAX_COLUMNS, making the index covering.
+
+    Returns (index columns, covering), or (None, False) when the query has
+    nothing an index could serve.
+    """
+    where = _clause(WHERE_CLAUSE, sql)
+    equality, ranges, ordering = [], [], []
+    for column in columns:
+        col = _column_pattern(column)
+        if re.search(col + r'\s*(?:==?|\bIS\b|\bIN\b)', where, re.IGNORECASE):
+            equality.append(column)
+        elif re.search(col + r'\s*(?:[<>]=?|\bBETWEEN\b|\bLIKE\b)', where, re.IGNORECASE):
+            ranges.append(column)
+
+    sort_clause = _clause(GROUP_BY_CLAUSE, sql) or _clause(ORDER_BY_CLAUSE, sql)
+    positions = {}
+    for column in columns:
+        match = re.search(_column_pattern(column), sort_clause)
+        if match and column not in equality:
+            positions[column] = match.start()
+    ordering = sorted(positions, key=positions.get)
+
+    keyed = equality + ordering + [c for c in ranges[:1] if c not in ordering]
+    if not keyed:
+        return None, False
+    rest = [c for c in columns if c not in keyed]
+    if len(keyed) + len(rest) <= COVERING_MAX_COLUMNS:
+        return keyed + rest, True
+    return keyed, False
+
+
+def advise_queries(conn, queries):
+    """
+    Suggest indexes for the logged queries that scan a whole table.
+
+    Args:
+        conn: Connection to the database the queries ran against
+        queries: Counter of SQL text -> number of executions
+
+    Returns:
+        List of suggestion dicts (table, columns, covering, sql, calls,
+        queries, plan_before, plan_after), most-called first. Only indexes
+        the planner actually picks up are returned.
+    """
+    sandbox = schema_copy(conn)
+    suggestions = {}
+
+    for sql, calls in queries.most_common():
+        try:
+            plan_before = query_plan(sandbox, sql)
+            read = columns_read(sandbox, sql)
+        except sqlite3.Error as e:
+            print(f"Skipping unplannable query ({e}): {sql}", file=sys.stderr)
+            continue
+
+        targets = scan_targets(sql, read)
+        for detail in plan_before:
+            match = FULL_SCAN.match(detail)
+            if not match:
+                continue
+            table = targets.get(match.group(1).lower())
+            if table is None:
+                print(f"Skipping scan of {match.group(1)}, which names no table the query reads: {sql}",
+                      file=sys.stderr)
+                continue
+            columns, covering = candidate_columns(sql, read[table])
+            if not columns:
+                continue
+
+            key = (table, tuple(columns))
+            if key in suggestions:
+                suggestions[key]["calls"] += calls
+                suggestions[key]["queries"].append(sql)
+                continue
+
+            # Confirm on the schema copy that the planner would use the index
+            name = index_name(table, columns)
+            sandbox.execute("SAVEPOINT advisor")
+            try:
+                sandbox.execute(index_sql(table, columns))
+                plan_after = query_plan(sandbox, sql)
+            finally:
+                sandbox.execute("ROLLBACK TO advisor")
+                sandbox.execute("RELEASE advisor")
+            if not any(f"INDEX {name}" in d for d in plan_after):
+                continue
+
+            suggestions[key] = {
+                "table": table,
+                "columns": columns,
+                "covering": any(f"COVERING INDEX {name}" in d for d in plan_after),
+                "sql": index_sql(table, columns),
+                "calls": calls,
+                "queries": [sql],
+                "plan_before": plan_before,
+                "plan_after": plan_after,
+            }
+
+    sandbox.close()
+    return sorted(suggestions.values(), key=lambda s: s["calls"], reverse=True)
+
+
+def print_suggestions(suggestions):
+    """Print query-log suggestions with their before/after plans."""
+    for s in suggestions:
+        kind = "covering index" if s["covering"] else "index"
+        print(f"\n{s['sql']}")
+        print(f"  {kind} for {s['calls']} call(s) of {len(s['queries'])} distinct query(ies), e.g.")
+        print(f"    {s['queries'][0]}")
+        print(f"  plan before: {'; '.join(s['plan_before'])}")
+        print(f"  plan after:  {'; '.join(s['plan_after'])}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Suggest and create SQLite indexes')
+    parser.add_argument('mode', choices=['profile', 'queries'],
+                        help='profile: key/filter columns of a table; queries: analyze the execute_sql query log')
+    parser.add_argument('--db-file', default=str(DEFAULT_DB_PATH), help='Path to the SQLite database')
+    parser.add_argument('--table', default='users', help='Table to profile (profile mode)')
+    parser.add_argument('--log', default=str(DEFAULT_QUERY_LOG), help='Query log to analyze (queries mode)')
+    parser.add_argument('--apply', action='store_true', help='Create the suggested indexes')
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db_file)
+    try:
+        if args.mode == 'profile':
+            profiles = profile_columns(conn.cursor(), args.table)
+            if not profiles:
+                print(f"Error: table '{args.table}' not found", file=sys.stderr)
+                return 1
+            print(f"Column profile for {args.table} ({profiles[0]['rows']} rows):")
+            print_profiles(profiles)
+            statements = load_time_indexes(args.table, profiles)
+        else:
+            if not Path(args.log).exists():
+                print(f"Error: query log {args.log} not found", file=sys.stderr)
+                return 1
+            suggestions = advise_queries(conn, read_query_log(args.log))
+            if not suggestions:
+                print("No full-scan queries that an index would help.")
+            print_suggestions(suggestions)
+            statements = [s["sql"] for s in suggestions]
+
+        if args.apply and statements:
+            print("\nCreating indexes:")
+            for statement in statements:
+                print(f"  {statement}")
+                conn.execute(statement)
+            conn.commit()
+        elif statements:
+            print("\nRe-run with --apply to create these indexes.")
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
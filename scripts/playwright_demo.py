@@ -6,7 +6,8 @@ A minimal Playwright demo (sync API).
 Features:
 - Launch headless Chromium
 - Navigate to https://example.com
-- Wait for DOM load / network idle
+- Block fonts, media and tracker requests to cut render latency
+- Wait for DOM load, then network idle (capped)
 - Extract <h1> text
 - Take a screenshot of the <h1> element
 - Take a full-page screenshot
@@ -14,23 +15,64 @@ Features:
 """
 
 import os
-from playwright.sync_api import sync_playwright
+import time
+import fnmatch
+from urllib.parse import urlparse
+from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeoutError
 
 # 1. Configuration: target URL and output directory
 URL = "https://www.restaurantbusinessonline.com/top-500-2024-ranking"
 OUT_DIR = os.path.join(os.path.dirname(__file__), "out")
 
+# 1a. Render settings: resource types and tracker domains to block.
+#     Images are kept because this demo takes screenshots.
+BLOCKED_RESOURCE_TYPES = {"font", "media"}
+BLOCKED_DOMAINS = [
+    "doubleclick.net", "google-analytics.com", "googletagmanager.com",
+    "googlesyndication.com", "facebook.net", "hotjar.com", "scorecardresearch.com",
+]
+NETWORKIDLE_CAP_MS = 5000
+
 # 2. Ensure the output directory exists
 os.makedirs(OUT_DIR, exist_ok=True)
 
+timings = {}
+blocked = 0
+
+def route_request(route):
+    """Abort blocked resource types and tracker domains, let everything else through."""
+    global blocked
+    request = route.request
+    host = urlparse(request.url).hostname or ""
+    if request.resource_type in BLOCKED_RESOURCE_TYPES or any(
+        host == d or host.endswith("." + d) or fnmatch.fnmatch(host, d) for d in BLOCKED_DOMAINS
+    ):
+        blocked += 1
+        route.abort()
+    else:
+        route.continue_()
+
 # 3. Launch Playwright and navigate
 with sync_playwright() as pw:
     # 3a. Launch a headless Chromium browser
+    started = time.perf_counter()
     browser = pw.chromium.launch(headless=True)
     page = browser.new_page()
+    page.route("**/*", route_request)
+    timings["launch"] = time.perf_counter() - started
+
+    # 3b. Go to the target URL and wait for the DOM, then for the network to
+    #     settle (capped, since pages with polling never go fully idle)
+    phase = time.perf_counter()
+    page.goto(URL, wait_until="domcontentloaded")
+    timings["navigate"] = time.perf_counter() - phase
 
-    # 3b. Go to the target URL and wait until network is idle
-    page.goto(URL, wait_until="networkidle")
+    phase = time.perf_counter()
+    try:
+        page.wait_for_load_state("networkidle", timeout=NETWORKIDLE_CAP_MS)
+    except PlaywrightTimeoutError:
+        print(f"Network did not go idle within {NETWORKIDLE_CAP_MS} ms; continuing.")
+    timings["wait"] = time.perf_counter() - phase
 
     # 4. Extract the text of the first <h1> (if present)
     try:
@@ -61,6 +103,8 @@ with sync_playwright() as pw:
     browser.close()
 
 print("Playwright demo complete.")
+print(f" • Timings: " + ", ".join(f"{name} {secs * 1000:.0f} ms" for name, secs in timings.items()))
+print(f" • Blocked requests: {blocked}")
 print(f" • H1 text written to: {os.path.join(OUT_DIR, 'example_h1.txt')}")
 print(f" • H1 screenshot (if any) at: {os.path.join(OUT_DIR, 'example_h1.png')}")
 print(f" • Full-page screenshot at: {os.path.join(OUT_DIR, 'example_full.png')}")
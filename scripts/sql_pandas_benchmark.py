@@ -0,0 +1,403 @@
+#!/usr/bin/env python3
+"""
+SQL vs Pandas Benchmark
+
+Times every paired operation from sqlite3_demo.py (basic queries, filtering,
+aggregation, grouping, advanced queries and data modification) on synthetic
+users tables of increasing size. Each operation runs on both engines with
+warmup and repetition, the two results are checked against each other, and
+the timings are written to a JSON or CSV report so each operation can be
+routed to whichever engine measures faster.
+
+Usage:
+    python sql_pandas_benchmark.py
+    python sql_pandas_benchmark.py --sizes 1e3 1e5 1e7 --repeat 3 --output report.json
+"""
+
+import sys
+import csv
+import json
+import math
+import shutil
+import sqlite3
+import argparse
+import tempfile
+import statistics
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from csv_to_sqlite import configure_bulk_load
+from index_advisor import profile_columns, load_time_indexes
+
+
+FIRST_NAMES = ["John", "Emma", "Michael", "Sophia", "James", "Olivia", "William", "Ava", "Daniel", "Isabella",
+               "Ethan", "Mia", "Benjamin", "Charlotte", "Lucas", "Amelia", "Henry", "Harper", "Jack", "Evelyn"]
+LAST_NAMES = ["Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis", "Martin", "Taylor",
+              "Anderson", "Thomas", "Moore", "Jackson", "White", "Harris", "Clark", "Lewis", "Young", "King"]
+COUNTRIES = {
+    "USA": ["New York", "Chicago", "Austin", "Seattle", "Boston"],
+    "Canada": ["Toronto", "Vancouver", "Montreal"],
+    "UK": ["London", "Manchester", "Edinburgh"],
+    "Australia": ["Sydney", "Melbourne"],
+    "Germany": ["Berlin", "Munich"],
+    "France": ["Paris", "Lyon"],
+    "Japan": ["Tokyo", "Osaka"],
+    "Spain": ["Madrid", "Barcelona"],
+    "Italy": ["Rome", "Milan"],
+    "Brazil": ["Sao Paulo", "Rio de Janeiro"],
+}
+COUNTRY_WEIGHTS = [0.35, 0.15, 0.1, 0.1, 0.06, 0.06, 0.05, 0.05, 0.04, 0.04]
+PLANS = ["free", "basic", "premium"]
+LANGUAGES = ["en", "fr", "de", "es", "ja", "pt", "it"]
+
+USERS_SCHEMA = """
+    CREATE TABLE users (
+        user_id INTEGER,
+        first_name TEXT,
+        last_name TEXT,
+        email TEXT,
+        signup_date DATE,
+        last_login DATE,
+        subscription_plan TEXT,
+        active_status BOOLEAN,
+        country TEXT,
+        city TEXT,
+        age INTEGER,
+        preferred_language TEXT
+    )
+"""
+
+NEW_USER = (1000000000, 'Alice', 'Smith', 'alice.smith@example.com', '2023-06-15', '2023-06-15',
+            'premium', 1, 'USA', 'Dallas', 29, 'en')
+
+
+def generate_users(n, seed=42):
+    """
+    Synthetic users shaped like data/user_data.csv, with n rows.
+
+    Values use the same representations as a table loaded by csv_to_sqlite
+    and read back with read_sql_query: ISO date strings and 1/0 booleans.
+    """
+    rng = np.random.default_rng(seed)
+    user_id = np.arange(1001, 1001 + n)
+    first = rng.choice(FIRST_NAMES, n)
+    last = rng.choice(LAST_NAMES, n)
+    country = rng.choice(list(COUNTRIES), n, p=COUNTRY_WEIGHTS)
+    city = np.empty(n, dtype=object)
+    for name, cities in COUNTRIES.items():
+        mask = country == name
+        city[mask] = rng.choice(cities, mask.sum())
+
+    signup = np.datetime64("2023-01-01") + rng.integers(0, 150, n).astype("timedelta64[D]")
+    last_login = np.minimum(signup + rng.integers(0, 60, n).astype("timedelta64[D]"), np.datetime64("2023-06-14"))
+    email = (pd.Series(first).str.lower() + "." + pd.Series(last).str.lower()
+             + pd.Series(user_id).astype(str) + "@example.com")
+
+    return pd.DataFrame({
+        "user_id": user_id,
+        "first_name": first.astype(object),
+        "last_name": last.astype(object),
+        "email": email.astype(object),
+        "signup_date": np.datetime_as_string(signup, unit="D").astype(object),
+        "last_login": np.datetime_as_string(last_login, unit="D").astype(object),
+        "subscription_plan": rng.choice(PLANS, n, p=[0.4, 0.35, 0.25]).astype(object),
+        "active_status": (rng.random(n) < 0.8).astype(np.int64),
+        "country": country.astype(object),
+        "city": city,
+        "age": rng.integers(18, 75, n),
+        "preferred_language": rng.choice(LANGUAGES, n).astype(object),
+    })
+
+
+def build_database(df, db_path, create_indexes=False, batch_size=50000):
+    """Write the synthetic users into a fresh SQLite database, returning its connection."""
+    conn = sqlite3.connect(db_path)
+    # Not journal_mode OFF: the write operations rely on ROLLBACK
+    configure_bulk_load(conn, journal_mode="MEMORY")
+    conn.execute(USERS_SCHEMA)
+    placeholders = ", ".join(["?"] * len(df.columns))
+    rows = df.itertuples(index=False, name=None)
+    while True:
+        batch = [tuple(v.item() if isinstance(v, np.generic) else v for v in row)
+                 for _, row in zip(range(batch_size), rows)]
+        if not batch:
+            break
+        conn.executemany(f"INSERT INTO users VALUES ({placeholders})", batch)
+    if create_indexes:
+        for index_sql in load_time_indexes("users", profile_columns(conn.cursor(), "users")):
+            conn.execute(index_sql)
+    conn.commit()
+    return conn
+
+
+# ---------- Paired operations ----------
+
+def _age_category(df):
+    df_temp = df.copy()
+    df_temp['age_category'] = pd.cut(
+        df_temp['age'],
+        bins=[0, 30, 40, 100],
+        labels=['Young Adult', 'Adult', 'Senior Adult']
+    )
+    return df_temp[['first_name', 'last_name', 'age', 'age_category']].head(10)
+
+
+def _days_since_login(df):
+    df_temp = df.copy()
+    df_temp['last_login'] = pd.to_datetime(df_temp['last_login'])
+    reference_date = pd.to_datetime('2023-06-15')
+    df_temp['days_since_login'] = (reference_date - df_temp['last_login']).dt.days
+    return df_temp[['user_id', 'first_name', 'last_name', 'last_login', 'days_since_login']] \
+        .sort_values('days_since_login', ascending=False) \
+        .head(10)
+
+
+def _countries_over(df):
+    country_counts = df.groupby('country').size().reset_index(name='user_count')
+    return country_counts[country_counts['user_count'] > 2].sort_values('user_count', ascending=False)
+
+
+def _insert(df):
+    new_user_df = pd.DataFrame([dict(zip(df.columns, NEW_USER))])
+    return len(pd.concat([df, new_user_df], ignore_index=True)) - len(df)
+
+
+def _update(df):
+    df_modified = df.copy()
+    mask = df_modified['user_id'] == 1011
+    df_modified.loc[mask, ['subscription_plan', 'last_login']] = ['premium', '2023-06-15']
+    return int(mask.sum())
+
+
+def _delete(df):
+    df_modified = df[df['active_status'] != 0]
+    return len(df) - len(df_modified)
+
+
+# Each operation mirrors one SQL/pandas pair in sqlite3_demo.py. "compare"
+# limits the match check to columns whose values are well defined when
+# ORDER BY ... LIMIT has ties; "write" operations compare affected-row counts.
+OPERATIONS = [
+    {"section": "basic_queries", "name": "select_all_limit",
+     "sql": "SELECT * FROM users LIMIT 5",
+     "pandas": lambda df: df.head(5)},
+    {"section": "basic_queries", "name": "select_columns_limit",
+     "sql": "SELECT user_id, first_name, last_name FROM users LIMIT 5",
+     "pandas": lambda df: df[['user_id', 'first_name', 'last_name']].head(5)},
+    {"section": "filtering_data", "name": "premium_users",
+     "sql": "SELECT user_id, first_name, last_name FROM users WHERE subscription_plan = 'premium'",
+     "pandas": lambda df: df[df['subscription_plan'] == 'premium'][['user_id', 'first_name', 'last_name']]},
+    {"section": "filtering_data", "name": "active_usa_users",
+     "sql": "SELECT user_id, first_name, last_name FROM users WHERE country = 'USA' AND active_status = 1",
+     "pandas": lambda df: df[(df['country'] == 'USA') & (df['active_status'])][['user_id', 'first_name', 'last_name']]},
+    {"section": "filtering_data", "name": "country_in",
+     "sql": "SELECT user_id, first_name, country FROM users WHERE country IN ('USA', 'Canada', 'UK')",
+     "pandas": lambda df: df[df['country'].isin(['USA', 'Canada', 'UK'])][['user_id', 'first_name', 'country']]},
+    {"section": "aggregation", "name": "count",
+     "sql": "SELECT COUNT(*) as user_count FROM users",
+     "pandas": lambda df: pd.DataFrame([{"user_count": len(df)}])},
+    {"section": "aggregation", "name": "avg_age",
+     "sql": "SELECT AVG(age) as avg_age FROM users",
+     "pandas": lambda df: pd.DataFrame([{"avg_age": df['age'].mean()}])},
+    {"section": "aggregation", "name": "age_stats",
+     "sql": "SELECT MIN(age) as min_age, MAX(age) as max_age, AVG(age) as avg_age, COUNT(*) as total_users FROM users",
+     "pandas": lambda df: pd.DataFrame([{'min_age': df['age'].min(), 'max_age': df['age'].max(),
+                                         'avg_age': df['age'].mean(), 'total_users': len(df)}])},
+    {"section": "grouping", "name": "users_by_country",
+     "sql": "SELECT country, COUNT(*) as user_count FROM users GROUP BY country ORDER BY user_count DESC",
+     "pandas": lambda df: df.groupby('country').size().reset_index(name='user_count')
+                            .sort_values('user_count', ascending=False)},
+    {"section": "grouping", "name": "avg_age_by_plan",
+     "sql": "SELECT subscription_plan, AVG(age) as avg_age, COUNT(*) as user_count FROM users GROUP BY subscription_plan",
+     "pandas": lambda df: df.groupby('subscription_plan').agg({'age': 'mean', 'user_id': 'count'})
+                            .reset_index().rename(columns={'age': 'avg_age', 'user_id': 'user_count'})},
+    {"section": "grouping", "name": "countries_having",
+     "sql": "SELECT country, COUNT(*) as user_count FROM users GROUP BY country HAVING user_count > 2 "
+            "ORDER BY user_count DESC",
+     "pandas": _countries_over},
+    {"section": "advanced_queries", "name": "age_category",
+     "sql": "SELECT first_name, last_name, age, CASE WHEN age < 30 THEN 'Young Adult' "
+            "WHEN age BETWEEN 30 AND 40 THEN 'Adult' ELSE 'Senior Adult' END as age_category FROM users LIMIT 10",
+     "pandas": _age_category},
+    {"section": "advanced_queries", "name": "days_since_login",
+     "sql": "SELECT user_id, first_name, last_name, last_login, "
+            "(julianday('2023-06-15') - julianday(last_login)) as days_since_login "
+            "FROM users ORDER BY days_since_login DESC LIMIT 10",
+     "pandas": _days_since_login,
+     "compare": ["days_since_login"]},
+    {"section": "data_modification", "name": "insert_user", "write": True,
+     "sql": "INSERT INTO users VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", "params": NEW_USER,
+     "pandas": _insert},
+    {"section": "data_modification", "name": "update_user", "write": True,
+     "sql": "UPDATE users SET subscription_plan = 'premium', last_login = '2023-06-15' WHERE user_id = 1011",
+     "pandas": _update},
+    {"section": "data_modification", "name": "delete_inactive", "write": True,
+     "sql": "DELETE FROM users WHERE active_status = 0",
+     "pandas": _delete},
+]
+
+
+def run_sql(conn, operation):
+    """Run one operation in SQLite. Writes are rolled back so every repetition sees the same table."""
+    if operation.get("write"):
+        conn.execute("SAVEPOINT bench")
+        try:
+            return conn.execute(operation["sql"], operation.get("params", ())).rowcount
+        finally:
+            conn.execute("ROLLBACK TO bench")
+            conn.execute("RELEASE bench")
+    cursor = conn.execute(operation["sql"])
+    return [d[0] for d in cursor.description], cursor.fetchall()
+
+
+def _normalize_value(value):
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return None
+    if isinstance(value, pd.Timestamp):
+        return value.strftime("%Y-%m-%d")
+    if isinstance(value, (bool, np.bool_)):
+        return float(value)
+    if isinstance(value, (int, float, np.integer, np.floating)):
+        return round(float(value), 6)
+    return str(value)
+
+
+def _normalize_rows(rows):
+    return sorted((tuple(_normalize_value(v) for v in row) for row in rows), key=repr)
+
+
+def results_match(operation, sql_result, pandas_result):
+    """
+    Compare the two engines' results for one operation.
+
+    Rows are compared as sorted multisets, with numbers rounded and dates as
+    ISO strings, so row order and int/float differences do not count.
+    """
+    if operation.get("write"):
+        return sql_result == pandas_result
+    columns, sql_rows = sql_result
+    compare = operation.get("compare")
+    if compare:
+        picks = [columns.index(c) for c in compare]
+        sql_rows = [[row[i] for i in picks] for row in sql_rows]
+        pandas_result = pandas_result[compare]
+    return _normalize_rows(sql_rows) == _normalize_rows(pandas_result.itertuples(index=False, name=None))
+
+
+def time_call(fn, warmup, repeat):
+    """Run fn warmup times untimed, then repeat times timed. Returns (last result, seconds per run)."""
+    result = None
+    for _ in range(warmup):
+        result = fn()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return result, timings
+
+
+def benchmark_size(n, warmup, repeat, seed, work_dir, create_indexes=False, sections=None):
+    """Benchmark every operation on an n-row table. Returns one report record per operation."""
+    print(f"\n=== {n:,} rows ===")
+    start = time.perf_counter()
+    df_source = generate_users(n, seed)
+    db_path = Path(work_dir) / f"users_{n}.db"
+    conn = build_database(df_source, db_path, create_indexes)
+    del df_source
+    print(f"Generated and loaded in {time.perf_counter() - start:.2f}s")
+
+    # The pandas side starts from what read_sql_query returns, like the demo
+    start = time.perf_counter()
+    df = pd.read_sql_query("SELECT * FROM users", conn)
+    print(f"read_sql_query: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    records = []
+    for operation in OPERATIONS:
+        if sections and operation["section"] not in sections:
+            continue
+        sql_result, sql_times = time_call(lambda: run_sql(conn, operation), warmup, repeat)
+        pandas_result, pandas_times = time_call(lambda: operation["pandas"](df), warmup, repeat)
+        match = results_match(operation, sql_result, pandas_result)
+
+        sql_median = statistics.median(sql_times) * 1000
+        pandas_median = statistics.median(pandas_times) * 1000
+        record = {
+            "rows": n,
+            "section": operation["section"],
+            "operation": operation["name"],
+            "sql_min_ms": round(min(sql_times) * 1000, 4),
+            "sql_median_ms": round(sql_median, 4),
+            "sql_mean_ms": round(statistics.mean(sql_times) * 1000, 4),
+            "pandas_min_ms": round(min(pandas_times) * 1000, 4),
+            "pandas_median_ms": round(pandas_median, 4),
+            "pandas_mean_ms": round(statistics.mean(pandas_times) * 1000, 4),
+            "faster": "sql" if sql_median <= pandas_median else "pandas",
+            "speedup": round(max(sql_median, pandas_median) / max(min(sql_median, pandas_median), 1e-9), 2),
+            "match": match,
+            "repeat": repeat,
+            "indexed": create_indexes,
+        }
+        records.append(record)
+        flag = "" if match else "  MISMATCH"
+        print(f"  {operation['section']:<18} {operation['name']:<22} sql {sql_median:10.3f} ms"
+              f"   pandas {pandas_median:10.3f} ms   -> {record['faster']} x{record['speedup']}{flag}")
+
+    conn.close()
+    db_path.unlink()
+    return records
+
+
+def write_report(records, path):
+    """Write the records as JSON or CSV, chosen by the file suffix."""
+    path = Path(path)
+    if path.suffix.lower() == ".csv":
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=list(records[0]))
+            writer.writeheader()
+            writer.writerows(records)
+    else:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(records, f, indent=2)
+    print(f"Report written to {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the SQL and pandas operations of sqlite3_demo.py')
+    parser.add_argument('--sizes', nargs='+', type=float, default=[1e3, 1e4, 1e5],
+                        help='Table sizes in rows, e.g. 1e3 1e5 1e7 (default: 1e3 1e4 1e5)')
+    parser.add_argument('--warmup', type=int, default=1, help='Untimed runs per operation and engine')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed runs per operation and engine')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed for the synthetic users')
+    parser.add_argument('--sections', nargs='+', choices=sorted({op["section"] for op in OPERATIONS}),
+                        help='Only benchmark these demo sections')
+    parser.add_argument('--indexes', action='store_true',
+                        help='Create the index advisor\'s key/filter indexes before timing SQL')
+    parser.add_argument('--output', action='append', default=[],
+                        help='Report path, .json or .csv (repeatable)')
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="sql_pandas_bench_")
+    records = []
+    try:
+        for size in args.sizes:
+            records += benchmark_size(int(size), args.warmup, args.repeat, args.seed,
+                                      work_dir, args.indexes, args.sections)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    mismatches = [r for r in records if not r["match"]]
+    if mismatches:
+        print(f"\n{len(mismatches)} operation(s) where SQL and pandas disagree:")
+        for r in mismatches:
+            print(f"  - {r['operation']} at {r['rows']:,} rows")
+    for path in args.output:
+        write_report(records, path)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
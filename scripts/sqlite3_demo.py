@@ -15,25 +15,37 @@ Usage:
 import sqlite3
 import os
 import pandas as pd
+from contextlib import closing
 from pathlib import Path
 from pprint import pprint
 
 # Get the absolute path to the database file
 BASE_DIR = Path(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 DB_PATH = BASE_DIR / "data" / "sqlite.db"
+# Arrow IPC snapshot of the users table, rebuilt whenever the database (or its
+# WAL file) is newer; used only when the "columnar" extra (pyarrow) is installed
+ARROW_SNAPSHOT_PATH = BASE_DIR / "data" / "users.arrow"
+
+# One connection serves every section, so map the file and keep hot pages cached
+MMAP_SIZE_MB = 256
+CACHE_SIZE_MB = 64
+# Dtypes materialized once for the pandas side of every section
+CATEGORICAL_COLUMNS = ['country', 'subscription_plan']
+DATE_COLUMNS = ['signup_date', 'last_login']
 
 def connect_to_db():
     """Create a connection to the SQLite database."""
     conn = sqlite3.connect(DB_PATH)
     # Enable foreign keys
     conn.execute("PRAGMA foreign_keys = ON")
+    conn.execute(f"PRAGMA mmap_size = {MMAP_SIZE_MB * 1024 * 1024}")
+    conn.execute(f"PRAGMA cache_size = {-CACHE_SIZE_MB * 1024}")
     # Convert rows to dictionaries
     conn.row_factory = sqlite3.Row
     return conn
 
-def check_users_table():
+def check_users_table(conn):
     """Check if the 'users' table exists in the database."""
-    conn = connect_to_db()
     cursor = conn.cursor()
     cursor.execute("""
         SELECT name
@@ -41,20 +53,111 @@ def check_users_table():
         WHERE type='table' AND name='users'
     """)
     table_exists = cursor.fetchone() is not None
-    conn.close()
     if not table_exists:
         raise sqlite3.OperationalError("The 'users' table does not exist. Please ensure the database is initialized.")
 
-def load_dataframe():
-    """Load the users table into a pandas DataFrame."""
-    conn = connect_to_db()
-    df = pd.read_sql_query("SELECT * FROM users", conn)
-    conn.close()
+def load_arrow_dataframe(path, arrow_dtypes=False):
+    """
+    Memory-map an Arrow IPC file into a DataFrame.
+
+    Nothing is decoded row by row and pages are read lazily by the OS. With
+    split_blocks each numeric column without nulls stays a zero-copy view
+    onto the mapped file; only string columns become Python objects. With
+    arrow_dtypes=True every column is a pyarrow-backed view (no copies at
+    all), at the cost of pyarrow semantics for some pandas operations.
+    """
+    import pyarrow as pa
+
+    # The mapping must outlive the DataFrame, so it is not closed here
+    source = pa.memory_map(str(path))
+    table = pa.ipc.open_file(source).read_all()
+    if arrow_dtypes:
+        return table.to_pandas(types_mapper=pd.ArrowDtype)
+    return table.to_pandas(split_blocks=True)
+
+def snapshot_is_stale():
+    """
+    True if the Arrow snapshot is missing or older than the database.
+
+    In WAL mode committed writes land in the -wal file and reach the main
+    file only at a checkpoint, so both files' modification times count.
+    """
+    if not ARROW_SNAPSHOT_PATH.exists():
+        return True
+    sources = [DB_PATH, DB_PATH.with_name(DB_PATH.name + "-wal")]
+    newest = max(path.stat().st_mtime_ns for path in sources if path.exists())
+    return ARROW_SNAPSHOT_PATH.stat().st_mtime_ns < newest
+
+def load_dataframe(conn=None):
+    """
+    Load the users table into a pandas DataFrame.
+
+    When pyarrow is installed the table is read from an Arrow snapshot
+    (written by csv_to_sqlite.export_table on first use) instead of
+    decoding every row from SQLite again.
+    """
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        pyarrow = None
+
+    if pyarrow is not None:
+        if snapshot_is_stale():
+            from csv_to_sqlite import export_table
+            # Keep SQLite's 1/0 booleans and ISO date strings, as read_sql_query would
+            export_table(DB_PATH, "users", ARROW_SNAPSHOT_PATH, logical_types=False)
+        return load_arrow_dataframe(ARROW_SNAPSHOT_PATH)
+
+    if conn is None:
+        with closing(connect_to_db()) as conn:
+            return pd.read_sql_query("SELECT * FROM users", conn)
+    return pd.read_sql_query("SELECT * FROM users", conn)
+
+def optimize_dtypes(df):
+    """
+    Convert the users DataFrame to analysis-friendly dtypes.
+
+    Low-cardinality text columns become categoricals (integer codes, so
+    filters and group-bys compare small ints instead of strings) and date
+    strings are parsed to datetime64 once instead of in every section.
+    """
+    df = df.copy(deep=False)
+    for column in CATEGORICAL_COLUMNS:
+        df[column] = df[column].astype('category')
+    for column in DATE_COLUMNS:
+        df[column] = pd.to_datetime(df[column])
     return df
 
-def basic_queries(df):
+class DemoSession:
+    """
+    State shared by the demo sections: one configured connection and the
+    users DataFrame, loaded and optimized once and reused until a section
+    writes to the database.
+    """
+
+    def __init__(self):
+        self.conn = connect_to_db()
+        check_users_table(self.conn)
+        self._df = None
+
+    @property
+    def df(self):
+        """The users table as an optimized DataFrame, loaded on first use."""
+        if self._df is None:
+            self._df = optimize_dtypes(load_dataframe(self.conn))
+        return self._df
+
+    def invalidate(self):
+        """Drop the cached DataFrame after a write so the next section reloads it."""
+        self._df = None
+
+    def close(self):
+        self.conn.close()
+
+def basic_queries(session):
     """Demonstrate basic SELECT queries."""
-    conn = connect_to_db()
+    conn = session.conn
+    df = session.df
 
     print("\n=== BASIC QUERIES ===")
 
@@ -105,11 +208,11 @@ def basic_queries(df):
     print("\nPandas output:")
     pprint(pandas_result[:3])
 
-    conn.close()
 
-def filtering_data(df):
+def filtering_data(session):
     """Demonstrate filtering with WHERE clauses."""
-    conn = connect_to_db()
+    conn = session.conn
+    df = session.df
     cursor = conn.cursor()
 
     print("\n=== FILTERING DATA ===")
@@ -186,11 +289,11 @@ def filtering_data(df):
     pprint(pandas_result[:3])
     print("...")
 
-    conn.close()
 
-def aggregation(df):
+def aggregation(session):
     """Demonstrate aggregation functions."""
-    conn = connect_to_db()
+    conn = session.conn
+    df = session.df
     cursor = conn.cursor()
 
     print("\n=== AGGREGATION ===")
@@ -287,11 +390,11 @@ def aggregation(df):
     print("\nPandas output:")
     pprint(pandas_result)
 
-    conn.close()
 
-def grouping(df):
+def grouping(session):
     """Demonstrate GROUP BY operations."""
-    conn = connect_to_db()
+    conn = session.conn
+    df = session.df
     cursor = conn.cursor()
 
     print("\n=== GROUPING DATA ===")
@@ -309,7 +412,7 @@ def grouping(df):
 
     print("\nPandas:")
     pprint("""
-        df.groupby('country').size().reset_index(name='user_count').sort_values('user_count', ascending=False)
+        df.groupby('country', observed=True).size().reset_index(name='user_count').sort_values('user_count', ascending=False)
     """)
 
     # Execute SQL
@@ -322,7 +425,7 @@ def grouping(df):
     sql_result = [dict(row) for row in cursor.fetchall()]
 
     # Execute Pandas
-    pandas_result = df.groupby('country').size().reset_index(name='user_count').sort_values('user_count', ascending=False).to_dict('records')
+    pandas_result = df.groupby('country', observed=True).size().reset_index(name='user_count').sort_values('user_count', ascending=False).to_dict('records')
 
     print("\nSQL output:")
     pprint(sql_result[:3])
@@ -344,7 +447,7 @@ def grouping(df):
 
     print("\nPandas:")
     pprint("""
-        df.groupby('subscription_plan').agg({
+        df.groupby('subscription_plan', observed=True).agg({
             'age': 'mean',
             'user_id': 'count'
         }).reset_index().rename(columns={'age': 'avg_age', 'user_id': 'user_count'})
@@ -359,7 +462,7 @@ def grouping(df):
     sql_result = [dict(row) for row in cursor.fetchall()]
 
     # Execute Pandas
-    pandas_result = (df.groupby('subscription_plan')
+    pandas_result = (df.groupby('subscription_plan', observed=True)
                       .agg({'age': 'mean', 'user_id': 'count'})
                       .reset_index()
                       .rename(columns={'age': 'avg_age', 'user_id': 'user_count'})
@@ -385,7 +488,7 @@ def grouping(df):
 
     print("\nPandas:")
     pprint("""
-        country_counts = df.groupby('country').size().reset_index(name='user_count')
+        country_counts = df.groupby('country', observed=True).size().reset_index(name='user_count')
         country_counts[country_counts['user_count'] > 2].sort_values('user_count', ascending=False)
     """)
 
@@ -400,7 +503,7 @@ def grouping(df):
     sql_result = [dict(row) for row in cursor.fetchall()]
 
     # Execute Pandas
-    country_counts = df.groupby('country').size().reset_index(name='user_count')
+    country_counts = df.groupby('country', observed=True).size().reset_index(name='user_count')
     pandas_result = country_counts[country_counts['user_count'] > 2].sort_values('user_count', ascending=False).to_dict('records')
 
     print("\nSQL output:")
@@ -409,11 +512,11 @@ def grouping(df):
     print("\nPandas output:")
     pprint(pandas_result)
 
-    conn.close()
 
-def advanced_queries(df):
+def advanced_queries(session):
     """Demonstrate advanced queries."""
-    conn = connect_to_db()
+    conn = session.conn
+    df = session.df
     cursor = conn.cursor()
 
     print("\n=== ADVANCED QUERIES ===")
@@ -538,11 +641,11 @@ def advanced_queries(df):
     pprint(pandas_result[:3])
     print("...")
 
-    conn.close()
 
-def data_modification(df):
+def data_modification(session):
     """Demonstrate data modification operations."""
-    conn = connect_to_db()
+    conn = session.conn
+    df = session.df
     cursor = conn.cursor()
 
     print("\n=== DATA MODIFICATION ===")
@@ -675,21 +778,26 @@ def data_modification(df):
     conn.execute("ROLLBACK")
     print("\nAll SQL modifications rolled back to preserve original data")
 
-    conn.close()
+    # The writes touched the table, so later sections must not reuse the cached frame
+    session.invalidate()
+
 
 if __name__ == "__main__":
     try:
         print("Loading data...")
-        check_users_table()  # Ensure the 'users' table exists
-        df = load_dataframe()
+        session = DemoSession()  # Ensures the 'users' table exists
+        df = session.df
         print(f"Loaded DataFrame with {len(df)} rows and {len(df.columns)} columns")
 
-        basic_queries(df)
-        filtering_data(df)
-        aggregation(df)
-        grouping(df)
-        advanced_queries(df)
-        data_modification(df)
+        try:
+            basic_queries(session)
+            filtering_data(session)
+            aggregation(session)
+            grouping(session)
+            advanced_queries(session)
+            data_modification(session)
+        finally:
+            session.close()
 
         print("\nDemo completed successfully!")
     except sqlite3.OperationalError as e:
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+MCP Server Startup Benchmark
+
+Measures how quickly each server in src/ comes up, in two ways:
+
+1. Import time: the server module is loaded (without running its __main__
+   block) under `python -X importtime`, and the slowest top-level imports are
+   listed, so heavy imports that belong inside the tools that need them stand
+   out.
+2. Time to port: the server is started as it would be in production and the
+   clock stops when its port accepts a TCP connection.
+
+fastmcp alone takes most of a second to import, and its run-to-run noise is
+larger than most server-side savings, so the import time beyond fastmcp is
+reported separately.
+
+Each server gets a free port through SERVER_PORT and FASTMCP_SERVER_PORT.
+
+Usage:
+    python startup_benchmark.py [server.py ...] [--repeat 5] [--top 8] [--output startup.json]
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import statistics
+import subprocess
+from pathlib import Path
+
+SRC_DIR = Path(__file__).parent.parent / "src"
+
+# Imported by every server; their time is the floor no server-side change can lower
+FRAMEWORK_MODULES = ("fastmcp", "mcp", "site")
+
+# Loads the server module under a name other than __main__, so mcp.run() is not reached
+IMPORT_ONLY = "import runpy, sys; runpy.run_path(sys.argv[1], run_name='startup_benchmark')"
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def server_env(port):
+    return dict(os.environ, SERVER_PORT=str(port), FASTMCP_SERVER_PORT=str(port), PYTHONUNBUFFERED="1")
+
+
+def parse_importtime(stderr):
+    """Top-level imports from -X importtime output, as (module, cumulative ms)."""
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not name.startswith("  "):  # nested imports are indented further
+            imports.append((name.strip(), int(cumulative) / 1000))
+    return imports
+
+
+def measure_imports(server):
+    """Total and per-module import time of loading a server module."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", IMPORT_ONLY, str(server)],
+        capture_output=True, text=True, env=server_env(free_port()), cwd=server.parent
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"{server.name} failed to import:\n{result.stderr[-2000:]}")
+    imports = parse_importtime(result.stderr)
+    return sum(ms for _, ms in imports), imports
+
+
+def time_to_port(server, timeout=30.0):
+    """Seconds from spawning a server until its port accepts connections."""
+    port = free_port()
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, str(server)], env=server_env(port), cwd=server.parent,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            if process.poll() is not None:
+                raise RuntimeError(f"{server.name} exited with code {process.returncode} before listening")
+            try:
+                with socket.create_connection(("127.0.0.1", port), timeout=0.1):
+                    return time.perf_counter() - started
+            except OSError:
+                time.sleep(0.01)
+        raise RuntimeError(f"{server.name} did not listen on port {port} within {timeout:.0f}s")
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+
+def benchmark_server(server, repeat, top):
+    import_runs = [measure_imports(server) for _ in range(repeat)]
+    port_runs = [time_to_port(server) * 1000 for _ in range(repeat)]
+    own_runs = [
+        total - sum(ms for module, ms in imports if module.split(".")[0] in FRAMEWORK_MODULES)
+        for total, imports in import_runs
+    ]
+    # Per-module times from the fastest run, which has the least noise
+    _, imports = min(import_runs, key=lambda run: run[0])
+    return {
+        "server": server.name,
+        "import_ms": round(statistics.median(total for total, _ in import_runs), 1),
+        "own_import_ms": round(statistics.median(own_runs), 1),
+        "time_to_port_ms": round(statistics.median(port_runs), 1),
+        "time_to_port_max_ms": round(max(port_runs), 1),
+        "slowest_imports": [
+            {"module": module, "cumulative_ms": round(ms, 1)}
+            for module, ms in sorted(imports, key=lambda item: item[1], reverse=True)[:top]
+        ],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure import time and time-to-port of the MCP servers')
+    parser.add_argument('servers', nargs='*', help='Server scripts (default: every FastMCP server in src/)')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per server; medians are reported')
+    parser.add_argument('--top', type=int, default=8, help='Slowest top-level imports to list per server')
+    parser.add_argument('--output', help='Also write the results to this JSON file')
+    args = parser.parse_args()
+
+    servers = [Path(s).resolve() for s in args.servers] or [
+        # Shared modules such as instrumentation.py sit next to the servers
+        path for path in sorted(SRC_DIR.glob("*.py")) if "FastMCP(" in path.read_text(encoding="utf-8")
+    ]
+    results = []
+    for server in servers:
+        print(f"Benchmarking {server.name} ({args.repeat} runs)...")
+        try:
+            result = benchmark_server(server, args.repeat, args.top)
+        except RuntimeError as e:
+            print(f"  Error: {e}", file=sys.stderr)
+            continue
+        results.append(result)
+        print(f"  import {result['import_ms']:.1f} ms ({result['own_import_ms']:.1f} ms beyond the framework), "
+              f"time to port {result['time_to_port_ms']:.1f} ms (max {result['time_to_port_max_ms']:.1f} ms)")
+        for entry in result["slowest_imports"]:
+            print(f"    {entry['cumulative_ms']:8.1f} ms  {entry['module']}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+    return 0 if len(results) == len(servers) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
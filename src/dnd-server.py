@@ -8,6 +8,10 @@ from typing import List, Dict, Any, Optional, Union
 
 from fastmcp import FastMCP
 
+from instrumentation import configure_logging, install_health, install_metrics, track_calls
+
+log = configure_logging("dnd-server")
+
 # Create DND server
 mcp = FastMCP("DND Server")
 
@@ -21,26 +25,27 @@ ENCOUNTERS_FILE = DND_DATA_DIR / "encounters.json"
 # Create necessary directories if they don't exist
 if not os.path.exists(DND_DATA_DIR):
     os.makedirs(DND_DATA_DIR)
-    print(f"[dnd-server] Created DND data directory at {DND_DATA_DIR}")
+    log.info("Created DND data directory at %s", DND_DATA_DIR)
 
 if not os.path.exists(NOTES_DIR):
     os.makedirs(NOTES_DIR)
-    print(f"[dnd-server] Created notes directory at {NOTES_DIR}")
+    log.info("Created notes directory at %s", NOTES_DIR)
 
 # Initialize empty characters file if it doesn't exist
 if not os.path.exists(CHARACTERS_FILE):
     with open(CHARACTERS_FILE, 'w') as f:
         json.dump([], f)
-    print(f"[dnd-server] Created empty characters file at {CHARACTERS_FILE}")
+    log.info("Created empty characters file at %s", CHARACTERS_FILE)
 
 # Initialize empty encounters file if it doesn't exist
 if not os.path.exists(ENCOUNTERS_FILE):
     with open(ENCOUNTERS_FILE, 'w') as f:
         json.dump([], f)
-    print(f"[dnd-server] Created empty encounters file at {ENCOUNTERS_FILE}")
+    log.info("Created empty encounters file at %s", ENCOUNTERS_FILE)
 
 # Dice rolling tool
 @mcp.tool()
+@track_calls
 def roll_dice(dice_notation: str) -> Dict[str, Any]:
     """Roll dice using standard dice notation (e.g., '2d6', '1d20+5', '3d8-2')
     
@@ -50,7 +55,6 @@ def roll_dice(dice_notation: str) -> Dict[str, Any]:
     Returns:
         Dictionary containing roll results
     """
-    print(f"[dnd-server] roll_dice({dice_notation})")
     
     # Parse the dice notation
     # Support for NdM+K or NdM-K format
@@ -78,6 +82,7 @@ def roll_dice(dice_notation: str) -> Dict[str, Any]:
 
 # Note management tools
 @mcp.tool()
+@track_calls
 def create_note(title: str, content: str, tags: Optional[List[str]] = None) -> Dict[str, Any]:
     """Create a new note with title, content, and optional tags
     
@@ -89,7 +94,6 @@ def create_note(title: str, content: str, tags: Optional[List[str]] = None) -> D
     Returns:
         Dictionary with information about the created note
     """
-    print(f"[dnd-server] create_note({title}, {content[:20]}..., {tags})")
     
     if tags is None:
         tags = []
@@ -123,6 +127,7 @@ tags: {', '.join(tags)}
     }
 
 @mcp.tool()
+@track_calls
 def list_notes(tag: Optional[str] = None) -> List[Dict[str, Any]]:
     """List all notes or filter by tag
     
@@ -132,7 +137,6 @@ def list_notes(tag: Optional[str] = None) -> List[Dict[str, Any]]:
     Returns:
         List of note metadata
     """
-    print(f"[dnd-server] list_notes(tag={tag})")
     
     notes = []
     
@@ -166,6 +170,7 @@ def list_notes(tag: Optional[str] = None) -> List[Dict[str, Any]]:
     return notes
 
 @mcp.tool()
+@track_calls
 def read_note(title_or_filename: str) -> Dict[str, Any]:
     """Read a note by title or filename
     
@@ -175,7 +180,6 @@ def read_note(title_or_filename: str) -> Dict[str, Any]:
     Returns:
         Dictionary with note content and metadata
     """
-    print(f"[dnd-server] read_note({title_or_filename})")
     
     # Try to find the note by filename or title
     note_file = None
@@ -227,6 +231,7 @@ def read_note(title_or_filename: str) -> Dict[str, Any]:
 
 # Character management tools
 @mcp.tool()
+@track_calls
 def add_character(name: str, character_data: Dict[str, Any]) -> Dict[str, Any]:
     """Add or update a character with the given data
     
@@ -237,7 +242,6 @@ def add_character(name: str, character_data: Dict[str, Any]) -> Dict[str, Any]:
     Returns:
         Dictionary with status and character info
     """
-    print(f"[dnd-server] add_character({name}, {character_data})")
     
     # Load existing characters
     with open(CHARACTERS_FILE, 'r') as f:
@@ -273,6 +277,7 @@ def add_character(name: str, character_data: Dict[str, Any]) -> Dict[str, Any]:
     }
 
 @mcp.tool()
+@track_calls
 def get_character(name: str) -> Dict[str, Any]:
     """Get character details by name
     
@@ -282,7 +287,6 @@ def get_character(name: str) -> Dict[str, Any]:
     Returns:
         Dictionary with character data
     """
-    print(f"[dnd-server] get_character({name})")
     
     # Load characters
     with open(CHARACTERS_FILE, 'r') as f:
@@ -296,13 +300,13 @@ def get_character(name: str) -> Dict[str, Any]:
     return {"error": f"Character not found: {name}"}
 
 @mcp.tool()
+@track_calls
 def list_characters() -> List[Dict[str, Any]]:
     """List all characters
     
     Returns:
         List of characters with basic info
     """
-    print("[dnd-server] list_characters()")
     
     # Load characters
     with open(CHARACTERS_FILE, 'r') as f:
@@ -318,6 +322,7 @@ def list_characters() -> List[Dict[str, Any]]:
 
 # Encounter management tools
 @mcp.tool()
+@track_calls
 def create_encounter(name: str, monsters: List[Dict[str, Any]], description: str = "") -> Dict[str, Any]:
     """Create a new encounter with monsters and description
     
@@ -329,7 +334,6 @@ def create_encounter(name: str, monsters: List[Dict[str, Any]], description: str
     Returns:
         Dictionary with encounter info
     """
-    print(f"[dnd-server] create_encounter({name}, {monsters}, {description[:20]}...)")
     
     # Load existing encounters
     with open(ENCOUNTERS_FILE, 'r') as f:
@@ -357,13 +361,13 @@ def create_encounter(name: str, monsters: List[Dict[str, Any]], description: str
     }
 
 @mcp.tool()
+@track_calls
 def list_encounters() -> List[Dict[str, Any]]:
     """List all encounters
     
     Returns:
         List of encounters with basic info
     """
-    print("[dnd-server] list_encounters()")
     
     # Load encounters
     with open(ENCOUNTERS_FILE, 'r') as f:
@@ -377,6 +381,7 @@ def list_encounters() -> List[Dict[str, Any]]:
     } for enc in encounters]
 
 @mcp.tool()
+@track_calls
 def get_encounter(name: str) -> Dict[str, Any]:
     """Get encounter details by name
     
@@ -386,7 +391,6 @@ def get_encounter(name: str) -> Dict[str, Any]:
     Returns:
         Dictionary with encounter data
     """
-    print(f"[dnd-server] get_encounter({name})")
     
     # Load encounters
     with open(ENCOUNTERS_FILE, 'r') as f:
@@ -401,6 +405,7 @@ def get_encounter(name: str) -> Dict[str, Any]:
 
 # Initiative tracker
 @mcp.tool()
+@track_calls
 def roll_initiative(participants: List[Dict[str, Any]]) -> Dict[str, Any]:
     """Roll initiative for a list of participants
     
@@ -411,7 +416,6 @@ def roll_initiative(participants: List[Dict[str, Any]]) -> Dict[str, Any]:
     Returns:
         Ordered list of participants with initiative rolls
     """
-    print(f"[dnd-server] roll_initiative({participants})")
     
     initiative_order = []
     
@@ -439,6 +443,7 @@ def roll_initiative(participants: List[Dict[str, Any]]) -> Dict[str, Any]:
 
 # Random generators
 @mcp.tool()
+@track_calls
 def generate_random_npc(race: Optional[str] = None, occupation: Optional[str] = None) -> Dict[str, Any]:
     """Generate a random NPC
     
@@ -449,7 +454,6 @@ def generate_random_npc(race: Optional[str] = None, occupation: Optional[str] =
     Returns:
         Dictionary with NPC details
     """
-    print(f"[dnd-server] generate_random_npc(race={race}, occupation={occupation})")
     
     races = ["Human", "Elf", "Dwarf", "Halfling", "Gnome", "Half-Elf", "Half-Orc", "Dragonborn", "Tiefling"]
     occupations = ["Shopkeeper", "Blacksmith", "Guard", "Farmer", "Innkeeper", "Priest", "Noble", "Beggar", "Merchant", "Scholar"]
@@ -498,6 +502,7 @@ def generate_random_npc(race: Optional[str] = None, occupation: Optional[str] =
     }
 
 @mcp.tool()
+@track_calls
 def generate_loot(treasure_level: str = "medium") -> Dict[str, Any]:
     """Generate random loot based on treasure level
     
@@ -507,7 +512,6 @@ def generate_loot(treasure_level: str = "medium") -> Dict[str, Any]:
     Returns:
         Dictionary with generated loot
     """
-    print(f"[dnd-server] generate_loot(treasure_level={treasure_level})")
     
     gold = 0
     items = []
@@ -554,6 +558,7 @@ def generate_loot(treasure_level: str = "medium") -> Dict[str, Any]:
 
 # Random table roller
 @mcp.tool()
+@track_calls
 def roll_on_table(table_name: str) -> Dict[str, Any]:
     """Roll on a random table
     
@@ -563,7 +568,6 @@ def roll_on_table(table_name: str) -> Dict[str, Any]:
     Returns:
         Dictionary with roll result
     """
-    print(f"[dnd-server] roll_on_table({table_name})")
     
     tables = {
         "tavern_name": [
@@ -629,6 +633,14 @@ def roll_on_table(table_name: str) -> Dict[str, Any]:
         "result": result
     }
 
+def data_health() -> dict:
+    return {"ok": DND_DATA_DIR.is_dir(), "data_dir": str(DND_DATA_DIR)}
+
+
+install_health(mcp, checks={"data": data_health})
+install_metrics(mcp)
+
+
 if __name__ == "__main__":
-    print("[dnd-server] Starting DND MCP Server...")
+    log.info("Starting DND MCP Server...")
     mcp.run(transport="sse")
\ No newline at end of file
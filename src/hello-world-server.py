@@ -8,9 +8,12 @@ from typing import Dict, List, Any
 from fastmcp import FastMCP
 from dotenv import load_dotenv
 
+from instrumentation import configure_logging, install_health, install_metrics, track_calls
+
 # ---------- ENVIRONMENT SETUP ----------
 # Load environment variables from .env file
 load_dotenv()
+log = configure_logging("hello-world-server")
 # Get port from environment variable or use default
 SERVER_PORT = int(os.environ.get("SERVER_PORT", 8089))
 # Initialize the MCP server with the specified port
@@ -30,6 +33,7 @@ WORLD_SYNONYMS = [
 
 # ---------- MCP TOOL DEFINITIONS ----------
 @mcp.tool()
+@track_calls
 def generate_hello_world() -> Dict[str, Any]:
     """
     Generate a random 'Hello World' phrase using synonyms.
@@ -37,7 +41,6 @@ def generate_hello_world() -> Dict[str, Any]:
     Returns:
         Dictionary containing the generated phrase and its components
     """
-    print("[hello-world-server] generate_hello_world()")
     
     # Select random words from each list
     hello_word = random.choice(HELLO_SYNONYMS)
@@ -55,7 +58,7 @@ def generate_hello_world() -> Dict[str, Any]:
 # ---------- SERVER LIFECYCLE MANAGEMENT ----------
 def cleanup_handler(sig=None, frame=None):
     """Handle cleanup when the server is being shut down"""
-    print("[hello-world-server] Shutting down hello-world server...")
+    log.info("Shutting down hello-world server...")
     # Add any necessary cleanup code here
 
 # Register signal handlers for proper cleanup
@@ -63,8 +66,12 @@ signal.signal(signal.SIGINT, cleanup_handler)
 signal.signal(signal.SIGTERM, cleanup_handler)
 atexit.register(cleanup_handler)
 
+# ---------- HEALTH ENDPOINTS ----------
+install_health(mcp)
+install_metrics(mcp)
+
 # ---------- SERVER STARTUP ----------
 if __name__ == "__main__":
-    print(f"[hello-world-server] Starting Hello World Server on port {SERVER_PORT}...")
+    log.info("Starting Hello World Server on port %s...", SERVER_PORT)
     mcp.run(transport="sse")
-    print("[hello-world-server] Server stopped.")
\ No newline at end of file
+    log.info("Server stopped.")
\ No newline at end of file
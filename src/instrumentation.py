@@ -0,0 +1,409 @@
+"""
+Shared instrumentation for the MCP servers in this directory: per-tool call
+statistics, health and readiness endpoints, and Prometheus metrics.
+
+The servers run as scripts (`uv run src/server.py`), so they import this
+module as a sibling:
+
+    from instrumentation import install_health, install_metrics, track_calls
+
+    @mcp.tool()
+    @track_calls
+    def add(a: int, b: int) -> int:
+        ...
+
+    install_health(mcp, checks={"database": database_health})
+    install_metrics(mcp)
+
+GET /health always answers 200 while the process is up and reports uptime,
+the number of tools, calls in flight and the result of every check. GET
+/ready answers 503 while any check reports {"ok": False}, so load balancers
+and test harnesses (tests/readiness.py) can wait for it instead of sleeping.
+
+GET /metrics serves call counts, errors, response bytes and a latency
+histogram per tool in the Prometheus text format; the server_stats tool
+returns the same numbers with p50/p95/p99 latencies to MCP clients.
+
+Logging goes through configure_logging(server), which returns the server's
+logger. Records are put on a queue unformatted and written by a background
+thread, so a tool call only pays for appending to the queue. track_calls
+logs every call (tool, truncated arguments, duration, outcome); successful
+calls can be sampled per tool, failures are always logged.
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import queue
+import atexit
+import random
+import inspect
+import logging
+import functools
+import threading
+import logging.handlers
+from collections import Counter, deque
+from typing import Any, Awaitable, Callable, Optional, Union
+
+from dotenv import load_dotenv
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse
+
+# The servers import this module before calling load_dotenv themselves
+load_dotenv()
+
+HealthCheck = Callable[[], Union[dict[str, Any], Awaitable[dict[str, Any]]]]
+
+# Histogram bucket bounds for tool latency, in seconds (Prometheus convention)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Recent durations kept per tool for the percentiles in server_stats
+LATENCY_SAMPLES = int(os.environ.get("TOOL_LATENCY_SAMPLES", 1024))
+# Text results are measured exactly; structured results would need a second
+# JSON encode on the request path, so only this fraction of them is encoded
+# and the total is extrapolated from those
+RESPONSE_SIZE_SAMPLE_RATE = float(os.environ.get("RESPONSE_SIZE_SAMPLE_RATE", 0.01))
+# Tools report most failures by returning {"error": ...}; the text tools in
+# server.py return messages starting with one of these instead
+ERROR_PREFIXES = ("Error", "SQL Error", "Query rejected", "Weather lookup failed")
+
+# Logging: minimum level, "text" or "json" lines, how much of each argument
+# to show, and the fraction of successful calls logged per tool
+# ("add=0.01,roll_dice=0.1"; "*" sets the default for the rest)
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.environ.get("LOG_FORMAT", "text")
+LOG_ARG_MAX_CHARS = int(os.environ.get("LOG_ARG_MAX_CHARS", 200))
+LOG_SAMPLE_RATES = {
+    tool.strip(): float(rate)
+    for tool, _, rate in (item.partition("=") for item in os.environ.get("LOG_SAMPLE_RATES", "").split(","))
+    if tool.strip() and rate
+}
+
+_started = time.monotonic()
+_in_flight: Counter = Counter()
+_lock = threading.Lock()
+
+
+class ToolStats:
+    """Counters and latency distribution of one tool."""
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.errors = 0
+        self.response_bytes = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)  # last one is +Inf
+        self.recent: deque = deque(maxlen=LATENCY_SAMPLES)
+
+    def record(self, seconds: float, failed: bool, size: int) -> None:
+        self.calls += 1
+        self.errors += failed
+        self.response_bytes += size
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        self.buckets[next((i for i, bound in enumerate(LATENCY_BUCKETS) if seconds <= bound), -1)] += 1
+        self.recent.append(seconds)
+
+    def percentile(self, q: float) -> float:
+        """Nearest-rank percentile of the recent durations, in seconds."""
+        ordered = sorted(self.recent)
+        if not ordered:
+            return 0.0
+        return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+    def summary(self) -> dict[str, Any]:
+        ms = lambda seconds: round(seconds * 1000, 3)
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "p50_ms": ms(self.percentile(50)),
+            "p95_ms": ms(self.percentile(95)),
+            "p99_ms": ms(self.percentile(99)),
+            "mean_ms": ms(self.total_seconds / self.calls) if self.calls else 0.0,
+            "max_ms": ms(self.max_seconds),
+            "total_ms": ms(self.total_seconds),
+            "response_bytes": self.response_bytes,
+        }
+
+
+_stats: dict[str, ToolStats] = {}
+
+
+def _response_bytes(result: Any) -> int:
+    """Size of a tool result: exact for text, an unbiased sampled estimate otherwise."""
+    if result is None:
+        return 0
+    if isinstance(result, str):
+        return len(result.encode("utf-8"))
+    if isinstance(result, bytes):
+        return len(result)
+    if RESPONSE_SIZE_SAMPLE_RATE <= 0 or random.random() >= RESPONSE_SIZE_SAMPLE_RATE:
+        return 0
+    return round(len(json.dumps(result, default=str)) / RESPONSE_SIZE_SAMPLE_RATE)
+
+
+def _record_call(name: str, started: float, arguments: dict, result: Any, exception: Optional[BaseException]) -> None:
+    seconds = time.perf_counter() - started
+    if exception is not None:
+        error = f"{type(exception).__name__}: {exception}"
+    elif isinstance(result, dict) and "error" in result:
+        error = str(result["error"])
+    elif isinstance(result, str) and result.startswith(ERROR_PREFIXES):
+        error = result
+    else:
+        error = None
+    size = _response_bytes(result)
+    with _lock:
+        _in_flight[name] -= 1
+        _stats.setdefault(name, ToolStats()).record(seconds, error is not None, size)
+
+    if error is not None:
+        _call_log.warning("tool call failed", extra={
+            "tool": name, "arguments": arguments, "duration_ms": round(seconds * 1000, 3), "error": error
+        })
+    elif _call_log.isEnabledFor(logging.INFO) and _sampled(name):
+        _call_log.info("tool call", extra={
+            "tool": name, "arguments": arguments, "duration_ms": round(seconds * 1000, 3), "bytes": size
+        })
+
+
+def _sampled(tool: str) -> bool:
+    rate = LOG_SAMPLE_RATES.get(tool, LOG_SAMPLE_RATES.get("*", 1.0))
+    return rate >= 1 or random.random() < rate
+
+
+def track_calls(fn: Callable) -> Callable:
+    """Count, time and log a tool's calls. Apply it below @mcp.tool()."""
+    name = fn.__name__
+
+    if inspect.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def async_wrapper(*args, **kwargs):
+            with _lock:
+                _in_flight[name] += 1
+            started, result, exception = time.perf_counter(), None, None
+            try:
+                result = await fn(*args, **kwargs)
+                return result
+            except BaseException as e:
+                exception = e
+                raise
+            finally:
+                _record_call(name, started, kwargs, result, exception)
+        return async_wrapper
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        with _lock:
+            _in_flight[name] += 1
+        started, result, exception = time.perf_counter(), None, None
+        try:
+            result = fn(*args, **kwargs)
+            return result
+        except BaseException as e:
+            exception = e
+            raise
+        finally:
+            _record_call(name, started, kwargs, result, exception)
+    return wrapper
+
+
+def tool_stats() -> dict[str, dict[str, Any]]:
+    """Summary per tool, slowest in total first."""
+    with _lock:
+        summaries = {name: stats.summary() for name, stats in _stats.items()}
+    return dict(sorted(summaries.items(), key=lambda item: item[1]["total_ms"], reverse=True))
+
+
+def in_flight() -> dict[str, int]:
+    """Calls currently running, per tool."""
+    with _lock:
+        return {name: count for name, count in _in_flight.items() if count}
+
+
+_LOG_FIELDS = ("tool", "arguments", "duration_ms", "bytes", "error")
+_server_name = "server"
+_listener: Optional[logging.handlers.QueueListener] = None
+_call_log = logging.getLogger("servers.calls")
+
+
+def truncate(value: Any, limit: int = LOG_ARG_MAX_CHARS) -> str:
+    text = value if isinstance(value, str) else repr(value)
+    return text if len(text) <= limit else f"{text[:limit]}...({len(text)} chars)"
+
+
+class StructuredFormatter(logging.Formatter):
+    """One line per record, as key=value pairs or JSON; runs on the writer thread."""
+
+    def __init__(self, as_json: bool = False) -> None:
+        super().__init__()
+        self.as_json = as_json
+
+    def format(self, record: logging.LogRecord) -> str:
+        fields: dict[str, Any] = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(record.created)) + f".{int(record.msecs):03d}",
+            "level": record.levelname,
+            "server": _server_name,
+            "msg": record.getMessage(),
+        }
+        for field in _LOG_FIELDS:
+            if hasattr(record, field):
+                fields[field] = getattr(record, field)
+        if isinstance(fields.get("arguments"), dict):
+            fields["arguments"] = {key: truncate(value) for key, value in fields["arguments"].items()}
+        if isinstance(fields.get("error"), str):
+            fields["error"] = truncate(fields["error"])
+        if record.exc_info:
+            fields["exception"] = self.formatException(record.exc_info)
+        if self.as_json:
+            return json.dumps(fields, default=str)
+        return " ".join(
+            f"{key}={value}" if key in ("ts", "level") else f"{key}={json.dumps(value, default=str)}"
+            for key, value in fields.items()
+        )
+
+
+class _UnformattedQueueHandler(logging.handlers.QueueHandler):
+    # The stock prepare() formats the message on the caller's thread; the
+    # listener's formatter does that work instead
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def configure_logging(server: str) -> logging.Logger:
+    """
+    Route the servers' logs through a queue to a background writer.
+
+    Call once, at the top of a server script, with the name that should tag
+    its records; returns the logger for the script's own messages.
+    """
+    global _server_name, _listener
+    _server_name = server
+    root = logging.getLogger("servers")
+    if _listener is None:
+        log_queue: queue.SimpleQueue = queue.SimpleQueue()
+        writer = logging.StreamHandler(sys.stdout)
+        writer.setFormatter(StructuredFormatter(as_json=LOG_FORMAT == "json"))
+        _listener = logging.handlers.QueueListener(log_queue, writer)
+        _listener.start()
+        atexit.register(_listener.stop)  # drains the queue before exit
+        root.addHandler(_UnformattedQueueHandler(log_queue))
+        root.setLevel(LOG_LEVEL)
+        root.propagate = False
+    return logging.getLogger(f"servers.{server}")
+
+
+async def health_report(mcp, checks: dict[str, HealthCheck]) -> tuple[bool, dict[str, Any]]:
+    """Run the checks and describe the server; returns (ready, report)."""
+    results = {}
+    ready = True
+    for name, check in checks.items():
+        try:
+            result = check()
+            if inspect.isawaitable(result):
+                result = await result
+        except Exception as e:
+            result = {"ok": False, "error": str(e)}
+        ready = ready and result.get("ok", True)
+        results[name] = result
+    calls = in_flight()
+    return ready, {
+        "status": "ready" if ready else "unavailable",
+        "server": mcp.name,
+        "uptime_s": round(time.monotonic() - _started, 3),
+        "tools": len(await mcp.get_tools()),
+        "in_flight": sum(calls.values()),
+        "in_flight_by_tool": calls,
+        "checks": results,
+    }
+
+
+def install_health(mcp, checks: Optional[dict[str, HealthCheck]] = None) -> None:
+    """
+    Add GET /health and GET /ready to a FastMCP server.
+
+    Args:
+        mcp: The FastMCP server
+        checks: Name -> function returning a dict (sync or async). A dict with
+            "ok": False makes /ready answer 503; raising counts as not ok.
+            Checks run on every probe, so they must be cheap and must not
+            initialize the resources they report on.
+    """
+    checks = checks or {}
+
+    @mcp.custom_route("/health", methods=["GET"])
+    async def health(request: Request) -> JSONResponse:
+        _, report = await health_report(mcp, checks)
+        return JSONResponse(report)
+
+    @mcp.custom_route("/ready", methods=["GET"])
+    async def ready(request: Request) -> JSONResponse:
+        is_ready, report = await health_report(mcp, checks)
+        return JSONResponse(report, status_code=200 if is_ready else 503)
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def prometheus_text(server: str) -> str:
+    """All tool metrics in the Prometheus text exposition format."""
+    with _lock:
+        stats = {name: (s.calls, s.errors, s.response_bytes, s.total_seconds, list(s.buckets))
+                 for name, s in _stats.items()}
+        running = dict(_in_flight)
+    server_label = f'server="{_label(server)}"'
+    lines = [
+        "# HELP mcp_server_uptime_seconds Seconds since the server process started.",
+        "# TYPE mcp_server_uptime_seconds gauge",
+        f"mcp_server_uptime_seconds{{{server_label}}} {time.monotonic() - _started:.3f}",
+    ]
+    counters = [
+        ("mcp_tool_calls_total", "Tool calls completed.", 0),
+        ("mcp_tool_errors_total", "Tool calls that raised or returned an error.", 1),
+        ("mcp_tool_response_bytes_total", "Bytes of tool results returned (sampled for structured results).", 2),
+    ]
+    for metric, help_text, index in counters:
+        lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} counter"]
+        lines += [f'{metric}{{{server_label},tool="{_label(name)}"}} {values[index]}'
+                  for name, values in stats.items()]
+
+    lines += ["# HELP mcp_tool_in_flight Tool calls currently running.", "# TYPE mcp_tool_in_flight gauge"]
+    lines += [f'mcp_tool_in_flight{{{server_label},tool="{_label(name)}"}} {count}'
+              for name, count in running.items()]
+
+    lines += ["# HELP mcp_tool_duration_seconds Tool call latency.", "# TYPE mcp_tool_duration_seconds histogram"]
+    for name, (calls, _, _, total, buckets) in stats.items():
+        labels = f'{server_label},tool="{_label(name)}"'
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS + (math.inf,), buckets):
+            cumulative += count
+            le = "+Inf" if bound == math.inf else repr(bound)
+            lines.append(f'mcp_tool_duration_seconds_bucket{{{labels},le="{le}"}} {cumulative}')
+        lines.append(f"mcp_tool_duration_seconds_sum{{{labels}}} {total:.6f}")
+        lines.append(f"mcp_tool_duration_seconds_count{{{labels}}} {calls}")
+    return "\n".join(lines) + "\n"
+
+
+def install_metrics(mcp) -> None:
+    """Add GET /metrics (Prometheus text) and the server_stats tool to a FastMCP server."""
+
+    @mcp.custom_route("/metrics", methods=["GET"])
+    async def metrics(request: Request) -> PlainTextResponse:
+        return PlainTextResponse(prometheus_text(mcp.name), media_type="text/plain; version=0.0.4")
+
+    @mcp.tool()
+    def server_stats() -> dict:
+        """Get call counts, error counts, latency percentiles (p50/p95/p99) and response sizes per tool
+
+        Returns:
+            Dictionary with the server uptime and one entry per tool that has
+            been called, slowest in total first
+        """
+        return {
+            "uptime_s": round(time.monotonic() - _started, 3),
+            "in_flight": in_flight(),
+            "tools": tool_stats(),
+        }
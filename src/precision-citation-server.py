@@ -1,91 +1,824 @@
 import os
+import re
+import time
+import uuid
+import hashlib
+import importlib.util
+import asyncio
+import fnmatch
 import pathlib
-import requests
 import signal
 import atexit
-from typing import Optional, Union, Any
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from urllib.parse import urlparse
+from typing import Optional, Any, Iterator, Union, TYPE_CHECKING
 
-from fastmcp import FastMCP
-from bs4 import BeautifulSoup
-import markdownify
-from playwright.sync_api import sync_playwright
+from fastmcp import FastMCP, Context
 from dotenv import load_dotenv
 
+from instrumentation import configure_logging, install_health, install_metrics, track_calls
+
+# bs4, markdownify, lxml, requests and Playwright add ~200 ms to startup, so
+# they are imported by the functions that use them, on first call
+if TYPE_CHECKING:
+    from bs4 import BeautifulSoup
+    from lxml import etree
+
 # Load environment variables from .env file
 load_dotenv()
+log = configure_logging("precision-citation-server")
 # Get port from environment variable or use default
 SERVER_PORT = int(os.environ.get("SERVER_PORT", 8089))
 # Initialize the MCP server with the specified port
 mcp = FastMCP("Content Extractor Server", port=SERVER_PORT)
 
+# ---------- Output Budgets ----------
+# Upper bounds on how much of a page is serialized into a single response.
+# Each can be overridden per call; these are the server-wide defaults.
+STRUCTURE_MAX_DEPTH = int(os.environ.get("STRUCTURE_MAX_DEPTH", 32))
+STRUCTURE_MAX_NODES = int(os.environ.get("STRUCTURE_MAX_NODES", 2000))
+STRUCTURE_MAX_BYTES = int(os.environ.get("STRUCTURE_MAX_BYTES", 256_000))
+# Cap on the number of structure chunks kept for a single page in "chunked" mode
+STRUCTURE_MAX_CHUNKS = int(os.environ.get("STRUCTURE_MAX_CHUNKS", 64))
+MARKDOWN_MAX_CHARS = int(os.environ.get("MARKDOWN_MAX_CHARS", 200_000))
+# Attributes kept on serialized elements unless the caller asks for others
+DEFAULT_ATTRIBUTES = ("id", "class", "href", "src", "alt", "title", "name", "role")
+STRUCTURE_FORMATS = ("nested", "chunked", "none")
+EXTRACT_MODES = ("markdown", "chunks")
+# Paragraphs longer than this are split further at sentence boundaries
+CHUNK_MAX_CHARS = int(os.environ.get("CHUNK_MAX_CHARS", 1000))
+# Number of distinct compiled XPath expressions kept in memory
+XPATH_CACHE_SIZE = int(os.environ.get("XPATH_CACHE_SIZE", 256))
+
+# ---------- Render Settings ----------
+# Resource types and hosts that headless renders never download. Domain
+# patterns match the host itself or any subdomain, and accept fnmatch globs.
+RENDER_BLOCKED_RESOURCE_TYPES = [t for t in os.environ.get(
+    "RENDER_BLOCKED_RESOURCE_TYPES", "image,font,media"
+).split(",") if t]
+RENDER_BLOCKED_DOMAINS = [d for d in os.environ.get(
+    "RENDER_BLOCKED_DOMAINS",
+    "doubleclick.net,google-analytics.com,googletagmanager.com,googlesyndication.com,"
+    "adservice.google.com,facebook.net,connect.facebook.net,hotjar.com,"
+    "scorecardresearch.com,quantserve.com,segment.io,newrelic.com"
+).split(",") if d]
+# "domcontentloaded", "load", "selector" (wait for wait_selector) or
+# "networkidle" (capped at RENDER_NETWORKIDLE_CAP_MS)
+RENDER_WAIT_STRATEGY = os.environ.get("RENDER_WAIT_STRATEGY", "networkidle")
+RENDER_WAIT_STRATEGIES = ("domcontentloaded", "load", "selector", "networkidle")
+RENDER_NETWORKIDLE_CAP_MS = int(os.environ.get("RENDER_NETWORKIDLE_CAP_MS", 5000))
+RENDER_TIMEOUT_MS = int(os.environ.get("RENDER_TIMEOUT_MS", 30000))
+
+# ---------- Page Cache ----------
+# Recently fetched pages, keyed by page_id, so follow-up calls can pull
+# further chunks without refetching. Oldest entries are evicted first.
+PAGE_CACHE_SIZE = int(os.environ.get("PAGE_CACHE_SIZE", 32))
+_page_cache: "OrderedDict[str, dict[str, Any]]" = OrderedDict()
+
+# ---------- Batch Fetch Limits ----------
+# Concurrency caps for fetch_many: total in-flight fetches per batch, and
+# in-flight fetches against any single host.
+FETCH_MAX_CONCURRENCY = int(os.environ.get("FETCH_MAX_CONCURRENCY", 8))
+FETCH_PER_HOST_CONCURRENCY = int(os.environ.get("FETCH_PER_HOST_CONCURRENCY", 2))
+FETCH_MANY_MAX_SPECS = int(os.environ.get("FETCH_MANY_MAX_SPECS", 50))
+# Worker processes used to parse pages in parallel (created on first use)
+PARSE_WORKERS = int(os.environ.get("PARSE_WORKERS", os.cpu_count() or 2))
+_parse_pool: Optional[ProcessPoolExecutor] = None
+
+def get_parse_pool() -> ProcessPoolExecutor:
+    """Return the shared parsing process pool, creating it on first use."""
+    global _parse_pool
+    if _parse_pool is None:
+        _parse_pool = ProcessPoolExecutor(max_workers=PARSE_WORKERS)
+    return _parse_pool
+
+def discard_parse_pool(pool: ProcessPoolExecutor) -> None:
+    """Drop a broken parsing pool so the next get_parse_pool() starts a fresh one."""
+    global _parse_pool
+    if _parse_pool is pool:
+        _parse_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+def cache_page(entry: dict[str, Any]) -> str:
+    """Store a page entry in the LRU page cache and return its page_id."""
+    page_id = uuid.uuid4().hex[:12]
+    _page_cache[page_id] = entry
+    while len(_page_cache) > PAGE_CACHE_SIZE:
+        _page_cache.popitem(last=False)
+    return page_id
+
+def get_cached_page(page_id: str) -> Optional[dict[str, Any]]:
+    """Look up a cached page entry, marking it as recently used."""
+    entry = _page_cache.get(page_id)
+    if entry is not None:
+        _page_cache.move_to_end(page_id)
+    return entry
+
 # ---------- Helper Functions ----------
 
-def html_to_markdown(element: BeautifulSoup) -> str:
-    """Convert HTML element or tree into Markdown."""
+def html_to_markdown(element: Union["BeautifulSoup", str]) -> str:
+    """Convert an HTML element, tree or markup string into Markdown."""
+    import markdownify
     html_content = str(element)
-    return markdownify.markdownify(html_content, heading_style="ATX")
+    try:
+        return markdownify.markdownify(html_content, heading_style="ATX")
+    except RecursionError:
+        # markdownify walks the tree recursively; fall back to plain text
+        # for documents nested deeper than the interpreter allows.
+        if isinstance(element, str):
+            from bs4 import BeautifulSoup
+            element = BeautifulSoup(element, "html.parser")
+        return element.get_text("\n", strip=True)
+
+def _record_size(record: dict[str, Any]) -> int:
+    """Approximate the JSON size of a structure record without encoding it."""
+    if "text" in record:
+        return len(record["text"]) + 4
+    size = len(record["tag"]) + 40
+    for key, value in record["attributes"].items():
+        if isinstance(value, list):
+            value = " ".join(value)
+        size += len(key) + len(str(value)) + 6
+    return size
 
-def serialize_structure(element: BeautifulSoup) -> Any:
-    """Recursively convert HTML into a JSON-friendly nested dict structure."""
-    def _serialize(node):
+def iter_structure(
+    element: "BeautifulSoup",
+    max_depth: int = STRUCTURE_MAX_DEPTH,
+    attributes: Optional[list[str]] = None
+) -> Iterator[dict[str, Any]]:
+    """
+    Walk an HTML tree iteratively and yield one flat record per node.
+
+    Records are yielded in document order. Elements look like
+    {"id", "parent", "depth", "tag", "attributes"}; text nodes look like
+    {"id", "parent", "depth", "text"}. Elements at max_depth are yielded
+    with "truncated": True and their children are skipped.
+
+    Args:
+        element: Root element to walk.
+        max_depth: Deepest level whose children are still visited.
+        attributes: Attribute names to keep; None keeps every attribute.
+    """
+    next_id = 0
+    # Explicit stack of (node, depth, parent_id) instead of recursion, so
+    # deeply nested documents cannot hit the interpreter's recursion limit.
+    stack = [(element, 0, None)]
+    while stack:
+        node, depth, parent_id = stack.pop()
         if node.name is None:
-            text = node.string
-            return text.strip() if text else ""
-        children = [_serialize(child) for child in node.children if child.name or (child.string and child.string.strip())]
-        return {
+            text = node.string.strip() if node.string else ""
+            if text:
+                yield {"id": next_id, "parent": parent_id, "depth": depth, "text": text}
+                next_id += 1
+            continue
+
+        if attributes is None:
+            attrs = dict(node.attrs)
+        else:
+            attrs = {k: v for k, v in node.attrs.items() if k in attributes}
+        record = {
+            "id": next_id,
+            "parent": parent_id,
+            "depth": depth,
             "tag": node.name,
-            "attributes": node.attrs,
-            "content": children
+            "attributes": attrs
         }
-    return _serialize(element)
+        node_id = next_id
+        next_id += 1
+
+        if depth >= max_depth and node.contents:
+            record["truncated"] = True
+            yield record
+            continue
+        yield record
+        # Push children in reverse so they pop off in document order
+        for child in reversed(node.contents):
+            stack.append((child, depth + 1, node_id))
+
+def serialize_structure(
+    element: "BeautifulSoup",
+    max_depth: int = STRUCTURE_MAX_DEPTH,
+    max_nodes: int = STRUCTURE_MAX_NODES,
+    max_bytes: int = STRUCTURE_MAX_BYTES,
+    attributes: Optional[list[str]] = DEFAULT_ATTRIBUTES
+) -> Any:
+    """
+    Convert HTML into a JSON-friendly nested dict structure within budgets.
 
-def xpath_to_css(xpath: str) -> str:
-    """Convert simple XPath-like expressions to CSS selectors (basic only)."""
-    import re
-    css = xpath.lstrip("/")
+    Serialization stops once max_nodes or max_bytes is reached; the root then
+    carries a "truncated" entry describing which budget was hit.
+    """
+    root = None
+    nodes: dict[int, dict[str, Any]] = {}
+    count = 0
+    size = 0
+    truncated = None
+
+    for record in iter_structure(element, max_depth, attributes):
+        record_size = _record_size(record)
+        if count >= max_nodes:
+            truncated = "max_nodes"
+        elif size + record_size > max_bytes:
+            truncated = "max_bytes"
+        if truncated:
+            break
+        count += 1
+        size += record_size
+
+        if "text" in record:
+            value = record["text"]
+        else:
+            value = {
+                "tag": record["tag"],
+                "attributes": record["attributes"],
+                "content": []
+            }
+            if record.get("truncated"):
+                value["truncated"] = "max_depth"
+            nodes[record["id"]] = value
+
+        if record["parent"] is None:
+            root = value
+        else:
+            nodes[record["parent"]]["content"].append(value)
+
+    if isinstance(root, dict) and truncated:
+        root["truncated"] = {"reason": truncated, "nodes": count, "bytes": size}
+    return root if root is not None else ""
+
+def chunk_structure(
+    element: "BeautifulSoup",
+    max_depth: int = STRUCTURE_MAX_DEPTH,
+    max_nodes: int = STRUCTURE_MAX_NODES,
+    max_bytes: int = STRUCTURE_MAX_BYTES,
+    attributes: Optional[list[str]] = DEFAULT_ATTRIBUTES,
+    max_chunks: int = STRUCTURE_MAX_CHUNKS
+) -> tuple[list[list[dict[str, Any]]], bool]:
+    """
+    Split the flat structure records of a tree into bounded chunks.
+
+    Each chunk holds at most max_nodes records and roughly max_bytes of JSON.
+    Returns (chunks, truncated), where truncated is True if the tree did not
+    fit into max_chunks chunks.
+    """
+    chunks: list[list[dict[str, Any]]] = []
+    current: list[dict[str, Any]] = []
+    size = 0
 
-    css = re.sub(r"\[@([a-zA-Z0-9_-]+)='([^']+)'\]", r"[\1='\2']", css)
-    css = re.sub(r"([a-zA-Z0-9_-]+)\[([a-zA-Z0-9_-]+)='([^']+)'\]", r"\1#\3", css)
-    css = css.replace("/", " > ")
-    css = re.sub(r"\[(\d+)\]", lambda m: f":nth-of-type({m.group(1)})", css)
-    return css.strip()
+    for record in iter_structure(element, max_depth, attributes):
+        record_size = _record_size(record)
+        if current and (len(current) >= max_nodes or size + record_size > max_bytes):
+            chunks.append(current)
+            if len(chunks) >= max_chunks:
+                return chunks, True
+            current = []
+            size = 0
+        current.append(record)
+        size += record_size
 
-# ---------- MCP Tool Definition ----------
+    if current:
+        chunks.append(current)
+    return chunks, False
+
+@lru_cache(maxsize=XPATH_CACHE_SIZE)
+def compile_xpath(expression: str) -> "etree.XPath":
+    """Compile an XPath expression once; repeated expressions reuse the compiled object."""
+    from lxml import etree
+    return etree.XPath(expression)
+
+# Paths ("/", "./", "..", "(") or a leading function call such as count(...)
+_XPATH_PREFIX = re.compile(r"^\s*(?:\.{0,2}/|\(|[a-z][a-z-]*\()")
+# Syntax no CSS selector has outside quoted strings: "/" steps, "@" attributes,
+# "::" axes, node tests such as text() and positional predicates like [2]
+_XPATH_MARKER = re.compile(r"/|@|::|\b(?:text|node|comment)\(\)|\[\s*\d+\s*\]")
+_QUOTED = re.compile(r"'[^']*'|\"[^\"]*\"")
+
+def resolve_selector_type(element_address: str, selector_type: str = "auto") -> str:
+    """Decide whether an element address is XPath or CSS ("auto" sniffs the syntax)."""
+    if selector_type != "auto":
+        return selector_type
+    if _XPATH_PREFIX.match(element_address) or _XPATH_MARKER.search(_QUOTED.sub("", element_address)):
+        return "xpath"
+    return "css"
+
+def select_element(html: str, element_address: str, selector_type: str = "auto") -> dict[str, Any]:
+    """
+    Locate an element in raw HTML by XPath (evaluated natively by lxml) or CSS.
+
+    Returns a dict with exactly one of:
+        "node":   BeautifulSoup element that was matched
+        "values": list of strings/numbers for XPath expressions that select
+                  text, attributes or scalars (e.g. //title/text(), count(//a))
+        "error":  description of why nothing could be selected
+    """
+    from bs4 import BeautifulSoup
+    from lxml import etree
+    from lxml import html as lxml_html
+
+    kind = resolve_selector_type(element_address, selector_type)
+    if kind == "xpath" and selector_type == "auto" and not _XPATH_PREFIX.match(element_address):
+        # A relative path such as div[@id='x'] is searched for anywhere in the
+        # document, as it was when addresses were translated to CSS
+        element_address = "//" + element_address.lstrip()
+
+    if kind == "css":
+        soup = BeautifulSoup(html, "html.parser")
+        try:
+            target = soup.select_one(element_address)
+        except Exception as e:
+            return {"error": f"Invalid CSS selector: {str(e)}"}
+        return {"node": target} if target else {"error": "Element not found"}
+
+    if kind != "xpath":
+        return {"error": f"Unknown selector_type: {selector_type}. Use 'auto', 'xpath' or 'css'"}
+
+    try:
+        xpath = compile_xpath(element_address)
+    except etree.XPathSyntaxError as e:
+        return {"error": f"Invalid XPath: {str(e)}"}
+    try:
+        # lxml refuses str input with an <?xml encoding=...?> declaration; the
+        # page is already decoded, so parse its UTF-8 bytes and ignore the declaration
+        tree = lxml_html.fromstring(html.encode("utf-8"), parser=lxml_html.HTMLParser(encoding="utf-8"))
+        matches = xpath(tree)
+    except (etree.XPathEvalError, etree.ParserError, ValueError) as e:
+        return {"error": f"XPath evaluation failed: {str(e)}"}
+
+    if not isinstance(matches, list):
+        # Scalar results: count(), string(), boolean()
+        return {"values": [matches]}
+    if not matches:
+        return {"error": "Element not found"}
+
+    first = matches[0]
+    if not isinstance(first, etree._Element):
+        return {"values": [str(match) for match in matches]}
+
+    # Hand the matched subtree to BeautifulSoup so markdown conversion and
+    # structure serialization work the same as for CSS selection.
+    fragment = lxml_html.tostring(first, encoding="unicode", with_tail=False)
+    fragment_soup = BeautifulSoup(fragment, "html.parser")
+    return {
+        "node": fragment_soup.find() or fragment_soup,
+        # Absolute location of the match, used as the provenance prefix for chunks
+        "path": _parse_lxml_path(first.getroottree().getpath(first))
+    }
+
+def _parse_lxml_path(path: str) -> list[tuple[str, int]]:
+    """Turn an lxml getpath() result like /html/body/div[2] into (tag, index) steps."""
+    steps = []
+    for step in path.strip("/").split("/"):
+        match = re.match(r"^([^\[]+)(?:\[(\d+)\])?$", step)
+        if match:
+            steps.append((match.group(1), int(match.group(2) or 1)))
+    return steps
+
+# ---------- Text Segmentation ----------
+# Elements whose content becomes one citation chunk, unless they contain
+# other blocks (e.g. an <li> wrapping <p>s), in which case we descend.
+BLOCK_TAGS = frozenset({
+    "p", "h1", "h2", "h3", "h4", "h5", "h6", "li", "pre", "blockquote",
+    "tr", "dt", "dd", "figcaption", "caption", "address"
+})
+# Layout elements that never form a chunk themselves
+CONTAINER_TAGS = frozenset({
+    "html", "body", "div", "section", "article", "main", "header", "footer",
+    "nav", "aside", "ul", "ol", "dl", "table", "thead", "tbody", "tfoot",
+    "figure", "form", "fieldset", "details", "[document]"
+})
+SKIPPED_TAGS = frozenset({"head", "script", "style", "noscript", "template", "svg", "iframe"})
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?])\s+(?=[\"'(\[A-Z0-9])")
+
+def _element_steps(element: Any, base_path: Optional[list[tuple[str, int]]] = None) -> list[tuple[str, int]]:
+    """(tag, nth-of-type) steps from the document root down to element."""
+    steps = []
+    node = element
+    while node is not None and node.name != "[document]":
+        index = 1
+        for sibling in node.previous_siblings:
+            if sibling.name == node.name:
+                index += 1
+        steps.append((node.name, index))
+        node = node.parent
+    steps.reverse()
+    if base_path:
+        # Element lives in a re-parsed fragment: swap the fragment root's step
+        # for the absolute path of the match in the original document.
+        steps = base_path + steps[1:]
+    return steps
+
+def _steps_to_xpath(steps: list[tuple[str, int]]) -> str:
+    return "/" + "/".join(f"{tag}[{index}]" for tag, index in steps)
+
+def _steps_to_css(steps: list[tuple[str, int]]) -> str:
+    return " > ".join(f"{tag}:nth-of-type({index})" for tag, index in steps)
+
+def _block_markdown(element: Any) -> str:
+    """Markdown for a single block element."""
+    if element.name == "tr":
+        # markdownify emits a full table (with header rule) for a lone row
+        cells = element.find_all(["td", "th"], recursive=False)
+        return " | ".join(cell.get_text(" ", strip=True) for cell in cells)
+    return html_to_markdown(element).strip()
+
+def _split_sentences(text: str, max_chars: int) -> list[tuple[int, int]]:
+    """Split text into (start, end) spans of whole sentences, each <= max_chars where possible."""
+    if len(text) <= max_chars:
+        return [(0, len(text))]
+    spans = []
+    start = 0
+    end = 0
+    for match in _SENTENCE_BREAK.finditer(text):
+        if match.start() - start > max_chars and end > start:
+            spans.append((start, end))
+            start = end_of_break
+        end = match.start()
+        end_of_break = match.end()
+    if len(text) - start > max_chars and end > start:
+        spans.append((start, end))
+        start = end_of_break
+    spans.append((start, len(text)))
+    return spans
+
+def segment_text(
+    root: Any,
+    base_path: Optional[list[tuple[str, int]]] = None,
+    max_chars: int = CHUNK_MAX_CHARS
+) -> tuple[str, list[dict[str, Any]]]:
+    """
+    Split an HTML tree into citation chunks with offsets and provenance.
+
+    Each block element (paragraph, heading, list item, table row, ...) becomes
+    a chunk; long blocks are split further at sentence boundaries. The chunks'
+    markdown is joined with blank lines into one document, and every chunk
+    records its [start, end) character offsets into that document plus the
+    XPath and CSS path of the source element.
+
+    Chunk ids hash the source path and text, so they stay the same across
+    refetches of an unchanged page.
+
+    Returns:
+        (markdown, chunks) where each chunk is
+        {"id", "text", "start", "end", "tag", "xpath", "css"}
+    """
+    from bs4.element import PreformattedString
+
+    # Mark every element that has a block or container below it, so the walk
+    # below knows where to stop descending (one upward pass per element).
+    has_blocks: set[int] = set()
+    for element in root.find_all(True):
+        if element.name in BLOCK_TAGS or element.name in CONTAINER_TAGS:
+            parent = element.parent
+            while parent is not None and id(parent) not in has_blocks:
+                has_blocks.add(id(parent))
+                if parent is root:
+                    break
+                parent = parent.parent
+
+    def is_inline(child: Any) -> bool:
+        if child.name is None:
+            # Plain text only; skip comments, doctypes and other markup strings
+            return not isinstance(child, PreformattedString)
+        return (
+            child.name not in BLOCK_TAGS
+            and child.name not in CONTAINER_TAGS
+            and child.name not in SKIPPED_TAGS
+            and id(child) not in has_blocks
+        )
+
+    # Walk the tree in document order. Stack items are either elements or
+    # (parent, [inline children]) runs of mixed text/inline markup that sit
+    # between blocks and are emitted as one chunk attributed to the parent.
+    sources: list[tuple[Any, str]] = []
+    stack: list[Any] = [root]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, tuple):
+            parent, run = item
+            text = html_to_markdown("".join(str(child) for child in run)).strip()
+            if text:
+                sources.append((parent, text))
+            continue
+        if item.name in SKIPPED_TAGS:
+            continue
+        if id(item) not in has_blocks and item.name != "[document]":
+            text = _block_markdown(item)
+            if text:
+                sources.append((item, text))
+            continue
+
+        items: list[Any] = []
+        run: list[Any] = []
+        for child in item.contents:
+            if is_inline(child):
+                run.append(child)
+                continue
+            if run:
+                items.append((item, run))
+                run = []
+            if child.name is not None:
+                items.append(child)
+        if run:
+            items.append((item, run))
+        stack.extend(reversed(items))
+
+    parts: list[str] = []
+    chunks: list[dict[str, Any]] = []
+    seen_ids: set[str] = set()
+    offset = 0
+    for element, text in sources:
+        steps = _element_steps(element, base_path)
+        xpath = _steps_to_xpath(steps)
+        css = _steps_to_css(steps)
+        for span_start, span_end in _split_sentences(text, max_chars):
+            chunk_text = text[span_start:span_end]
+            chunk_id = "c" + hashlib.sha1(f"{xpath}\0{chunk_text}".encode()).hexdigest()[:10]
+            while chunk_id in seen_ids:
+                chunk_id = "c" + hashlib.sha1(chunk_id.encode()).hexdigest()[:10]
+            seen_ids.add(chunk_id)
+            chunks.append({
+                "id": chunk_id,
+                "text": chunk_text,
+                "start": offset + span_start,
+                "end": offset + span_end,
+                "tag": element.name,
+                "xpath": xpath,
+                "css": css
+            })
+        parts.append(text)
+        offset += len(text) + 2  # account for the "\n\n" separator
+
+    return "\n\n".join(parts), chunks
+
+def _resolve_attributes(attributes: Optional[list[str]]) -> Optional[list[str]]:
+    """Map the tool-level attribute argument onto an allow-list (None = all)."""
+    if attributes is None:
+        return list(DEFAULT_ATTRIBUTES)
+    if "*" in attributes:
+        return None
+    return attributes
+
+def _elapsed_ms(started: float) -> float:
+    return round((time.perf_counter() - started) * 1000, 1)
+
+def is_blocked_host(host: str, patterns: list[str]) -> bool:
+    """True if host equals, is a subdomain of, or glob-matches any pattern."""
+    return any(
+        host == pattern or host.endswith("." + pattern) or fnmatch.fnmatch(host, pattern)
+        for pattern in patterns
+    )
+
+def load_html(
+    url: str,
+    render: bool = False,
+    wait_strategy: str = RENDER_WAIT_STRATEGY,
+    wait_selector: Optional[str] = None,
+    blocked_resource_types: Optional[list[str]] = None,
+    blocked_domains: Optional[list[str]] = None
+) -> tuple[str, dict[str, Any]]:
+    """
+    Fetch raw HTML with requests, or render it with Playwright. Raises on failure.
+
+    Renders abort requests for blocked resource types and domains, navigate
+    until DOMContentLoaded and then apply the wait strategy. Returns
+    (html, stats) where stats holds per-phase "timings_ms" and, for renders,
+    the number of "blocked_requests".
+    """
+    timings: dict[str, float] = {}
+    stats: dict[str, Any] = {"timings_ms": timings}
+    started = time.perf_counter()
+
+    if not render:
+        import requests
+        response = requests.get(url, timeout=15)
+        response.raise_for_status()
+        timings["fetch"] = _elapsed_ms(started)
+        return response.text, stats
+
+    if wait_strategy not in RENDER_WAIT_STRATEGIES:
+        raise ValueError(f"Unknown wait_strategy: {wait_strategy}. Use one of {', '.join(RENDER_WAIT_STRATEGIES)}")
+    if wait_strategy == "selector" and not wait_selector:
+        raise ValueError("wait_strategy 'selector' requires wait_selector")
+
+    blocked_types = set(RENDER_BLOCKED_RESOURCE_TYPES if blocked_resource_types is None else blocked_resource_types)
+    blocked_hosts = RENDER_BLOCKED_DOMAINS if blocked_domains is None else blocked_domains
+    stats["blocked_requests"] = 0
+
+    def route_request(route):
+        request = route.request
+        host = urlparse(request.url).hostname or ""
+        if request.resource_type in blocked_types or is_blocked_host(host, blocked_hosts):
+            stats["blocked_requests"] += 1
+            route.abort()
+        else:
+            route.continue_()
+
+    from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeoutError
+    with sync_playwright() as p:
+        browser = p.chromium.launch(headless=True)
+        try:
+            page = browser.new_page()
+            if blocked_types or blocked_hosts:
+                page.route("**/*", route_request)
+            timings["launch"] = _elapsed_ms(started)
+
+            phase = time.perf_counter()
+            page.goto(url, wait_until="domcontentloaded", timeout=RENDER_TIMEOUT_MS)
+            timings["navigate"] = _elapsed_ms(phase)
+
+            phase = time.perf_counter()
+            if wait_strategy == "load":
+                page.wait_for_load_state("load", timeout=RENDER_TIMEOUT_MS)
+            elif wait_strategy == "selector":
+                page.wait_for_selector(wait_selector, timeout=RENDER_TIMEOUT_MS)
+            elif wait_strategy == "networkidle":
+                try:
+                    page.wait_for_load_state("networkidle", timeout=RENDER_NETWORKIDLE_CAP_MS)
+                except PlaywrightTimeoutError:
+                    # Long-polling pages never go idle; take what has rendered so far
+                    stats["networkidle_capped"] = True
+            timings["wait"] = _elapsed_ms(phase)
+
+            phase = time.perf_counter()
+            html = page.content()
+            timings["content"] = _elapsed_ms(phase)
+        finally:
+            browser.close()
+    return html, stats
+
+def structure_page(
+    html: str,
+    url: str,
+    element_address: Optional[str],
+    selector_type: str,
+    structure_format: str,
+    budgets: dict[str, Any],
+    extract_mode: str = "markdown"
+) -> tuple[dict[str, Any], Optional[dict[str, Any]]]:
+    """
+    Select, convert and serialize already-fetched HTML.
+
+    Kept free of server state so it can run in a worker process. Returns
+    (result, page_entry); page_entry is the data to store in the page cache
+    (chunked structure or text chunks), which the caller does in the server
+    process.
+    """
+    base_path = None
+    if element_address:
+        selection = select_element(html, element_address, selector_type)
+        if "error" in selection:
+            return {
+                "url": url,
+                "element_address": element_address,
+                "markdown": "",
+                "structured_data": {"error": selection["error"]}
+            }, None
+        if "values" in selection:
+            return {
+                "url": url,
+                "element_address": element_address,
+                "markdown": "\n".join(str(value) for value in selection["values"]),
+                "structured_data": {"xpath_result": selection["values"]}
+            }, None
+        node = selection["node"]
+        base_path = selection.get("path")
+    else:
+        from bs4 import BeautifulSoup
+        node = BeautifulSoup(html, "html.parser")
+
+    result: dict[str, Any] = {"url": url, "element_address": element_address}
+    page_entry: dict[str, Any] = {"url": url, "element_address": element_address}
+
+    if extract_mode == "chunks":
+        markdown, text_chunks = segment_text(node, base_path)
+        page_entry["markdown"] = markdown
+        page_entry["text_chunks"] = {chunk["id"]: chunk for chunk in text_chunks}
+        # The segmented document goes back so the offsets can be resolved
+        # against it; chunks past a truncated end are fetched with get_chunks.
+        result["markdown"] = markdown[:MARKDOWN_MAX_CHARS]
+        result["markdown_truncated"] = len(markdown) > MARKDOWN_MAX_CHARS
+        result["chunks"] = [
+            {
+                "id": chunk["id"],
+                "start": chunk["start"],
+                "end": chunk["end"],
+                "tag": chunk["tag"],
+                "xpath": chunk["xpath"],
+                "css": chunk["css"]
+            }
+            for chunk in text_chunks
+        ]
+    else:
+        markdown = html_to_markdown(node)
+        result["markdown"] = markdown[:MARKDOWN_MAX_CHARS]
+        result["markdown_truncated"] = len(markdown) > MARKDOWN_MAX_CHARS
+
+    if structure_format == "nested":
+        result["structured_data"] = serialize_structure(node, **budgets)
+    elif structure_format == "chunked":
+        chunks, truncated = chunk_structure(node, **budgets)
+        page_entry["structure_chunks"] = chunks
+        result["structured_data"] = chunks[0] if chunks else []
+        result["structure_chunk"] = 0
+        result["structure_chunks"] = len(chunks)
+        result["structure_truncated"] = truncated
+    else:
+        result["structured_data"] = None
+
+    if "text_chunks" not in page_entry and "structure_chunks" not in page_entry:
+        return result, None
+    return result, page_entry
+
+# ---------- MCP Tool Definitions ----------
 
 @mcp.tool()
+@track_calls
 def fetch_and_structure(
     url: str,
     element_address: Optional[str] = None,
-    render: bool = False
-) -> dict[str, Union[str, dict]]:
+    render: bool = False,
+    selector_type: str = "auto",
+    structure_format: str = "nested",
+    extract_mode: str = "markdown",
+    wait_strategy: Optional[str] = None,
+    wait_selector: Optional[str] = None,
+    block_resources: Optional[list[str]] = None,
+    max_depth: Optional[int] = None,
+    max_nodes: Optional[int] = None,
+    max_bytes: Optional[int] = None,
+    attributes: Optional[list[str]] = None
+) -> dict[str, Any]:
     """
     Fetch or render a webpage, convert to Markdown, and return structured data.
 
     Args:
         url: The URL to fetch.
-        element_address: Optional XPath-like string for narrowing to an element.
+        element_address: Optional XPath expression or CSS selector for narrowing
+            to an element. XPath may also select text, attributes or scalars
+            (e.g. //title/text()), which are returned as plain values.
         render: Use Playwright to render full JS (if True), or requests otherwise.
+        selector_type: "xpath", "css", or "auto" (XPath if the address starts
+            with "/", "./", "(" or a function call, or uses XPath-only syntax
+            such as "[@id='x']", "::", "text()" or "a/b"; CSS otherwise).
+        structure_format: "nested" for a budgeted nested tree, "chunked" for flat
+            node records split into chunks (fetch the rest with get_structure_chunk),
+            or "none" to skip structured data entirely.
+        extract_mode: "markdown" returns the page as one Markdown string;
+            "chunks" also splits it into paragraph/sentence chunks with stable
+            ids, character offsets into the returned markdown and XPath/CSS
+            provenance, so passages can be cited by id (see get_chunks).
+        wait_strategy: When rendering, what to wait for after DOMContentLoaded:
+            "domcontentloaded" (nothing more), "load", "selector" (wait_selector
+            appears) or "networkidle" (capped). Default RENDER_WAIT_STRATEGY.
+        wait_selector: CSS selector to wait for with wait_strategy="selector".
+        block_resources: Resource types to block while rendering, e.g.
+            ["image", "font", "media"]; [] blocks none. Tracker domains are
+            always blocked.
+        max_depth: Deepest element level to serialize (default STRUCTURE_MAX_DEPTH).
+        max_nodes: Maximum nodes per response or chunk (default STRUCTURE_MAX_NODES).
+        max_bytes: Approximate JSON byte budget per response or chunk
+            (default STRUCTURE_MAX_BYTES).
+        attributes: Attribute names to keep on elements; ["*"] keeps all.
 
     Returns:
         {
             "url": ..., "element_address": ...,
-            "markdown": ..., "structured_data": ...
+            "markdown": ..., "markdown_truncated": ...,
+            "structured_data": ...,
+            "timings_ms": {"fetch" | "launch", "navigate", "wait", "content", "parse"},
+            "blocked_requests": ...,  # render only
+            # extract_mode="chunks" only (markdown is then the chunks joined
+            # by blank lines, which start/end index into):
+            "chunks": [{"id", "start", "end", "tag", "xpath", "css"}, ...],
+            # page_id is set whenever chunks or structure chunks were cached
+            # structure_format="chunked" only:
+            "page_id": ..., "structure_chunk": 0, "structure_chunks": ...,
+            "structure_truncated": ...
         }
     """
-    print(f"[debug-server] fetch_and_structure(url={url}, element_address={element_address}, render={render})")
+
+    if structure_format not in STRUCTURE_FORMATS:
+        return {
+            "url": url,
+            "element_address": element_address,
+            "markdown": "",
+            "structured_data": {"error": f"Unknown structure_format: {structure_format}. Use 'nested', 'chunked' or 'none'"}
+        }
+    if extract_mode not in EXTRACT_MODES:
+        return {
+            "url": url,
+            "element_address": element_address,
+            "markdown": "",
+            "structured_data": {"error": f"Unknown extract_mode: {extract_mode}. Use 'markdown' or 'chunks'"}
+        }
 
     try:
-        if render:
-            with sync_playwright() as p:
-                browser = p.chromium.launch(headless=True)
-                page = browser.new_page()
-                page.goto(url, wait_until="networkidle")
-                html = page.content()
-                browser.close()
-        else:
-            response = requests.get(url, timeout=15)
-            response.raise_for_status()
-            html = response.text
+        html, stats = load_html(
+            url, render, wait_strategy or RENDER_WAIT_STRATEGY, wait_selector, block_resources
+        )
     except Exception as e:
         return {
             "url": url,
@@ -94,40 +827,232 @@ def fetch_and_structure(
             "structured_data": {"error": f"Failed to load page: {str(e)}"}
         }
 
-    soup = BeautifulSoup(html, "html.parser")
+    budgets = {
+        "max_depth": max_depth or STRUCTURE_MAX_DEPTH,
+        "max_nodes": max_nodes or STRUCTURE_MAX_NODES,
+        "max_bytes": max_bytes or STRUCTURE_MAX_BYTES,
+        "attributes": _resolve_attributes(attributes)
+    }
+    parse_started = time.perf_counter()
+    result, page_entry = structure_page(
+        html, url, element_address, selector_type, structure_format, budgets, extract_mode
+    )
+    stats["timings_ms"]["parse"] = _elapsed_ms(parse_started)
+    result.update(stats)
+    if page_entry is not None:
+        result["page_id"] = cache_page(page_entry)
+    return result
+
+@mcp.tool()
+@track_calls
+async def fetch_many(
+    specs: list[dict[str, Any]],
+    structure_format: str = "none",
+    extract_mode: str = "markdown",
+    max_concurrency: Optional[int] = None,
+    per_host_concurrency: Optional[int] = None,
+    ctx: Context = None
+) -> dict[str, Any]:
+    """
+    Fetch and structure many pages concurrently.
 
-    if element_address:
-        css_selector = xpath_to_css(element_address)
-        target = soup.select_one(css_selector)
-        if not target:
-            return {
-                "url": url,
-                "element_address": element_address,
-                "markdown": "",
-                "structured_data": {"error": "Element not found"}
-            }
-        node = target
-    else:
-        node = soup
+    Pages are fetched in parallel (bounded overall and per host) and parsed on
+    a process pool. A progress notification is sent as each page finishes, so
+    clients can follow the batch while it runs.
+
+    Args:
+        specs: List of {"url": ..., "element_address": ..., "render": ...,
+            "selector_type": ..., "wait_strategy": ..., "wait_selector": ...};
+            only "url" is required.
+        structure_format: Applied to every page; "nested", "chunked" or "none".
+            Defaults to "none" to keep batch responses small.
+        extract_mode: Applied to every page; "markdown" or "chunks".
+        max_concurrency: Max pages in flight at once (default FETCH_MAX_CONCURRENCY).
+        per_host_concurrency: Max pages in flight per host
+            (default FETCH_PER_HOST_CONCURRENCY).
+
+    Returns:
+        {
+            "results": [ {fetch_and_structure result + "index", "elapsed_ms"}, ... ],
+            "completed": ..., "failed": ..., "elapsed_ms": ...
+        }
+        Results are listed in the same order as specs.
+    """
+
+    if structure_format not in STRUCTURE_FORMATS:
+        return {"error": f"Unknown structure_format: {structure_format}. Use 'nested', 'chunked' or 'none'"}
+    if extract_mode not in EXTRACT_MODES:
+        return {"error": f"Unknown extract_mode: {extract_mode}. Use 'markdown' or 'chunks'"}
+    if len(specs) > FETCH_MANY_MAX_SPECS:
+        return {"error": f"Too many specs: {len(specs)}. At most {FETCH_MANY_MAX_SPECS} per call"}
+
+    budgets = {
+        "max_depth": STRUCTURE_MAX_DEPTH,
+        "max_nodes": STRUCTURE_MAX_NODES,
+        "max_bytes": STRUCTURE_MAX_BYTES,
+        "attributes": list(DEFAULT_ATTRIBUTES)
+    }
+    global_limit = asyncio.Semaphore(max_concurrency or FETCH_MAX_CONCURRENCY)
+    host_limits: dict[str, asyncio.Semaphore] = {}
+    loop = asyncio.get_running_loop()
+    batch_start = time.perf_counter()
+
+    async def run_spec(index: int, spec: dict[str, Any]) -> dict[str, Any]:
+        url = spec.get("url")
+        element_address = spec.get("element_address")
+        started = time.perf_counter()
+        if not url:
+            result = {"url": url, "element_address": element_address, "markdown": "",
+                      "structured_data": {"error": "Spec is missing 'url'"}}
+        else:
+            host = urlparse(url).netloc
+            host_limit = host_limits.setdefault(
+                host, asyncio.Semaphore(per_host_concurrency or FETCH_PER_HOST_CONCURRENCY)
+            )
+            try:
+                # Host slot first: URLs queued behind a busy host must not hold global slots
+                async with host_limit, global_limit:
+                    html, stats = await asyncio.to_thread(
+                        load_html, url, bool(spec.get("render", False)),
+                        spec.get("wait_strategy") or RENDER_WAIT_STRATEGY, spec.get("wait_selector")
+                    )
+            except Exception as e:
+                html = None
+                result = {"url": url, "element_address": element_address, "markdown": "",
+                          "structured_data": {"error": f"Failed to load page: {str(e)}"}}
+
+            if html is not None:
+                args = (html, url, element_address, spec.get("selector_type", "auto"),
+                        structure_format, budgets, extract_mode)
+                parse_started = time.perf_counter()
+                pool = get_parse_pool()
+                try:
+                    try:
+                        result, page_entry = await loop.run_in_executor(pool, structure_page, *args)
+                    except BrokenProcessPool:
+                        # A worker died (e.g. out of memory); later pages get a fresh
+                        # pool, this one is parsed in-process
+                        discard_parse_pool(pool)
+                        result, page_entry = await asyncio.to_thread(structure_page, *args)
+                except Exception as e:
+                    # One unparseable page must not discard the other specs' results
+                    result, page_entry = {
+                        "url": url, "element_address": element_address, "markdown": "",
+                        "structured_data": {"error": f"Failed to parse page: {type(e).__name__}: {e}"}
+                    }, None
+                stats["timings_ms"]["parse"] = _elapsed_ms(parse_started)
+                result.update(stats)
+                if page_entry is not None:
+                    result["page_id"] = cache_page(page_entry)
+
+        result["index"] = index
+        result["elapsed_ms"] = _elapsed_ms(started)
+        return result
+
+    tasks = [asyncio.create_task(run_spec(i, spec)) for i, spec in enumerate(specs)]
+    results: list[Optional[dict[str, Any]]] = [None] * len(specs)
+    failed = 0
+    for done, finished in enumerate(asyncio.as_completed(tasks), start=1):
+        result = await finished
+        results[result["index"]] = result
+        error = isinstance(result.get("structured_data"), dict) and "error" in result["structured_data"]
+        failed += int(error)
+        if ctx is not None:
+            await ctx.report_progress(done, len(specs))
+            await ctx.info(f"fetch_many: {done}/{len(specs)} {'failed' if error else 'done'} {result['url']}")
 
     return {
-        "url": url,
-        "element_address": element_address,
-        "markdown": html_to_markdown(node),
-        "structured_data": serialize_structure(node)
+        "results": results,
+        "completed": len(specs) - failed,
+        "failed": failed,
+        "elapsed_ms": _elapsed_ms(batch_start)
+    }
+
+@mcp.tool()
+@track_calls
+def get_structure_chunk(page_id: str, chunk: int) -> dict[str, Any]:
+    """
+    Return one chunk of flat structure records from a page fetched in "chunked" mode.
+
+    Args:
+        page_id: The page_id returned by fetch_and_structure.
+        chunk: Zero-based chunk index (less than "structure_chunks").
+
+    Returns:
+        {"page_id": ..., "url": ..., "structure_chunk": ..., "structure_chunks": ...,
+         "structured_data": [...]}
+    """
+
+    entry = get_cached_page(page_id)
+    if entry is None or "structure_chunks" not in entry:
+        return {"error": f"Unknown or expired page_id: {page_id}. Fetch the page again."}
+
+    chunks = entry["structure_chunks"]
+    if not 0 <= chunk < len(chunks):
+        return {"error": f"Chunk {chunk} out of range; page has {len(chunks)} chunks"}
+
+    return {
+        "page_id": page_id,
+        "url": entry["url"],
+        "structure_chunk": chunk,
+        "structure_chunks": len(chunks),
+        "structured_data": chunks[chunk]
+    }
+
+@mcp.tool()
+@track_calls
+def get_chunks(page_id: str, chunk_ids: list[str]) -> dict[str, Any]:
+    """
+    Return the full text of citation chunks from a page fetched with extract_mode="chunks".
+
+    Args:
+        page_id: The page_id returned by fetch_and_structure or fetch_many.
+        chunk_ids: Chunk ids to return, as listed in the "chunks" of that response.
+
+    Returns:
+        {"page_id": ..., "url": ...,
+         "chunks": [{"id", "text", "start", "end", "tag", "xpath", "css"}, ...],
+         "missing": [ids not found on this page]}
+    """
+
+    entry = get_cached_page(page_id)
+    if entry is None or "text_chunks" not in entry:
+        return {"error": f"Unknown or expired page_id: {page_id}. Fetch the page again with extract_mode='chunks'."}
+
+    text_chunks = entry["text_chunks"]
+    return {
+        "page_id": page_id,
+        "url": entry["url"],
+        "chunks": [text_chunks[chunk_id] for chunk_id in chunk_ids if chunk_id in text_chunks],
+        "missing": [chunk_id for chunk_id in chunk_ids if chunk_id not in text_chunks]
     }
 
 def cleanup_handler(sig=None, frame=None):
     """Handle cleanup when the server is being shut down"""
-    print("[debug-server] Shutting down precision-citation server...")
-    # Add any necessary cleanup code here
+    log.info("Shutting down precision-citation server...")
+    if _parse_pool is not None:
+        _parse_pool.shutdown(wait=False, cancel_futures=True)
 
 # Register signal handlers for proper cleanup
 signal.signal(signal.SIGINT, cleanup_handler)
 signal.signal(signal.SIGTERM, cleanup_handler)
 atexit.register(cleanup_handler)
 
+def renderer_health() -> dict:
+    """Parse pool and Playwright state for /health, without starting either."""
+    return {
+        "parse_pool": "started" if _parse_pool is not None else "not started",
+        "parse_workers": PARSE_WORKERS,
+        "playwright_installed": importlib.util.find_spec("playwright") is not None,
+        "cached_pages": len(_page_cache),
+    }
+
+
+install_health(mcp, checks={"renderer": renderer_health})
+install_metrics(mcp)
+
+
 if __name__ == "__main__":
-    print(f"[debug-server] Starting Content Extractor Server on port {SERVER_PORT}...")
+    log.info("Starting Content Extractor Server on port %s...", SERVER_PORT)
     mcp.run(transport="sse")
-    print("[debug-server] Server stopped.")
+    log.info("Server stopped.")
@@ -0,0 +1,23 @@
+"""
+Reading SQLite's EXPLAIN QUERY PLAN output.
+
+Shared by the SQL guardrails in server.py and by scripts/index_advisor.py,
+which both need to know which table a "SCAN ..." line refers to. Since
+SQLite 3.36 the plan names a table by its alias when the query gives it
+one ("SCAN u" for FROM users u), so the alias has to be mapped back.
+"""
+
+import re
+
+
+def scan_targets(sql: str, tables) -> dict:
+    """Map the names EXPLAIN QUERY PLAN scans (tables or their aliases) to tables.
+
+    Keys are lowercase; tables are the ones the statement touches.
+    """
+    names = {table.lower(): table for table in tables}
+    for table in tables:
+        pattern = rf'\b"?{re.escape(table)}"?\s+(?:as\s+)?(\w+)'
+        for alias in re.findall(pattern, sql, re.IGNORECASE):
+            names.setdefault(alias.lower(), table)
+    return names
@@ -1,17 +1,27 @@
+import asyncio
+import json
 import random
+import re
 import sqlite3
+import time
 import os
 import pathlib
 import sys
 import atexit
 import signal
+from collections import OrderedDict
+from contextlib import contextmanager
+from urllib.parse import quote
 
-import requests
 from fastmcp import FastMCP
 from dotenv import load_dotenv
 
+from instrumentation import configure_logging, install_health, install_metrics, track_calls
+from query_plans import scan_targets
+
 # Load environment variables from .env file
 load_dotenv()
+log = configure_logging("server")
 # Get port from environment variable or use default
 SERVER_PORT = int(os.environ.get("SERVER_PORT", 8089))
 
@@ -27,57 +37,240 @@ DB_PATH = DATA_DIR / "sqlite.db"
 # Create data directory if it doesn't exist
 if not os.path.exists(DATA_DIR):
     os.makedirs(DATA_DIR)
-    print(f"[debug-server] Created data directory at {DATA_DIR}")
+    log.info("Created data directory at %s", DATA_DIR)
+
+# Set to have execute_sql append every statement here for scripts/index_advisor.py,
+# e.g. data/query_log.jsonl; off by default, as it adds a write to every statement
+QUERY_LOG_PATH = os.environ.get("QUERY_LOG_PATH", "")
+
+# Cached SELECT results, keyed on normalized SQL plus parameters (0 disables)
+RESULT_CACHE_SIZE = int(os.environ.get("RESULT_CACHE_SIZE", 128))
+# Prepared statements kept by the connection, so repeated parameterized SQL skips parsing
+SQL_STATEMENT_CACHE_SIZE = int(os.environ.get("SQL_STATEMENT_CACHE_SIZE", 512))
+
+# Query guardrails: a statement may run this long before it is interrupted...
+SQL_TIMEOUT_MS = int(os.environ.get("SQL_TIMEOUT_MS", 5000))
+# ...and return at most this many rows and (roughly) bytes before being truncated
+SQL_MAX_ROWS = int(os.environ.get("SQL_MAX_ROWS", 1000))
+SQL_MAX_RESULT_BYTES = int(os.environ.get("SQL_MAX_RESULT_BYTES", 1_000_000))
+# Full scans of tables larger than this are flagged before execution
+SQL_LARGE_TABLE_ROWS = int(os.environ.get("SQL_LARGE_TABLE_ROWS", 100_000))
+# What to do with a flagged statement: reject it, warn and run it, or add a LIMIT
+SQL_GUARD_POLICIES = ("reject", "warn", "limit")
+SQL_GUARD_POLICY = os.environ.get("SQL_GUARD_POLICY", "warn")
+if SQL_GUARD_POLICY not in SQL_GUARD_POLICIES:
+    raise ValueError(f"SQL_GUARD_POLICY must be one of {SQL_GUARD_POLICIES}, not {SQL_GUARD_POLICY!r}")
+# get_current_weather: upstream (point it at scripts/fake_weather_server.py to test offline),
+# request timeout, how long an answer is fresh, and how much longer a stale one may be
+# served while it is refreshed in the background (0 disables stale-while-revalidate)
+WEATHER_ENDPOINT = os.environ.get("WEATHER_ENDPOINT", "https://wttr.in").rstrip("/")
+WEATHER_TIMEOUT_SECONDS = float(os.environ.get("WEATHER_TIMEOUT_SECONDS", 5))
+WEATHER_TTL_SECONDS = float(os.environ.get("WEATHER_TTL_SECONDS", 600))
+WEATHER_STALE_SECONDS = float(os.environ.get("WEATHER_STALE_SECONDS", 3600))
+WEATHER_CACHE_SIZE = int(os.environ.get("WEATHER_CACHE_SIZE", 256))
+
+# ASCII art: fonts parsed at startup (comma-separated pyfiglet names) and rendered outputs kept
+ASCII_ART_FONTS = [f.strip() for f in os.environ.get("ASCII_ART_FONTS", "standard").split(",") if f.strip()]
+ASCII_ART_CACHE_SIZE = int(os.environ.get("ASCII_ART_CACHE_SIZE", 256))
+ASCII_ART_MAX_BATCH = int(os.environ.get("ASCII_ART_MAX_BATCH", 100))
+
+# describe_database computes column statistics exactly up to this many rows, from a sample above it
+DESCRIBE_SAMPLE_ROWS = int(os.environ.get("DESCRIBE_SAMPLE_ROWS", 10_000))
 
 conn = None
-try:
-    print(f"[debug-server] Attempting to connect to SQLite DB at {DB_PATH}")
-    conn = sqlite3.connect(str(DB_PATH))
-    print(f"[debug-server] Connected to SQLite DB at {DB_PATH}")
-except Exception as e:
-    print(f"[debug-server] Error connecting to database: {e}")
+
+
+def connect_db():
+    """Open the database on first use, so the server starts without waiting on it."""
+    global conn
+    if conn is None:
+        try:
+            log.info("Attempting to connect to SQLite DB at %s", DB_PATH)
+            conn = sqlite3.connect(str(DB_PATH), cached_statements=SQL_STATEMENT_CACHE_SIZE)
+            log.info("Connected to SQLite DB at %s", DB_PATH)
+        except Exception as e:
+            log.error("Error connecting to database: %s", e)
+    return conn
 
 
 @mcp.tool()
+@track_calls
 def add(a: int, b: int) -> int:
     """Add two numbers"""
-    print(f"[debug-server] add({a}, {b})")
     return a + b
 
 
 @mcp.tool()
+@track_calls
 def get_secret_word() -> str:
-    print("[debug-server] get_secret_word()")
     return random.choice(["apple", "banana", "cherry"])
 
 
+# Weather answers per city, and the one upstream request per city in flight;
+# concurrent misses await the same task instead of each calling upstream
+_weather_cache = OrderedDict()  # city key -> (fetched at, text)
+_weather_inflight = {}          # city key -> asyncio.Task
+_weather_client = None
+
+
+def _weather_key(city: str) -> str:
+    return " ".join(city.split()).lower()
+
+
+async def _fetch_weather(key: str, city: str) -> str:
+    global _weather_client
+    import httpx
+    try:
+        if _weather_client is None:
+            _weather_client = httpx.AsyncClient(timeout=WEATHER_TIMEOUT_SECONDS)
+        response = await _weather_client.get(f"{WEATHER_ENDPOINT}/{quote(city)}")
+        response.raise_for_status()
+        _weather_cache[key] = (time.monotonic(), response.text)
+        _weather_cache.move_to_end(key)
+        while len(_weather_cache) > WEATHER_CACHE_SIZE:
+            _weather_cache.popitem(last=False)
+        return response.text
+    finally:
+        _weather_inflight.pop(key, None)
+
+
+def _weather_request(key: str, city: str) -> asyncio.Task:
+    """Start an upstream request for city unless one is already in flight."""
+    task = _weather_inflight.get(key)
+    if task is None:
+        task = asyncio.create_task(_fetch_weather(key, city))
+        task.add_done_callback(_log_weather_failure)
+        _weather_inflight[key] = task
+    return task
+
+
+def _log_weather_failure(task: asyncio.Task) -> None:
+    # Also marks the exception as retrieved when no caller awaited the task
+    if not task.cancelled() and task.exception() is not None:
+        log.warning("Weather request failed: %r", task.exception())
+
+
 @mcp.tool()
-def get_current_weather(city: str) -> str:
-    print(f"[debug-server] get_current_weather({city})")
+@track_calls
+async def get_current_weather(city: str) -> str:
+    """Get the current weather for a city
+
+    Answers are cached per city for WEATHER_TTL_SECONDS; a stale answer is
+    returned immediately while a fresh one is fetched in the background.
+    """
+    import httpx
+
+    key = _weather_key(city)
+    entry = _weather_cache.get(key)
+    age = time.monotonic() - entry[0] if entry else None
+    if entry and age < WEATHER_TTL_SECONDS:
+        _weather_cache.move_to_end(key)
+        return entry[1]
+    if entry and age < WEATHER_TTL_SECONDS + WEATHER_STALE_SECONDS:
+        _weather_request(key, city)
+        return entry[1]
 
-    endpoint = "https://wttr.in"
-    response = requests.get(f"{endpoint}/{city}")
-    return response.text
+    try:
+        # shield: a caller giving up must not cancel the request others are waiting on
+        return await asyncio.shield(_weather_request(key, city))
+    except httpx.HTTPError as e:
+        return f"Weather lookup failed for {city}: {str(e) or type(e).__name__}"
 
 @mcp.tool()
+@track_calls
 def get_current_time() -> str:
     """Get the current time"""
-    print("[debug-server] get_current_time()")
     from datetime import datetime
     return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
+# Parsing a figlet font costs far more than rendering with it, so each font is
+# loaded once into a Figlet and rendered outputs are cached
+_figlets = {}                   # font name -> pyfiglet.Figlet
+_ascii_art_cache = OrderedDict()  # (text, font, width) -> rendered text
+
+
+def _figlet(font: str):
+    fig = _figlets.get(font)
+    if fig is None:
+        import pyfiglet
+        fig = _figlets[font] = pyfiglet.Figlet(font=font)
+    return fig
+
+
+def preload_ascii_fonts(fonts: list[str] = ASCII_ART_FONTS) -> None:
+    """Parse the configured fonts before the first request needs them."""
+    for font in fonts:
+        try:
+            _figlet(font)
+        except ImportError:
+            log.warning("pyfiglet not installed; ASCII art tools are unavailable")
+            return
+        except Exception as e:
+            log.warning("Could not preload font %r: %s", font, e)
+    log.info("Preloaded ASCII art fonts: %s", ", ".join(_figlets))
+
+
+def render_ascii_art(text: str, font: str = "standard", width: int = 80) -> str:
+    """Render text with a preloaded font, reusing earlier renderings."""
+    key = (text, font, width)
+    art = _ascii_art_cache.get(key)
+    if art is not None:
+        _ascii_art_cache.move_to_end(key)
+        return art
+    fig = _figlet(font)
+    # Width is read at render time; the tools are synchronous, so no other
+    # render can interleave with this one
+    fig.width = width
+    art = str(fig.renderText(text))
+    if ASCII_ART_CACHE_SIZE:
+        _ascii_art_cache[key] = art
+        while len(_ascii_art_cache) > ASCII_ART_CACHE_SIZE:
+            _ascii_art_cache.popitem(last=False)
+    return art
+
+
 @mcp.tool()
-def ascii_word_art_generator(words: str) -> str:
-    """Generate ASCII art for a given word"""
-    print(f"[debug-server] ascii_word_art_generator({words})")
+@track_calls
+def ascii_word_art_generator(words: str, font: str = "standard", width: int = 80) -> str:
+    """Generate ASCII art for a given word
+
+    Args:
+        words: Text to render
+        font: pyfiglet font name
+        width: Maximum line width before the art wraps
+    """
     
     # Simple ASCII art generator using pyfiglet
     try:
-        import pyfiglet
-        ascii_art = pyfiglet.figlet_format(words)
-        return ascii_art
+        return render_ascii_art(words, font, width)
     except ImportError:
         return "Error: pyfiglet module not installed. Please install it to use this feature."
+    except Exception as e:
+        return f"Error: could not render with font {font!r}: {type(e).__name__}: {e}"
+
+
+@mcp.tool()
+@track_calls
+def ascii_word_art_batch(words: list[str], font: str = "standard", width: int = 80) -> dict:
+    """Generate ASCII art for many strings in one call
+
+    Args:
+        words: Texts to render, each separately
+        font: pyfiglet font name used for all of them
+        width: Maximum line width before the art wraps
+
+    Returns:
+        Dictionary with the rendered art, in the same order as words
+    """
+
+    if len(words) > ASCII_ART_MAX_BATCH:
+        return {"error": f"Too many strings: {len(words)}. At most {ASCII_ART_MAX_BATCH} per call"}
+    try:
+        return {"results": [render_ascii_art(text, font, width) for text in words]}
+    except ImportError:
+        return {"error": "pyfiglet module not installed. Please install it to use this feature."}
+    except Exception as e:
+        return {"error": f"Could not render with font {font!r}: {type(e).__name__}: {e}"}
 
 
 
@@ -97,9 +290,296 @@ def ascii_word_art_generator(words: str) -> str:
     
 #     return f"Server Status:\n{status}"
 
+# The query log stays open, so a statement costs a buffered write, not an open and close
+_query_log = None
+
+
+def log_query(sql: str, duration_ms: float) -> None:
+    """Append one executed statement to the query log, if QUERY_LOG_PATH is set."""
+    global _query_log
+    if not QUERY_LOG_PATH:
+        return
+    try:
+        if _query_log is None or _query_log.name != QUERY_LOG_PATH:
+            flush_query_log()
+            _query_log = open(QUERY_LOG_PATH, "a", encoding="utf-8")
+        _query_log.write(json.dumps({"ts": time.time(), "sql": sql, "duration_ms": round(duration_ms, 3)}) + "\n")
+    except OSError as e:
+        log.warning("Could not write query log: %s", e)
+
+
+def flush_query_log() -> None:
+    """Write out buffered query log lines and close the file."""
+    global _query_log
+    if _query_log is not None:
+        try:
+            _query_log.close()
+        except OSError as e:
+            log.warning("Could not write query log: %s", e)
+        _query_log = None
+
+
+atexit.register(flush_query_log)
+
+
+# Result cache. Each entry remembers the write counter of every table it
+# read; a write through this connection bumps the counters of the tables it
+# touches, and PRAGMA data_version catches commits from other connections.
+_result_cache = OrderedDict()   # key -> (table versions, result text)
+_table_versions = {}            # table name -> write counter
+_data_version = None
+
+_SQL_LITERAL = re.compile(r"""('(?:[^']|'')*'|"(?:[^"]|"")*")""")
+_NONDETERMINISTIC = re.compile(
+    r"\b(?:random|randomblob|changes|total_changes|last_insert_rowid|"
+    r"current_date|current_time|current_timestamp|'now')\b",
+    re.IGNORECASE
+)
+# Tables that cannot be pinned down make a write invalidate everything
+_ALL_TABLES = "*"
+# EXPLAIN cannot be wrapped in another EXPLAIN; it only compiles its statement
+_EXPLAIN = re.compile(r"^\s*explain\b", re.IGNORECASE)
+
+
+def normalize_sql(sql: str) -> str:
+    """Collapse whitespace and case outside quoted literals and identifiers."""
+    parts = _SQL_LITERAL.split(sql.strip().rstrip(";").strip())
+    return "".join(part if i % 2 else re.sub(r"\s+", " ", part).lower() for i, part in enumerate(parts))
+
+
+def statement_tables(sql: str, params=()) -> tuple[set, set]:
+    """Tables a statement reads and writes, from its compiled bytecode.
+
+    EXPLAIN compiles without running, and OpenRead/OpenWrite name the root
+    page of every table or index the statement touches. Unlike an authorizer
+    this also sees count(*) (which reads no columns) and works for prepared
+    statements reused from the statement cache.
+
+    EXPLAIN statements touch no tables. A statement that does not compile
+    counts as writing everything; running it reports the actual error.
+    """
+    if _EXPLAIN.match(sql):
+        return set(), set()
+    roots = {1: "sqlite_master"}
+    roots.update(conn.execute("SELECT rootpage, tbl_name FROM sqlite_master WHERE rootpage > 0"))
+    try:
+        program = conn.execute(f"EXPLAIN {sql}", params).fetchall()
+    except sqlite3.Error:
+        return set(), {_ALL_TABLES}
+    read, written = set(), set()
+    is_write = False
+    for _, opcode, p1, p2, p3, _, p5, _ in program:
+        if opcode == "Transaction" and p2:
+            is_write = True
+        elif opcode in ("OpenRead", "OpenWrite"):
+            # Only the main database with a literal root page can be resolved
+            table = roots.get(p2) if p3 == 0 and not p5 & 0x02 else None
+            (read if opcode == "OpenRead" else written).add(table or _ALL_TABLES)
+        elif opcode == "Clear":
+            # DELETE without WHERE empties the b-tree instead of opening it
+            written.add(roots.get(p1) or _ALL_TABLES)
+        elif opcode == "Program":
+            # Trigger bodies are compiled separately and may write anywhere
+            written.add(_ALL_TABLES)
+    if is_write and not written or "sqlite_master" in written:
+        written.add(_ALL_TABLES)
+    return read, written
+
+
+def _check_data_version() -> None:
+    """Drop the whole cache when another connection has committed."""
+    global _data_version
+    version = conn.execute("PRAGMA data_version").fetchone()[0]
+    if version != _data_version:
+        _result_cache.clear()
+        _data_version = version
+
+
+def result_cache_key(sql: str, params=(), kind: str = "text"):
+    """Cache key for a read-only statement, or None if it must not be cached.
+
+    kind separates the result shapes of the tools sharing the cache.
+    """
+    if not RESULT_CACHE_SIZE or _NONDETERMINISTIC.search(sql):
+        return None
+    if not sql.lstrip().upper().startswith(("SELECT", "WITH")):
+        return None
+    return kind, normalize_sql(sql), json.dumps(params, sort_keys=True, default=str)
+
+
+def get_cached_result(key):
+    """Return the cached result for key if none of its tables changed since."""
+    entry = _result_cache.get(key)
+    if entry is None:
+        return None
+    versions, text = entry
+    if any(_table_versions.get(table, 0) != version for table, version in versions.items()):
+        del _result_cache[key]
+        return None
+    _result_cache.move_to_end(key)
+    return text
+
+
+def cache_result(key, tables: set, text) -> None:
+    """Store a SELECT result with the current versions of the tables it read."""
+    if _ALL_TABLES in tables:
+        return
+    _result_cache[key] = ({table: _table_versions.get(table, 0) for table in tables}, text)
+    _result_cache.move_to_end(key)
+    while len(_result_cache) > RESULT_CACHE_SIZE:
+        _result_cache.popitem(last=False)
+
+
+def record_writes(tables: set) -> None:
+    """Bump the write counters of tables a statement modified."""
+    if _ALL_TABLES in tables:
+        _result_cache.clear()
+        _describe_cache.clear()
+        return
+    for table in tables:
+        _table_versions[table] = _table_versions.get(table, 0) + 1
+
+
+# Query guardrails. Statements are checked with EXPLAIN QUERY PLAN before
+# they run; while they run a progress handler enforces the time limit, and
+# results are fetched only up to the row and byte budgets.
+_row_estimates = {}             # table -> ((data_version, write counter), rows)
+_SCAN = re.compile(r"^SCAN (\w+)")
+_PRAGMA = re.compile(r"^\s*pragma\b", re.IGNORECASE)
+_LIMIT_CLAUSE = re.compile(r"\blimit\s+\S+\s*$", re.IGNORECASE)
+
+
+class QueryRejected(Exception):
+    """A statement the guard policy refuses to run."""
+
+
+def estimated_rows(table: str):
+    """Approximate row count of a table (max rowid), cached until it is written."""
+    version = (_data_version, _table_versions.get(table, 0))
+    cached = _row_estimates.get(table)
+    if cached and cached[0] == version:
+        return cached[1]
+    try:
+        rows = conn.execute(f'SELECT max(rowid) FROM "{table.replace(chr(34), chr(34) * 2)}"').fetchone()[0] or 0
+    except sqlite3.Error:
+        rows = None  # WITHOUT ROWID tables, views, CTEs
+    _row_estimates[table] = (version, rows)
+    return rows
+
+
+def plan_warnings(sql: str, params, tables: set) -> list[str]:
+    """Problems EXPLAIN QUERY PLAN shows before a statement runs.
+
+    tables are the ones the statement touches (see statement_tables).
+    EXPLAIN and PRAGMA statements have no plan to check, and a statement
+    that does not compile is left to report its own error when it runs.
+    """
+    if _EXPLAIN.match(sql) or _PRAGMA.match(sql):
+        return []
+    try:
+        plan = conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+    except sqlite3.Error:
+        return []
+    names = scan_targets(sql, tables - {_ALL_TABLES})
+    warnings = []
+    large_scans = []
+    for _, _, _, detail in plan:
+        if detail == "RECURSIVE STEP":
+            warnings.append("recursive CTE: only the time and row limits bound it")
+            continue
+        match = _SCAN.match(detail)
+        table = names.get(match.group(1).lower()) if match else None
+        rows = estimated_rows(table) if table else None
+        if rows and rows > SQL_LARGE_TABLE_ROWS:
+            large_scans.append((table, rows))
+            warnings.append(f"full scan of {table} (~{rows:,} rows)")
+    if len(large_scans) > 1:
+        product = 1
+        for _, rows in large_scans:
+            product *= rows
+        warnings.append(f"nested scans of {', '.join(t for t, _ in large_scans)} may visit ~{product:,} row pairs")
+    return list(dict.fromkeys(warnings))
+
+
+def guard_statement(sql: str, params, tables: set) -> tuple[str, list[str]]:
+    """Apply SQL_GUARD_POLICY to a statement before it runs.
+
+    Returns:
+        The SQL to execute (with a LIMIT added under the "limit" policy) and
+        the warnings found; raises QueryRejected under the "reject" policy
+    """
+    warnings = plan_warnings(sql, params, tables)
+    if not warnings:
+        return sql, warnings
+    if SQL_GUARD_POLICY == "reject":
+        raise QueryRejected("; ".join(warnings))
+    is_query = sql.lstrip().upper().startswith(("SELECT", "WITH"))
+    stripped = sql.strip().rstrip(";")
+    if SQL_GUARD_POLICY == "limit" and is_query and not _LIMIT_CLAUSE.search(stripped):
+        warnings.append(f"LIMIT {SQL_MAX_ROWS} added")
+        return f"SELECT * FROM ({stripped}) LIMIT {SQL_MAX_ROWS + 1}", warnings
+    return sql, warnings
+
+
+@contextmanager
+def query_deadline(timeout_ms: int = SQL_TIMEOUT_MS):
+    """Interrupt any statement on conn that runs longer than timeout_ms."""
+    deadline = time.perf_counter() + timeout_ms / 1000
+    expired = []
+
+    def check():
+        if time.perf_counter() > deadline:
+            expired.append(True)
+            return 1  # non-zero aborts the statement
+        return 0
+
+    conn.set_progress_handler(check, 10000)
+    try:
+        yield
+    except sqlite3.OperationalError as e:
+        if expired:
+            raise sqlite3.OperationalError(
+                f"query exceeded the {timeout_ms} ms time limit and was interrupted"
+            ) from e
+        raise
+    finally:
+        conn.set_progress_handler(None, 0)
+
+
+def _value_bytes(value) -> int:
+    if isinstance(value, (str, bytes)):
+        return len(value)
+    return 8
+
+
+def fetch_within_budget(cursor) -> tuple[list, str | None]:
+    """Fetch rows until SQL_MAX_ROWS or SQL_MAX_RESULT_BYTES is reached.
+
+    Returns:
+        The rows and, if the result was cut short, a note saying why
+    """
+    rows, size = [], 0
+    while True:
+        batch = cursor.fetchmany(min(256, SQL_MAX_ROWS + 1 - len(rows)))
+        if not batch:
+            return rows, None
+        for row in batch:
+            if len(rows) >= SQL_MAX_ROWS:
+                return rows, f"truncated at {SQL_MAX_ROWS} rows"
+            size += sum(_value_bytes(value) for value in row)
+            if size > SQL_MAX_RESULT_BYTES:
+                return rows, f"truncated at {SQL_MAX_RESULT_BYTES:,} bytes"
+            rows.append(row)
+
+
 @mcp.tool()
+@track_calls
 def execute_sql(commands: list[str]) -> str:
     """Execute SQL commands on the database
+
+    Each command may run for SQL_TIMEOUT_MS and return SQL_MAX_ROWS rows;
+    full scans of large tables are reported (or rejected, depending on the
+    server's policy), so prefer selective WHERE clauses on indexed columns.
     
     Args:
         commands: List of SQL commands to execute
@@ -107,34 +587,363 @@ def execute_sql(commands: list[str]) -> str:
     Returns:
         String with results of SQL commands
     """
-    print(f"[debug-server] execute_sql({commands})")
     
-    if not conn:
+    if not connect_db():
         return "Error: Database connection not established"
     
     results = []
     cursor = conn.cursor()
+    written = set()
+    _check_data_version()
     
     try:
         for cmd in commands:
-            cursor.execute(cmd)
+            start = time.perf_counter()
+            key = result_cache_key(cmd)
+            cached = get_cached_result(key) if key else None
+            if cached is not None:
+                log_query(cmd, (time.perf_counter() - start) * 1000)
+                results.append(f"Results for: {cmd}\n{cached}")
+                continue
+
+            read, writes = statement_tables(cmd)
+            sql, warnings = guard_statement(cmd, (), read | writes)
+            with query_deadline():
+                cursor.execute(sql)
+                if writes:
+                    written |= writes
+                    record_writes(writes)
+                rows, truncated = fetch_within_budget(cursor) if cursor.description else ([], None)
+            log_query(cmd, (time.perf_counter() - start) * 1000)
+            notes = "".join(f"\nWarning: {note}" for note in warnings + ([truncated] if truncated else []))
             if cmd.strip().upper().startswith("SELECT"):
-                rows = cursor.fetchall()
                 column_names = [description[0] for description in cursor.description]
-                results.append(f"Results for: {cmd}")
-                results.append(f"Columns: {column_names}")
-                results.append(f"Rows: {rows}")
+                text = f"Columns: {column_names}\nRows: {rows}{notes}"
+                if key and not writes:
+                    cache_result(key, read, text)
+                results.append(f"Results for: {cmd}\n{text}")
             else:
-                results.append(f"Executed: {cmd}")
+                results.append(f"Executed: {cmd}{notes}")
         
         # Commit changes if any write operations were performed
         conn.commit()
         
         return "\n".join(results)
+    except QueryRejected as e:
+        conn.rollback()
+        record_writes(written)
+        return f"Query rejected ({e}). Add a selective WHERE clause or a LIMIT, or use an indexed column."
     except Exception as e:
         conn.rollback()  # Roll back any changes if an error occurred
+        # Results cached after a rolled-back write saw data that is gone now
+        record_writes(written)
         return f"SQL Error: {str(e)}"
 
 
+def _batch_entry(entry) -> tuple[str, object, list | None]:
+    """Validate one execute_sql_batch entry, returning (sql, params, params_many)."""
+    if not isinstance(entry, dict) or not isinstance(entry.get("sql"), str):
+        raise ValueError("each statement must be an object with a 'sql' string")
+    if "params" in entry and "params_many" in entry:
+        raise ValueError("use either 'params' or 'params_many', not both")
+    params = entry.get("params", ())
+    if not isinstance(params, (list, dict)) and params != ():
+        raise ValueError("'params' must be a list (for ?) or an object (for :name)")
+    params_many = entry.get("params_many")
+    if params_many is not None:
+        if not isinstance(params_many, list) or not params_many:
+            raise ValueError("'params_many' must be a non-empty list of parameter lists or objects")
+        if entry["sql"].lstrip().upper().startswith(("SELECT", "WITH")):
+            raise ValueError("'params_many' is for INSERT/UPDATE/DELETE; run SELECTs with 'params'")
+    return entry["sql"], params, params_many
+
+
+@mcp.tool()
+@track_calls
+def execute_sql_batch(statements: list[dict]) -> dict:
+    """Execute parameterized SQL statements in a single transaction
+
+    Values are bound instead of inlined, so they need no quoting and each
+    distinct statement is parsed once and reused from the statement cache.
+    Use params_many to insert or update many rows with one statement.
+    The same time, row and full-scan guardrails as execute_sql apply.
+
+    Args:
+        statements: List of objects, each one of
+            {"sql": "SELECT ... WHERE id = ?", "params": [1]}
+            {"sql": "INSERT ... VALUES (:id, :name)", "params": {"id": 1, "name": "a"}}
+            {"sql": "INSERT ... VALUES (?, ?)", "params_many": [[1, "a"], [2, "b"]]}
+
+    Returns:
+        Dictionary with one result per statement (columns and rows for
+        queries, rowcount for writes), or an error naming the failing
+        statement; on error the whole batch is rolled back
+    """
+
+    if not connect_db():
+        return {"error": "Database connection not established"}
+
+    results = []
+    written = set()
+    _check_data_version()
+    index = 0
+
+    try:
+        if not conn.in_transaction:
+            conn.execute("BEGIN")
+        for index, entry in enumerate(statements):
+            sql, params, params_many = _batch_entry(entry)
+            start = time.perf_counter()
+
+            if params_many is None:
+                key = result_cache_key(sql, params, kind="rows")
+                cached = get_cached_result(key) if key else None
+                if cached is not None:
+                    log_query(sql, (time.perf_counter() - start) * 1000)
+                    results.append({**cached, "cached": True})
+                    continue
+
+            first_params = params_many[0] if params_many else params
+            read, writes = statement_tables(sql, first_params)
+            guarded_sql, warnings = guard_statement(sql, first_params, read | writes)
+            with query_deadline():
+                if params_many is not None:
+                    cursor = conn.executemany(guarded_sql, params_many)
+                else:
+                    cursor = conn.execute(guarded_sql, params)
+                if writes:
+                    written |= writes
+                    record_writes(writes)
+                rows, truncated = fetch_within_budget(cursor) if cursor.description else ([], None)
+
+            if cursor.description is not None:
+                result = {
+                    "columns": [description[0] for description in cursor.description],
+                    "rows": [list(row) for row in rows],
+                }
+            else:
+                result = {"rowcount": cursor.rowcount}
+            if warnings or truncated:
+                result["warnings"] = warnings + ([truncated] if truncated else [])
+            if cursor.description is not None and key and not writes:
+                cache_result(key, read, result)
+            log_query(sql, (time.perf_counter() - start) * 1000)
+            results.append(result)
+
+        conn.commit()
+        return {"results": results}
+    except Exception as e:
+        conn.rollback()
+        record_writes(written)
+        kind = {ValueError: "Invalid statement", QueryRejected: "Query rejected"}.get(type(e), "SQL Error")
+        return {"error": f"{kind}: {e}", "statement": index}
+
+
+# Schema and statistics for describe_database, cached per table until the
+# table is written here, another connection commits, or the schema changes
+_describe_cache = {}            # table -> ((data_version, schema_version, write counter), description)
+
+
+def quote_identifier(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _preview(value):
+    """Shorten long min/max values so a description stays small."""
+    if isinstance(value, bytes):
+        return f"<{len(value)} bytes>"
+    if isinstance(value, str) and len(value) > 64:
+        return value[:64] + "..."
+    return value
+
+
+def _stat1_distinct(table: str) -> dict:
+    """Distinct counts of leading index columns from sqlite_stat1, if ANALYZE was run."""
+    has_stats = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'").fetchone()
+    if not has_stats:
+        return {}
+    distinct = {}
+    for index, stat in conn.execute("SELECT idx, stat FROM sqlite_stat1 WHERE tbl = ? AND idx IS NOT NULL", (table,)):
+        counts = stat.split()
+        column = conn.execute(f"PRAGMA index_info({quote_identifier(index)})").fetchone()
+        if column and len(counts) > 1 and counts[1].isdigit() and int(counts[1]):
+            distinct[column[2]] = round(int(counts[0]) / int(counts[1]))
+    return distinct
+
+
+def _scale_distinct(distinct: int, non_null: int, ratio: float) -> int:
+    """Extrapolate a sample's distinct count: near-unique columns grow with the table.
+
+    ratio is table rows per sampled row.
+    """
+    if non_null and distinct > non_null * 0.9:
+        return round(distinct * ratio)
+    return distinct
+
+
+def column_stats(table: str, columns: list[str], row_count: int, indexed: set) -> tuple[dict, int | None]:
+    """Distinct count, min, max and null fraction of every column.
+
+    Tables up to DESCRIBE_SAMPLE_ROWS rows are read in full; larger ones
+    through a sample of random rowids (seeded by the table name, so repeated
+    descriptions agree), with exact min/max for columns that lead an index.
+
+    Returns:
+        Stats per column and the sample size (None when exact)
+    """
+    if not columns or not row_count:
+        return {column: {"distinct": 0, "min": None, "max": None, "null_fraction": 0.0} for column in columns}, None
+    name = quote_identifier(table)
+    source, params, sample = name, (), None
+    if row_count > DESCRIBE_SAMPLE_ROWS:
+        try:
+            low, high = conn.execute(f"SELECT min(rowid), max(rowid) FROM {name}").fetchone()
+            rowids = random.Random(table).sample(range(low, high + 1), min(DESCRIBE_SAMPLE_ROWS, high - low + 1))
+            source = f"(SELECT * FROM {name} WHERE rowid IN (SELECT value FROM json_each(?)))"
+            params = (json.dumps(rowids),)
+        except sqlite3.OperationalError:
+            source = f"(SELECT * FROM {name} LIMIT {DESCRIBE_SAMPLE_ROWS})"  # WITHOUT ROWID
+    aggregates = ["count(*)"]
+    for column in columns:
+        quoted = quote_identifier(column)
+        aggregates += [f"count(DISTINCT {quoted})", f"min({quoted})", f"max({quoted})", f"count({quoted})"]
+    values = conn.execute(f"SELECT {', '.join(aggregates)} FROM {source}", params).fetchone()
+    if row_count > DESCRIBE_SAMPLE_ROWS:
+        sample = values[0]
+    distinct_from_stats = _stat1_distinct(table)
+    stats = {}
+    for i, column in enumerate(columns):
+        distinct, low, high, non_null = values[1 + 4 * i:5 + 4 * i]
+        if sample is not None:
+            distinct = distinct_from_stats.get(column, _scale_distinct(distinct, non_null, row_count / sample))
+            if column in indexed:
+                quoted = quote_identifier(column)
+                low, high = conn.execute(
+                    f"SELECT (SELECT min({quoted}) FROM {name}), (SELECT max({quoted}) FROM {name})"
+                ).fetchone()
+        stats[column] = {
+            "distinct": distinct,
+            "min": _preview(low),
+            "max": _preview(high),
+            "null_fraction": round(1 - non_null / values[0], 4) if values[0] else 0.0,
+        }
+    return stats, sample
+
+
+def describe_table(table: str) -> dict:
+    """Columns, indexes, foreign keys, row count and column statistics of a table."""
+    name = quote_identifier(table)
+    columns = [
+        {"name": column, "type": declared or None, "not_null": bool(not_null),
+         "default": default, "primary_key": bool(pk)}
+        for _, column, declared, not_null, default, pk in conn.execute(f"PRAGMA table_info({name})")
+    ]
+    indexes = []
+    for _, index, unique, origin, partial in conn.execute(f"PRAGMA index_list({name})"):
+        indexes.append({
+            "name": index,
+            "columns": [info[2] for info in conn.execute(f"PRAGMA index_info({quote_identifier(index)})")],
+            "unique": bool(unique),
+            "partial": bool(partial),
+        })
+    foreign_keys = [
+        {"column": column, "references": f"{parent}.{parent_column}" if parent_column else parent}
+        for _, _, parent, column, parent_column, *_ in conn.execute(f"PRAGMA foreign_key_list({name})")
+    ]
+    row_count = conn.execute(f"SELECT count(*) FROM {name}").fetchone()[0]
+    leading = {index["columns"][0] for index in indexes if index["columns"]}
+    keys = [column for column in columns if column["primary_key"]]
+    if len(keys) == 1 and (keys[0]["type"] or "").upper() == "INTEGER":
+        leading.add(keys[0]["name"])  # rowid alias
+    stats, sample = column_stats(table, [column["name"] for column in columns], row_count, leading)
+    for column in columns:
+        column["stats"] = stats[column["name"]]
+    description = {"row_count": row_count, "columns": columns, "indexes": indexes}
+    if foreign_keys:
+        description["foreign_keys"] = foreign_keys
+    if sample is not None:
+        description["stats_sample_rows"] = sample
+    return description
+
+
+@mcp.tool()
+@track_calls
+def describe_database(tables: list[str] | None = None) -> dict:
+    """Describe the database: tables, columns, indexes, row counts and column statistics
+
+    Call this before writing queries instead of exploring sqlite_master or
+    sampling rows with execute_sql. Column statistics (distinct count,
+    min, max, null fraction) are exact for small tables and estimated from
+    a sample for large ones; results are cached until the data changes.
+
+    Args:
+        tables: Names of the tables to describe (default: all of them)
+
+    Returns:
+        Dictionary with a description per table and the columns of every view
+    """
+
+    if not connect_db():
+        return {"error": "Database connection not established"}
+
+    try:
+        _check_data_version()
+        schema_version = conn.execute("PRAGMA schema_version").fetchone()[0]
+        objects = conn.execute(
+            "SELECT name, type FROM sqlite_master WHERE type IN ('table', 'view') "
+            "AND name NOT LIKE 'sqlite_%' ORDER BY name"
+        ).fetchall()
+        names = [name for name, kind in objects if kind == "table"]
+        if tables is not None:
+            unknown = [table for table in tables if table not in names]
+            if unknown:
+                return {"error": f"No such table: {', '.join(unknown)}", "tables": names}
+            names = tables
+
+        described = {}
+        for table in names:
+            version = (_data_version, schema_version, _table_versions.get(table, 0))
+            cached = _describe_cache.get(table)
+            if cached and cached[0] == version:
+                described[table] = cached[1]
+                continue
+            described[table] = describe_table(table)
+            _describe_cache[table] = (version, described[table])
+
+        result = {"tables": described}
+        views = {
+            name: [info[1] for info in conn.execute(f"PRAGMA table_info({quote_identifier(name)})")]
+            for name, kind in objects if kind == "view"
+        }
+        if views and tables is None:
+            result["views"] = views
+        return result
+    except sqlite3.Error as e:
+        return {"error": f"SQL Error: {e}"}
+
+
+def database_health() -> dict:
+    """Connection state for /health; does not open the database itself."""
+    state = {"ok": conn is not None or DB_PATH.exists(), "connected": conn is not None, "path": str(DB_PATH)}
+    if conn is not None:
+        state["in_transaction"] = conn.in_transaction
+        state["cached_results"] = len(_result_cache)
+    return state
+
+
+def cache_health() -> dict:
+    return {
+        "weather_cached_cities": len(_weather_cache),
+        "weather_requests_in_flight": len(_weather_inflight),
+        "ascii_fonts_loaded": list(_figlets),
+        "ascii_art_cached": len(_ascii_art_cache),
+    }
+
+
+install_health(mcp, checks={"database": database_health, "caches": cache_health})
+install_metrics(mcp)
+
+
 if __name__ == "__main__":
+    preload_ascii_fonts()
     mcp.run(transport="sse")
@@ -9,9 +9,12 @@ from typing import Dict, List, Any, Optional, Tuple
 from fastmcp import FastMCP
 from dotenv import load_dotenv
 
+from instrumentation import configure_logging, install_health, install_metrics, track_calls
+
 # ---------- ENVIRONMENT SETUP ----------
 # Load environment variables from .env file
 load_dotenv()
+log = configure_logging("ttg-server")
 # Get port from environment variable or use default
 SERVER_PORT = int(os.environ.get("SERVER_PORT", 8090))
 # Initialize the MCP server with the specified port
@@ -66,6 +69,7 @@ def roll_dice(number_of_dice: int, sides_per_die: int) -> List[int]:
 
 # ---------- MCP TOOL DEFINITIONS ----------
 @mcp.tool()
+@track_calls
 def roll(dice_notation: str) -> Dict[str, Any]:
     """
     Roll dice using standard dice notation (e.g., "2d6+3").
@@ -76,7 +80,6 @@ def roll(dice_notation: str) -> Dict[str, Any]:
     Returns:
         Dictionary containing the roll results and details
     """
-    print(f"[ttg-server] roll({dice_notation})")
     
     try:
         # Parse the dice notation
@@ -111,7 +114,7 @@ def roll(dice_notation: str) -> Dict[str, Any]:
 # ---------- SERVER LIFECYCLE MANAGEMENT ----------
 def cleanup_handler(sig=None, frame=None):
     """Handle cleanup when the server is being shut down"""
-    print("[ttg-server] Shutting down TTG dice server...")
+    log.info("Shutting down TTG dice server...")
     # Add any necessary cleanup code here
 
 # Register signal handlers for proper cleanup
@@ -119,8 +122,12 @@ signal.signal(signal.SIGINT, cleanup_handler)
 signal.signal(signal.SIGTERM, cleanup_handler)
 atexit.register(cleanup_handler)
 
+# ---------- HEALTH ENDPOINTS ----------
+install_health(mcp)
+install_metrics(mcp)
+
 # ---------- SERVER STARTUP ----------
 if __name__ == "__main__":
-    print(f"[ttg-server] Starting TTG Dice Server on port {SERVER_PORT}...")
+    log.info("Starting TTG Dice Server on port %s...", SERVER_PORT)
     mcp.run(transport="sse")
-    print("[ttg-server] Server stopped.")
\ No newline at end of file
+    log.info("Server stopped.")
\ No newline at end of file
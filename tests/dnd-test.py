@@ -2,7 +2,6 @@ import asyncio
 import os
 import shutil
 import subprocess
-import time
 from typing import Any, Dict
 
 from agents import Agent, Runner, gen_trace_id, trace
@@ -12,6 +11,8 @@ from agents import set_default_openai_key
 
 from dotenv import load_dotenv
 
+from readiness import wait_until_ready
+
 load_dotenv()
 set_default_openai_key(os.getenv("OPENAI_API_KEY"))
 
@@ -122,12 +123,14 @@ if __name__ == "__main__":
 
         # Run `uv run dnd-server.py` to start the DND server
         process = subprocess.Popen(["uv", "run", server_file])
-        # Give it 3 seconds to start
-        time.sleep(3)
+        # Wait until the server reports ready on /ready instead of sleeping a fixed time
+        report = wait_until_ready("http://localhost:8000", timeout=60, process=process)
 
-        print("DND server started. Running example...\n\n")
+        print(f"DND server ready after {report['waited_s']}s. Running example...\n\n")
     except Exception as e:
         print(f"Error starting DND server: {e}")
+        if process:
+            process.terminate()
         exit(1)
 
     try:
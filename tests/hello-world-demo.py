@@ -2,7 +2,6 @@ import asyncio
 import os
 import shutil
 import subprocess
-import time
 import signal
 from typing import Any
 
@@ -15,6 +14,8 @@ from agents import enable_verbose_stdout_logging
 
 from dotenv import load_dotenv
 
+from readiness import wait_until_ready
+
 # ---------- ENVIRONMENT SETUP ----------
 load_dotenv()
 set_default_openai_key(os.getenv("OPENAI_API_KEY"))
@@ -101,10 +102,10 @@ if __name__ == "__main__":
         env["SERVER_PORT"] = str(server_port)
         process = subprocess.Popen(["uv", "run", server_file], env=env)
 
-        # Give it 3 seconds to start
-        time.sleep(3)
+        # Wait until the server reports ready on /ready instead of sleeping a fixed time
+        report = wait_until_ready(f"http://localhost:{server_port}", timeout=60, process=process)
 
-        print("SSE server started. Running example...\n\n")
+        print(f"SSE server ready after {report['waited_s']}s. Running example...\n\n")
     except Exception as e:
         print(f"Error starting SSE server: {e}")
         if process:
@@ -0,0 +1,280 @@
+"""
+Offline load generator for the MCP servers in src/.
+
+Opens many concurrent SSE sessions against a server, replays a weighted mix
+of tool calls at a target rate and reports throughput and latency
+percentiles, overall and per tool. No LLM, API key or network is involved.
+
+Calls are scheduled open-loop: call i is due at i / qps seconds, whether or
+not earlier calls have finished, and its latency is measured from when it was
+due. A server that falls behind therefore shows up as growing latency
+instead of a silently lower request rate.
+
+Usage:
+    python tests/load-test.py --server src/server.py --qps 200 --duration 20 --sessions 20
+    python tests/load-test.py --url http://localhost:8089 --mix mix.json --output results.json
+
+A mix file is a JSON list of {"tool": ..., "args": {...}, "weight": ...}.
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import signal
+import socket
+import asyncio
+import argparse
+import subprocess
+from contextlib import AsyncExitStack
+from pathlib import Path
+from typing import Any, Optional
+
+from mcp import ClientSession
+from mcp.client.sse import sse_client
+
+from readiness import wait_until_ready
+
+# Read-only calls that need neither network nor API keys, per server script
+DEFAULT_MIXES: dict[str, list[dict[str, Any]]] = {
+    "server.py": [
+        {"tool": "add", "args": {"a": 7, "b": 22}, "weight": 4},
+        {"tool": "get_secret_word", "args": {}, "weight": 2},
+        {"tool": "get_current_time", "args": {}, "weight": 2},
+        {"tool": "ascii_word_art_generator", "args": {"words": "load test"}, "weight": 1},
+        {"tool": "execute_sql", "args": {"commands": ["SELECT country, count(*) FROM users GROUP BY country"]}, "weight": 3},
+        {"tool": "execute_sql_batch", "args": {"statements": [
+            {"sql": "SELECT first_name, last_name FROM users WHERE age > ?", "params": [30]}
+        ]}, "weight": 2},
+        {"tool": "describe_database", "args": {}, "weight": 1},
+    ],
+    "dnd-server.py": [
+        {"tool": "roll_dice", "args": {"dice_notation": "2d6+3"}, "weight": 4},
+        {"tool": "list_notes", "args": {}, "weight": 1},
+        {"tool": "list_characters", "args": {}, "weight": 1},
+        {"tool": "list_encounters", "args": {}, "weight": 1},
+        {"tool": "generate_random_npc", "args": {}, "weight": 2},
+        {"tool": "generate_loot", "args": {"treasure_level": "medium"}, "weight": 2},
+    ],
+    "hello-world-server.py": [
+        {"tool": "generate_hello_world", "args": {}, "weight": 1},
+    ],
+    "ttg-server.py": [
+        {"tool": "roll", "args": {"dice_notation": "4d6"}, "weight": 1},
+    ],
+}
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(server_file: Path, env_overrides: list[str], log_path: Optional[str]) -> tuple[subprocess.Popen, str]:
+    """Start a server script on a free port; returns the process and its base URL."""
+    port = free_port()
+    env = dict(os.environ, SERVER_PORT=str(port), FASTMCP_SERVER_PORT=str(port))
+    env.update(item.split("=", 1) for item in env_overrides)
+    output = open(log_path, "w") if log_path else subprocess.DEVNULL
+    process = subprocess.Popen([sys.executable, str(server_file)], env=env, stdout=output, stderr=subprocess.STDOUT)
+    return process, f"http://localhost:{port}"
+
+
+def percentile(ordered: list[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not ordered:
+        return 0.0
+    return ordered[max(0, -(-len(ordered) * q // 100) - 1)]
+
+
+def summarize(latencies: list[float], errors: int, elapsed: float) -> dict[str, Any]:
+    ordered = sorted(latencies)
+    summary = {
+        "calls": len(ordered) + errors,
+        "errors": errors,
+        "throughput_per_s": round(len(ordered) / elapsed, 2) if elapsed else 0.0,
+    }
+    for q in PERCENTILES:
+        summary[f"p{q}_ms"] = round(percentile(ordered, q) * 1000, 3)
+    summary["max_ms"] = round(ordered[-1] * 1000, 3) if ordered else 0.0
+    return summary
+
+
+async def list_tools(url: str) -> set[str]:
+    async with sse_client(f"{url}/sse") as (read, write):
+        async with ClientSession(read, write) as session:
+            await session.initialize()
+            return {tool.name for tool in (await session.list_tools()).tools}
+
+
+async def open_sessions(stack: AsyncExitStack, url: str, count: int) -> list[ClientSession]:
+    """Open and initialize count SSE sessions, all kept open until the stack closes."""
+    async def open_one() -> ClientSession:
+        read, write = await stack.enter_async_context(sse_client(f"{url}/sse"))
+        session = await stack.enter_async_context(ClientSession(read, write))
+        await session.initialize()
+        return session
+
+    # enter_async_context is not safe to interleave, so streams are opened one by one
+    sessions = []
+    for _ in range(count):
+        sessions.append(await open_one())
+    return sessions
+
+
+async def run_load(
+    url: str,
+    mix: list[dict[str, Any]],
+    sessions_count: int,
+    qps: float,
+    duration: float,
+    max_in_flight: int,
+    seed: int
+) -> dict[str, Any]:
+    rng = random.Random(seed)
+    weights = [entry.get("weight", 1) for entry in mix]
+    total_calls = int(qps * duration)
+    plan = rng.choices(mix, weights=weights, k=total_calls)
+
+    latencies: dict[str, list[float]] = {entry["tool"]: [] for entry in mix}
+    errors: dict[str, int] = {entry["tool"]: 0 for entry in mix}
+    error_samples: list[str] = []
+    limit = asyncio.Semaphore(max_in_flight)
+
+    # Checked before the load sessions open, so the error is not wrapped by their task groups
+    tools = await list_tools(url)
+    missing = sorted({entry["tool"] for entry in mix} - tools)
+    if missing:
+        raise ValueError(f"Server has no tool(s) {', '.join(missing)}; available: {', '.join(sorted(tools))}")
+
+    async with AsyncExitStack() as stack:
+        started = time.perf_counter()
+        sessions = await open_sessions(stack, url, sessions_count)
+        print(f"Opened {sessions_count} sessions in {time.perf_counter() - started:.2f}s; "
+              f"sending {total_calls} calls at {qps:g}/s for {duration:g}s")
+
+        async def call(index: int, entry: dict[str, Any], due: float) -> None:
+            async with limit:
+                session = sessions[index % len(sessions)]
+                try:
+                    result = await session.call_tool(entry["tool"], entry.get("args", {}))
+                    failed = result.isError
+                    detail = result.content[0].text if failed and result.content else ""
+                except Exception as e:
+                    failed, detail = True, f"{type(e).__name__}: {e}"
+            if failed:
+                errors[entry["tool"]] += 1
+                if len(error_samples) < 5:
+                    error_samples.append(f"{entry['tool']}: {detail[:200]}")
+            else:
+                latencies[entry["tool"]].append(time.perf_counter() - due)
+
+        tasks = []
+        load_started = time.perf_counter()
+        for index, entry in enumerate(plan):
+            due = load_started + index / qps
+            delay = due - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(call(index, entry, due)))
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - load_started
+
+        server_stats = None
+        if "server_stats" in tools:
+            result = await sessions[0].call_tool("server_stats", {})
+            server_stats = json.loads(result.content[0].text) if result.content else None
+
+    all_latencies = [latency for values in latencies.values() for latency in values]
+    return {
+        "url": url,
+        "sessions": sessions_count,
+        "target_qps": qps,
+        "duration_s": round(elapsed, 3),
+        "overall": summarize(all_latencies, sum(errors.values()), elapsed),
+        "tools": {tool: summarize(values, errors[tool], elapsed) for tool, values in latencies.items()},
+        "error_samples": error_samples,
+        "server_stats": server_stats,
+    }
+
+
+def print_report(report: dict[str, Any]) -> None:
+    columns = ("calls", "errors", "throughput_per_s") + tuple(f"p{q}_ms" for q in PERCENTILES) + ("max_ms",)
+    header = f"{'tool':<28}" + "".join(f"{column:>17}" for column in columns)
+    print(f"\n{header}\n{'-' * len(header)}")
+    rows = list(report["tools"].items()) + [("OVERALL", report["overall"])]
+    for tool, summary in rows:
+        print(f"{tool:<28}" + "".join(f"{summary[column]:>17}" for column in columns))
+    overall = report["overall"]
+    print(f"\nAchieved {overall['throughput_per_s']}/s of {report['target_qps']:g}/s target "
+          f"over {report['duration_s']}s with {report['sessions']} sessions")
+    for sample in report["error_samples"]:
+        print(f"  error: {sample}")
+    if report["server_stats"]:
+        print("\nServer-side latency (server_stats, includes calls from earlier runs):")
+        for tool, stats in report["server_stats"]["tools"].items():
+            print(f"  {tool:<28} calls {stats['calls']:>7}  p50 {stats['p50_ms']:>9} ms  "
+                  f"p95 {stats['p95_ms']:>9} ms  p99 {stats['p99_ms']:>9} ms")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Drive an MCP server over SSE with a scripted tool-call mix')
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument('--server', help='Server script to start, e.g. src/server.py')
+    target.add_argument('--url', help='Base URL of a running server, e.g. http://localhost:8089')
+    parser.add_argument('--mix', help='JSON file with [{"tool", "args", "weight"}, ...] (default: built-in mix for --server)')
+    parser.add_argument('--sessions', type=int, default=10, help='Concurrent SSE sessions')
+    parser.add_argument('--qps', type=float, default=50, help='Target tool calls per second, across all sessions')
+    parser.add_argument('--duration', type=float, default=10, help='Seconds to generate load for')
+    parser.add_argument('--max-in-flight', type=int, default=500, help='Cap on outstanding calls')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for the call sequence')
+    parser.add_argument('--server-env', action='append', default=[], metavar='KEY=VALUE',
+                        help='Extra environment for --server (repeatable), e.g. LOG_LEVEL=WARNING')
+    parser.add_argument('--server-log', help='Write the started server\'s output here (default: discard)')
+    parser.add_argument('--output', help='Also write the report to this JSON file')
+    args = parser.parse_args()
+
+    if args.mix:
+        mix = json.loads(Path(args.mix).read_text(encoding="utf-8"))
+    else:
+        name = Path(args.server).name if args.server else None
+        if name not in DEFAULT_MIXES:
+            parser.error(f"no built-in mix for {name or '--url'}; pass --mix "
+                         f"(built-in: {', '.join(DEFAULT_MIXES)})")
+        mix = DEFAULT_MIXES[name]
+
+    process = None
+    url = args.url.rstrip("/") if args.url else None
+    try:
+        if args.server:
+            process, url = start_server(Path(args.server).resolve(), args.server_env, args.server_log)
+            ready = wait_until_ready(url, process=process)
+            print(f"Started {args.server} at {url}; ready after {ready['waited_s']}s")
+        else:
+            # Fails fast with a readable error when nothing is listening at --url
+            wait_until_ready(url, timeout=5)
+        report = asyncio.run(run_load(url, mix, args.sessions, args.qps, args.duration, args.max_in_flight, args.seed))
+    except (ValueError, RuntimeError, TimeoutError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if process:
+            process.send_signal(signal.SIGTERM)
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+    print_report(report)
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"\nReport written to {args.output}")
+    return 0 if report["overall"]["errors"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,7 +2,6 @@ import asyncio
 import os
 import shutil
 import subprocess
-import time
 import signal
 from typing import Any
 
@@ -13,6 +12,8 @@ from agents import set_default_openai_key
 
 from dotenv import load_dotenv
 
+from readiness import wait_until_ready
+
 load_dotenv()
 set_default_openai_key(os.getenv("OPENAI_API_KEY"))
 
@@ -25,7 +26,7 @@ async def run(mcp_server: MCPServer):
         instructions=(
             "You can use the fetch_and_structure tool to retrieve page content.\n"
             "- Always pass the 'url'.\n"
-            "- Use 'element_address' (XPath-like) to target a specific element if needed.\n"
+            "- Use 'element_address' (an XPath expression or CSS selector) to target a specific element if needed.\n"
             "- Set 'render' to True only if the content doesn't appear in static HTML."
         ),
         mcp_servers=[mcp_server],
@@ -101,10 +102,10 @@ if __name__ == "__main__":
         env["SERVER_PORT"] = str(server_port)
         process = subprocess.Popen(["uv", "run", server_file], env=env)
 
-        # Give it 3 seconds to start
-        time.sleep(3)
+        # Wait until the server reports ready on /ready instead of sleeping a fixed time
+        report = wait_until_ready(f"http://localhost:{server_port}", timeout=60, process=process)
 
-        print("SSE server started. Running example...\n\n")
+        print(f"SSE server ready after {report['waited_s']}s. Running example...\n\n")
     except Exception as e:
         print(f"Error starting SSE server: {e}")
         if process:
@@ -0,0 +1,56 @@
+"""
+Wait for an MCP server started by a demo script to become ready.
+
+The servers expose GET /ready (see src/instrumentation.py), which answers 200
+once the server is serving and its health checks pass. Polling it replaces a
+fixed sleep, so a demo waits exactly as long as the server needs to start.
+"""
+
+import json
+import time
+import subprocess
+import urllib.error
+import urllib.request
+from typing import Any, Optional
+
+
+def wait_until_ready(
+    base_url: str,
+    timeout: float = 30.0,
+    interval: float = 0.05,
+    process: Optional[subprocess.Popen] = None
+) -> dict[str, Any]:
+    """
+    Poll base_url + "/ready" until it answers 200.
+
+    Args:
+        base_url: Server root, e.g. "http://localhost:8089"
+        timeout: Seconds to wait before giving up
+        interval: Seconds between polls
+        process: The server process; waiting stops early if it exits
+
+    Returns:
+        The readiness report (uptime, tools, in-flight calls, checks)
+
+    Raises:
+        RuntimeError: If the process exits before the server is ready
+        TimeoutError: If the server is not ready within timeout seconds
+    """
+    url = base_url.rstrip("/") + "/ready"
+    started = time.perf_counter()
+    last_error = "no response"
+    while time.perf_counter() - started < timeout:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f"Server exited with code {process.returncode} before it was ready")
+        try:
+            with urllib.request.urlopen(url, timeout=max(interval, 1.0)) as response:
+                report = json.load(response)
+                report["waited_s"] = round(time.perf_counter() - started, 3)
+                return report
+        except urllib.error.HTTPError as e:
+            # 503: listening, but a health check is failing
+            last_error = f"HTTP {e.code}: {e.read().decode('utf-8', 'replace')[:200]}"
+        except (urllib.error.URLError, ConnectionError, TimeoutError) as e:
+            last_error = str(e)
+        time.sleep(interval)
+    raise TimeoutError(f"{url} not ready after {timeout:.0f}s ({last_error})")
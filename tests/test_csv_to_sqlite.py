@@ -0,0 +1,166 @@
+"""
+Unit tests for scripts/csv_to_sqlite.py.
+
+Each test loads a small CSV written to a temporary directory, so the CSVs
+and database in data/ are never touched.
+
+Usage:
+    python -m pytest tests/test_csv_to_sqlite.py
+"""
+
+import sys
+import sqlite3
+import tempfile
+import unittest
+import contextlib
+import io
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+import csv_to_sqlite  # noqa: E402
+
+
+class CsvToSqliteTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.dir = Path(self.tmp.name)
+
+    def load(self, text, **kwargs):
+        csv_path = self.dir / "data.csv"
+        csv_path.write_text(text, encoding="utf-8")
+        db_path = self.dir / "data.db"
+        with contextlib.redirect_stdout(io.StringIO()):
+            csv_to_sqlite.csv_to_sqlite(csv_path, db_path, "data", **kwargs)
+        conn = sqlite3.connect(db_path)
+        self.addCleanup(conn.close)
+        return conn
+
+    def column_types(self, conn):
+        return {name: type_ for _, name, type_, *_ in conn.execute("PRAGMA table_info(data)")}
+
+    def test_blank_values_detect_as_text(self):
+        self.assertEqual(csv_to_sqlite.detect_column_type(["", " "]), "TEXT")
+        self.assertEqual(csv_to_sqlite.detect_column_type([]), "TEXT")
+
+    def test_column_blank_in_sample_keeps_later_dates(self):
+        conn = self.load("id,joined\n1,\n2,\n3,\n4,2024-01-01\n5,2024-02-29\n", sample_size=3)
+        self.assertEqual(self.column_types(conn)["joined"], "TEXT")
+        self.assertEqual(
+            conn.execute("SELECT id, joined FROM data WHERE joined IS NOT NULL ORDER BY id").fetchall(),
+            [(4, "2024-01-01"), (5, "2024-02-29")]
+        )
+
+    def test_widening_integer_to_real(self):
+        conn = self.load("id,score\n1,3\n2,4\n3,4.5\n", sample_size=2)
+        self.assertEqual(self.column_types(conn)["score"], "REAL")
+        self.assertEqual([v for (v,) in conn.execute("SELECT score FROM data ORDER BY id")], [3.0, 4.0, 4.5])
+
+    def test_widen_columns_copies_dates_unchanged(self):
+        conn = sqlite3.connect(":memory:")
+        self.addCleanup(conn.close)
+        conn.execute('CREATE TABLE data ("when" INTEGER)')
+        conn.execute("INSERT INTO data VALUES ('2024-01-01')")
+        csv_to_sqlite.widen_columns(conn.cursor(), "data", ["when"], ["INTEGER"], ["DATE"])
+        self.assertEqual(conn.execute('SELECT "when" FROM data').fetchall(), [("2024-01-01",)])
+
+
+class SyncTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.dir = Path(self.tmp.name)
+
+    def sync(self, text, **kwargs):
+        csv_path = self.dir / "users.csv"
+        csv_path.write_text(text, encoding="utf-8")
+        with contextlib.redirect_stdout(io.StringIO()):
+            csv_to_sqlite.csv_to_sqlite(csv_path, self.dir / "users.db", "users", key="id", **kwargs)
+        conn = sqlite3.connect(self.dir / "users.db")
+        self.addCleanup(conn.close)
+        return conn
+
+    def test_stored_value_matches_sqlite(self):
+        conn = sqlite3.connect(":memory:")
+        self.addCleanup(conn.close)
+        conn.execute("CREATE TABLE t (i INTEGER, d DATE, r REAL, x TEXT, b)")
+        for value in [" 01 ", "1.0", "1e3", "0x10", "+5", "1.5", "abc", "9223372036854775808", "2024-01-01", True, 7]:
+            conn.execute("DELETE FROM t")
+            conn.execute("INSERT INTO t VALUES (?, ?, ?, ?, ?)", (value,) * 5)
+            stored = conn.execute("SELECT i, d, r, x, b FROM t").fetchone()
+            expected = tuple(
+                csv_to_sqlite.stored_value(value, csv_to_sqlite.column_affinity(t))
+                for t in ("INTEGER", "DATE", "REAL", "TEXT", "")
+            )
+            self.assertEqual([(v, type(v)) for v in stored], [(v, type(v)) for v in expected], value)
+
+    def test_keys_compare_as_stored(self):
+        self.sync("id,name\n1,ada\n2,grace\n3,linus\n")
+        conn = self.sync("id,name\n01,ada\n2,hopper\n4,alan\n", delete_missing=True)
+        self.assertEqual(
+            conn.execute("SELECT id, name FROM users ORDER BY id").fetchall(),
+            [(1, "ada"), (2, "hopper"), (4, "alan")]
+        )
+        self.assertEqual(conn.execute("SELECT count(*) FROM _csv_sync_state").fetchone(), (3,))
+
+
+class ColumnarTest(unittest.TestCase):
+    def setUp(self):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            self.skipTest("pyarrow is not installed")
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.dir = Path(self.tmp.name)
+        self.db_path = self.dir / "data.db"
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('CREATE TABLE users (id INTEGER, joined DATE, active BOOLEAN, score REAL)')
+        conn.executemany("INSERT INTO users VALUES (?, ?, ?, ?)", [
+            (1, "2024-01-01", 1, 1.5),
+            (2, "2024-01-02", 0, None),
+            (3, "2024-02-03", None, 2),
+            (4, "soon", 1, 3.0),  # a value that does not fit the declared DATE
+        ])
+        conn.commit()
+        conn.close()
+
+    def export(self, name, **kwargs):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return csv_to_sqlite.export_table(self.db_path, "users", self.dir / name, **kwargs)
+
+    def import_(self, name, table, **kwargs):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return csv_to_sqlite.import_columnar(self.dir / name, self.db_path, table, **kwargs)
+
+    def test_misfit_column_is_string_in_every_batch(self):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        self.assertEqual(self.export("users.parquet", batch_size=1), 4)
+        table = pq.read_table(self.dir / "users.parquet")
+        self.assertEqual(table.schema.field("joined").type, pa.string())
+        self.assertEqual(table.schema.field("active").type, pa.bool_())
+        self.assertEqual(table.column("joined").to_pylist(), ["2024-01-01", "2024-01-02", "2024-02-03", "soon"])
+        self.assertEqual(table.column("score").to_pylist(), [1.5, None, 2.0, 3.0])
+
+    def test_arrow_export_streams_batches(self):
+        import pyarrow as pa
+        self.export("users.arrow", batch_size=3)
+        reader = pa.ipc.open_file(self.dir / "users.arrow")
+        self.assertEqual(reader.num_record_batches, 2)
+        self.assertEqual(reader.read_all().column("active").to_pylist(), [True, False, None, True])
+
+    def test_reimport_is_refused_unless_replacing(self):
+        self.export("users.parquet")
+        self.assertEqual(self.import_("users.parquet", "copy"), 4)
+        with self.assertRaises(ValueError):
+            self.import_("users.parquet", "copy")
+        self.assertEqual(self.import_("users.parquet", "copy", replace=True), 4)
+        conn = sqlite3.connect(self.db_path)
+        self.addCleanup(conn.close)
+        self.assertEqual(conn.execute("SELECT count(*) FROM copy").fetchone(), (4,))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,43 @@
+"""
+Unit tests for scripts/index_advisor.py, run against in-memory databases.
+
+Usage:
+    python -m pytest tests/test_index_advisor.py
+"""
+
+import sys
+import sqlite3
+import unittest
+import contextlib
+import io
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+import index_advisor  # noqa: E402
+
+
+class AdviseQueriesTest(unittest.TestCase):
+    def setUp(self):
+        self.conn = sqlite3.connect(":memory:")
+        self.addCleanup(self.conn.close)
+        self.conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, country TEXT, age INTEGER, name TEXT)")
+
+    def advise(self, *queries):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return index_advisor.advise_queries(self.conn, Counter(queries))
+
+    def test_unaliased_scan_gets_an_index(self):
+        suggestions = self.advise("SELECT name FROM users WHERE country = 'NL'")
+        self.assertEqual([(s["table"], s["columns"][0]) for s in suggestions], [("users", "country")])
+
+    def test_aliased_scan_gets_an_index(self):
+        suggestions = self.advise("SELECT u.name FROM users u WHERE u.country = 'NL'",
+                                  "SELECT name FROM users AS x WHERE x.age = 30")
+        self.assertEqual(sorted((s["table"], s["columns"][0]) for s in suggestions),
+                         [("users", "age"), ("users", "country")])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,134 @@
+"""
+Unit tests for src/server.py that need neither a running server nor network.
+
+The server is a script, so it is loaded from its path with src/ on sys.path
+(it imports instrumentation.py as a sibling). Each test swaps in an
+in-memory database, so data/sqlite.db is never opened.
+
+Usage:
+    python -m pytest tests/test_server.py
+"""
+
+import sys
+import json
+import sqlite3
+import tempfile
+import unittest
+import importlib.util
+from pathlib import Path
+from unittest import mock
+
+SRC_DIR = Path(__file__).parent.parent / "src"
+
+
+def load_server():
+    sys.path.insert(0, str(SRC_DIR))
+    spec = importlib.util.spec_from_file_location("server_under_test", SRC_DIR / "server.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+server = load_server()
+
+
+class QueryLogTest(unittest.TestCase):
+    def setUp(self):
+        db = sqlite3.connect(":memory:")
+        db.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT)")
+        db.execute("INSERT INTO users (name) VALUES ('ada'), ('grace')")
+        db.commit()
+        self.addCleanup(db.close)
+        patcher = mock.patch.object(server, "conn", db)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        server._result_cache.clear()
+        server._table_versions.clear()
+        server._describe_cache.clear()
+        # A directory cannot be opened for appending, so every log write fails
+        self.log_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.log_dir.cleanup)
+
+    def test_unwritable_query_log_does_not_fail_execute_sql(self):
+        with mock.patch.object(server, "QUERY_LOG_PATH", self.log_dir.name):
+            result = server.execute_sql(["SELECT name FROM users ORDER BY id"])
+        self.assertNotIn("Error", result)
+        self.assertIn("'ada'", result)
+
+    def test_unwritable_query_log_does_not_roll_back_batch(self):
+        with mock.patch.object(server, "QUERY_LOG_PATH", self.log_dir.name):
+            result = server.execute_sql_batch([
+                {"sql": "INSERT INTO users (name) VALUES (?)", "params": ["linus"]},
+                {"sql": "SELECT count(*) FROM users"},
+            ])
+        self.assertNotIn("error", result)
+        self.assertEqual(result["results"][1]["rows"], [[3]])
+
+    def test_query_log_records_statements(self):
+        path = Path(self.log_dir.name) / "query_log.jsonl"
+        with mock.patch.object(server, "QUERY_LOG_PATH", str(path)):
+            server.execute_sql(["SELECT id FROM users"])
+            server.execute_sql(["SELECT name FROM users"])
+            server.flush_query_log()
+        lines = path.read_text(encoding="utf-8").splitlines()
+        self.assertEqual([json.loads(line)["sql"] for line in lines], ["SELECT id FROM users", "SELECT name FROM users"])
+
+
+class StatementTablesTest(unittest.TestCase):
+    def setUp(self):
+        db = sqlite3.connect(":memory:")
+        db.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT)")
+        self.addCleanup(db.close)
+        patcher = mock.patch.object(server, "conn", db)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_select_reads_its_table(self):
+        self.assertEqual(server.statement_tables("SELECT count(*) FROM users"), ({"users"}, set()))
+
+    def test_explain_touches_no_tables(self):
+        self.assertEqual(server.statement_tables("EXPLAIN QUERY PLAN SELECT * FROM users"), (set(), set()))
+        self.assertEqual(server.statement_tables("  explain SELECT * FROM users"), (set(), set()))
+
+    def test_uncompilable_statement_counts_as_writing_everything(self):
+        self.assertEqual(server.statement_tables("SELEC 1"), (set(), {server._ALL_TABLES}))
+
+
+class GuardrailTest(unittest.TestCase):
+    def setUp(self):
+        db = sqlite3.connect(":memory:")
+        db.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT)")
+        db.executemany("INSERT INTO users (name) VALUES (?)", [("ada",), ("grace",), ("linus",)])
+        db.commit()
+        self.addCleanup(db.close)
+        # Every table counts as large and flagged statements are rejected
+        for name, value in [("conn", db), ("SQL_LARGE_TABLE_ROWS", 1), ("SQL_GUARD_POLICY", "reject")]:
+            patcher = mock.patch.object(server, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        server._result_cache.clear()
+        server._table_versions.clear()
+        server._row_estimates.clear()
+
+    def test_full_scan_is_rejected(self):
+        self.assertTrue(server.execute_sql(["SELECT * FROM users"]).startswith("Query rejected"))
+
+    def test_explain_statements_run(self):
+        result = server.execute_sql(["EXPLAIN QUERY PLAN SELECT * FROM users"])
+        self.assertNotIn("Error", result)
+        self.assertFalse(result.startswith("Query rejected"))
+        batch = server.execute_sql_batch([{"sql": "EXPLAIN QUERY PLAN SELECT * FROM users WHERE id = ?", "params": [1]}])
+        self.assertNotIn("error", batch)
+        self.assertIn("SEARCH users", str(batch["results"][0]["rows"]))
+
+    def test_pragma_statements_run(self):
+        batch = server.execute_sql_batch([{"sql": "PRAGMA table_info(users)"}])
+        self.assertEqual([row[1] for row in batch["results"][0]["rows"]], ["id", "name"])
+
+    def test_compile_error_is_the_statements_own(self):
+        self.assertEqual(server.plan_warnings("SELEC 1", (), set()), [])
+        self.assertIn("syntax error", server.execute_sql(["SELEC 1"]))
+
+
+if __name__ == "__main__":
+    unittest.main()